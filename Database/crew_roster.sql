@@ -0,0 +1,128 @@
+-- Migration: crew roster.
+-- Denormalizes the delivery departure onto truckemployeeassignment (indexed
+-- with the employee), adds the employee_week_hours summary and replaces the
+-- rest-period / weekly-hours triggers with indexed lookups against them.
+-- The API validates assignments itself (app/crud/roster_crud.py); the
+-- triggers stay as a safety net.
+USE kandypacklogistics;
+
+ALTER TABLE `truckemployeeassignment`
+  ADD COLUMN `scheduled_departure` datetime DEFAULT NULL,  -- copy of truckdelivery.scheduled_departure
+  ADD KEY `idx_assignment_employee_departure` (`employee_id`,`scheduled_departure`);
+
+-- assigned hours per employee per week (weeks start on Sunday)
+CREATE TABLE IF NOT EXISTS `employee_week_hours` (
+  `employee_id` int NOT NULL,
+  `week_start` date NOT NULL,
+  `assigned_hours` double NOT NULL DEFAULT '0',
+  PRIMARY KEY (`employee_id`,`week_start`),
+  CONSTRAINT `employee_week_hours_ibfk_1` FOREIGN KEY (`employee_id`) REFERENCES `employee` (`employee_id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+DROP TRIGGER IF EXISTS `check_consecutive_driver_deliveries`;
+DROP TRIGGER IF EXISTS `check_weekly_hours`;
+DROP TRIGGER IF EXISTS `truckemployeeassignment_week_hours_insert`;
+DROP TRIGGER IF EXISTS `truckemployeeassignment_week_hours_update`;
+DROP TRIGGER IF EXISTS `truckemployeeassignment_week_hours_delete`;
+DROP TRIGGER IF EXISTS `truckdelivery_assignment_departure_update`;
+
+-- backfill before the triggers exist
+UPDATE truckemployeeassignment tea
+JOIN truckdelivery td ON td.delivery_id = tea.truck_delivery_id
+SET tea.scheduled_departure = td.scheduled_departure;
+
+DELETE FROM employee_week_hours;
+INSERT INTO employee_week_hours (employee_id, week_start, assigned_hours)
+SELECT employee_id,
+       DATE(scheduled_departure) - INTERVAL (DAYOFWEEK(scheduled_departure) - 1) DAY,
+       SUM(assigned_hours)
+FROM truckemployeeassignment
+WHERE scheduled_departure IS NOT NULL
+GROUP BY employee_id, DATE(scheduled_departure) - INTERVAL (DAYOFWEEK(scheduled_departure) - 1) DAY;
+
+-- Crew roster safety net. The API validates assignments itself
+-- (app/crud/roster_crud.py); these triggers only re-check each insert with
+-- indexed lookups: the (employee_id, scheduled_departure) index for the
+-- driver rest period and employee_week_hours for the weekly limit.
+DELIMITER ;;
+CREATE TRIGGER `check_consecutive_driver_deliveries` BEFORE INSERT ON `truckemployeeassignment` FOR EACH ROW BEGIN
+    IF NEW.scheduled_departure IS NULL THEN
+        SET NEW.scheduled_departure = (
+            SELECT scheduled_departure FROM truckdelivery WHERE delivery_id = NEW.truck_delivery_id
+        );
+    END IF;
+
+    IF EXISTS (
+        SELECT 1 FROM employee e JOIN roles r ON r.role_id = e.role_id
+        WHERE e.employee_id = NEW.employee_id AND r.role_name = 'Driver'
+    ) AND EXISTS (
+        SELECT 1 FROM truckemployeeassignment tea
+        WHERE tea.employee_id = NEW.employee_id
+          AND tea.scheduled_departure > NEW.scheduled_departure - INTERVAL 4 HOUR
+          AND tea.scheduled_departure < NEW.scheduled_departure + INTERVAL 4 HOUR
+    ) THEN
+        SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = 'Driver cannot be assigned to consecutive deliveries without rest period.';
+    END IF;
+END ;;
+
+CREATE TRIGGER `check_weekly_hours` BEFORE INSERT ON `truckemployeeassignment` FOR EACH ROW
+FOLLOWS `check_consecutive_driver_deliveries` BEGIN
+    DECLARE total_hours DOUBLE DEFAULT 0;
+    DECLARE role_name VARCHAR(50) DEFAULT '';
+    DECLARE max_hours DOUBLE DEFAULT 0;
+    DECLARE msg VARCHAR(255) DEFAULT '';
+
+    SELECT r.role_name, r.max_hours_week
+    INTO role_name, max_hours
+    FROM employee e
+    JOIN roles r ON e.role_id = r.role_id
+    WHERE e.employee_id = NEW.employee_id;
+
+    SELECT IFNULL(MAX(w.assigned_hours), 0)
+    INTO total_hours
+    FROM employee_week_hours w
+    WHERE w.employee_id = NEW.employee_id
+      AND w.week_start = DATE(NEW.scheduled_departure) - INTERVAL (DAYOFWEEK(NEW.scheduled_departure) - 1) DAY;
+
+    IF total_hours + NEW.assigned_hours > max_hours THEN
+        SET msg = CONCAT('Weekly hour limit exceeded for ', role_name, '. Max allowed: ', max_hours, ' hours. Currently assigned: ', total_hours + NEW.assigned_hours);
+        SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = msg;
+    END IF;
+END ;;
+
+-- employee_week_hours follows truckemployeeassignment
+CREATE TRIGGER `truckemployeeassignment_week_hours_insert` AFTER INSERT ON `truckemployeeassignment` FOR EACH ROW BEGIN
+    INSERT INTO employee_week_hours (employee_id, week_start, assigned_hours)
+    VALUES (NEW.employee_id,
+            DATE(NEW.scheduled_departure) - INTERVAL (DAYOFWEEK(NEW.scheduled_departure) - 1) DAY,
+            NEW.assigned_hours)
+    ON DUPLICATE KEY UPDATE assigned_hours = assigned_hours + NEW.assigned_hours;
+END ;;
+CREATE TRIGGER `truckemployeeassignment_week_hours_update` AFTER UPDATE ON `truckemployeeassignment` FOR EACH ROW BEGIN
+    UPDATE employee_week_hours
+    SET assigned_hours = assigned_hours - OLD.assigned_hours
+    WHERE employee_id = OLD.employee_id
+      AND week_start = DATE(OLD.scheduled_departure) - INTERVAL (DAYOFWEEK(OLD.scheduled_departure) - 1) DAY;
+    INSERT INTO employee_week_hours (employee_id, week_start, assigned_hours)
+    VALUES (NEW.employee_id,
+            DATE(NEW.scheduled_departure) - INTERVAL (DAYOFWEEK(NEW.scheduled_departure) - 1) DAY,
+            NEW.assigned_hours)
+    ON DUPLICATE KEY UPDATE assigned_hours = assigned_hours + NEW.assigned_hours;
+END ;;
+CREATE TRIGGER `truckemployeeassignment_week_hours_delete` AFTER DELETE ON `truckemployeeassignment` FOR EACH ROW BEGIN
+    UPDATE employee_week_hours
+    SET assigned_hours = assigned_hours - OLD.assigned_hours
+    WHERE employee_id = OLD.employee_id
+      AND week_start = DATE(OLD.scheduled_departure) - INTERVAL (DAYOFWEEK(OLD.scheduled_departure) - 1) DAY;
+END ;;
+
+-- keep the denormalized departure of assignments in step with their delivery
+CREATE TRIGGER `truckdelivery_assignment_departure_update` AFTER UPDATE ON `truckdelivery` FOR EACH ROW BEGIN
+    IF NOT (NEW.scheduled_departure <=> OLD.scheduled_departure) THEN
+        UPDATE truckemployeeassignment
+        SET scheduled_departure = NEW.scheduled_departure
+        WHERE truck_delivery_id = NEW.delivery_id;
+    END IF;
+END ;;
+DELIMITER ;
@@ -0,0 +1,11 @@
+-- Migration: one truck delivery per order.
+-- The delivery scheduler (app/crud/schedule_crud.py) writes one truckdelivery
+-- row per order; the unique key stops two schedulers (in different API
+-- processes) from delivering the same order twice.
+USE kandypacklogistics;
+
+-- fails if an order already has more than one delivery; check first with
+--   SELECT order_id, COUNT(*) FROM truckdelivery GROUP BY order_id HAVING COUNT(*) > 1;
+ALTER TABLE `truckdelivery`
+  DROP KEY `idx_delivery_order`,
+  ADD UNIQUE KEY `uq_delivery_order` (`order_id`);
@@ -0,0 +1,12 @@
+-- Migration: composite indexes for the keyset-paginated order listing.
+-- Every filter of GET /orders can walk an index in (order_date, order_id) order;
+-- InnoDB appends the primary key (order_id) to each secondary index.
+USE kandypacklogistics;
+
+ALTER TABLE `order`
+  ADD KEY idx_order_status_date (status, order_date),
+  ADD KEY idx_order_customer_date (customer_id, order_date),
+  ADD KEY idx_order_address_date (address_id, order_date),
+  DROP KEY idx_order_status,
+  DROP KEY idx_order_customer,
+  DROP KEY order_ibfk_2;
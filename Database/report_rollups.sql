@@ -0,0 +1,123 @@
+-- Migration: daily report rollups.
+-- Creates the rollup tables and the triggers that mark changed days dirty.
+-- reports_crud rebuilds dirty days before reading, so the backfill at the
+-- end only has to mark every existing day.
+USE kandypacklogistics;
+
+CREATE TABLE IF NOT EXISTS `rollup_dirty_day` (
+  `rollup_name` varchar(20) NOT NULL,  -- 'sales' | 'deliveries' | 'hours'
+  `day` date NOT NULL,
+  PRIMARY KEY (`rollup_name`,`day`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- order totals per order_date x delivery city (city_id 0 = no address)
+CREATE TABLE IF NOT EXISTS `rollup_orders_daily` (
+  `day` date NOT NULL,
+  `city_id` int NOT NULL,
+  `order_count` int NOT NULL DEFAULT '0',
+  `delivered_count` int NOT NULL DEFAULT '0',
+  `total_price` decimal(14,2) NOT NULL DEFAULT '0.00',
+  PRIMARY KEY (`day`,`city_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- order items per order_date x delivery city x product
+CREATE TABLE IF NOT EXISTS `rollup_sales_daily` (
+  `day` date NOT NULL,
+  `city_id` int NOT NULL,
+  `product_id` int NOT NULL,
+  `order_lines` int NOT NULL DEFAULT '0',
+  `quantity` int NOT NULL DEFAULT '0',
+  `revenue` decimal(14,2) NOT NULL DEFAULT '0.00',
+  PRIMARY KEY (`day`,`city_id`,`product_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- truck deliveries per scheduled day x route x truck
+CREATE TABLE IF NOT EXISTS `rollup_deliveries_daily` (
+  `day` date NOT NULL,
+  `route_id` varchar(5) NOT NULL,
+  `truck_id` int NOT NULL,
+  `total_deliveries` int NOT NULL DEFAULT '0',
+  `delivered_count` int NOT NULL DEFAULT '0',
+  `delayed_count` int NOT NULL DEFAULT '0',
+  `on_time_count` int NOT NULL DEFAULT '0',
+  `timed_deliveries` int NOT NULL DEFAULT '0',  -- deliveries with both actual times
+  `total_hours` bigint NOT NULL DEFAULT '0',
+  PRIMARY KEY (`day`,`route_id`,`truck_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- assigned hours per scheduled day x employee
+CREATE TABLE IF NOT EXISTS `rollup_employee_hours_daily` (
+  `day` date NOT NULL,
+  `employee_id` int NOT NULL,
+  `assignment_count` int NOT NULL DEFAULT '0',
+  `assigned_hours` double NOT NULL DEFAULT '0',
+  PRIMARY KEY (`day`,`employee_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+DROP TRIGGER IF EXISTS order_rollup_insert;
+DROP TRIGGER IF EXISTS order_rollup_update;
+DROP TRIGGER IF EXISTS order_rollup_delete;
+DROP TRIGGER IF EXISTS orderitem_rollup_insert;
+DROP TRIGGER IF EXISTS orderitem_rollup_update;
+DROP TRIGGER IF EXISTS orderitem_rollup_delete;
+DROP TRIGGER IF EXISTS truckdelivery_rollup_insert;
+DROP TRIGGER IF EXISTS truckdelivery_rollup_update;
+DROP TRIGGER IF EXISTS truckdelivery_rollup_delete;
+DROP TRIGGER IF EXISTS truckemployeeassignment_rollup_insert;
+DROP TRIGGER IF EXISTS truckemployeeassignment_rollup_update;
+DROP TRIGGER IF EXISTS truckemployeeassignment_rollup_delete;
+
+DELIMITER ;;
+CREATE TRIGGER `order_rollup_insert` AFTER INSERT ON `order` FOR EACH ROW BEGIN
+    INSERT IGNORE INTO rollup_dirty_day VALUES ('sales', NEW.order_date);
+END ;;
+CREATE TRIGGER `order_rollup_update` AFTER UPDATE ON `order` FOR EACH ROW BEGIN
+    INSERT IGNORE INTO rollup_dirty_day VALUES ('sales', OLD.order_date), ('sales', NEW.order_date);
+END ;;
+CREATE TRIGGER `order_rollup_delete` AFTER DELETE ON `order` FOR EACH ROW BEGIN
+    INSERT IGNORE INTO rollup_dirty_day VALUES ('sales', OLD.order_date);
+END ;;
+CREATE TRIGGER `orderitem_rollup_insert` AFTER INSERT ON `orderitem` FOR EACH ROW BEGIN
+    INSERT IGNORE INTO rollup_dirty_day
+    SELECT 'sales', order_date FROM `order` WHERE order_id = NEW.order_id;
+END ;;
+CREATE TRIGGER `orderitem_rollup_update` AFTER UPDATE ON `orderitem` FOR EACH ROW BEGIN
+    INSERT IGNORE INTO rollup_dirty_day
+    SELECT 'sales', order_date FROM `order` WHERE order_id IN (OLD.order_id, NEW.order_id);
+END ;;
+CREATE TRIGGER `orderitem_rollup_delete` AFTER DELETE ON `orderitem` FOR EACH ROW BEGIN
+    INSERT IGNORE INTO rollup_dirty_day
+    SELECT 'sales', order_date FROM `order` WHERE order_id = OLD.order_id;
+END ;;
+CREATE TRIGGER `truckdelivery_rollup_insert` AFTER INSERT ON `truckdelivery` FOR EACH ROW BEGIN
+    INSERT IGNORE INTO rollup_dirty_day VALUES
+        ('deliveries', DATE(NEW.scheduled_departure)), ('hours', DATE(NEW.scheduled_departure));
+END ;;
+CREATE TRIGGER `truckdelivery_rollup_update` AFTER UPDATE ON `truckdelivery` FOR EACH ROW BEGIN
+    INSERT IGNORE INTO rollup_dirty_day VALUES
+        ('deliveries', DATE(OLD.scheduled_departure)), ('deliveries', DATE(NEW.scheduled_departure)),
+        ('hours', DATE(OLD.scheduled_departure)), ('hours', DATE(NEW.scheduled_departure));
+END ;;
+CREATE TRIGGER `truckdelivery_rollup_delete` AFTER DELETE ON `truckdelivery` FOR EACH ROW BEGIN
+    INSERT IGNORE INTO rollup_dirty_day VALUES
+        ('deliveries', DATE(OLD.scheduled_departure)), ('hours', DATE(OLD.scheduled_departure));
+END ;;
+CREATE TRIGGER `truckemployeeassignment_rollup_insert` AFTER INSERT ON `truckemployeeassignment` FOR EACH ROW BEGIN
+    INSERT IGNORE INTO rollup_dirty_day
+    SELECT 'hours', DATE(scheduled_departure) FROM truckdelivery WHERE delivery_id = NEW.truck_delivery_id;
+END ;;
+CREATE TRIGGER `truckemployeeassignment_rollup_update` AFTER UPDATE ON `truckemployeeassignment` FOR EACH ROW BEGIN
+    INSERT IGNORE INTO rollup_dirty_day
+    SELECT 'hours', DATE(scheduled_departure) FROM truckdelivery
+    WHERE delivery_id IN (OLD.truck_delivery_id, NEW.truck_delivery_id);
+END ;;
+CREATE TRIGGER `truckemployeeassignment_rollup_delete` AFTER DELETE ON `truckemployeeassignment` FOR EACH ROW BEGIN
+    INSERT IGNORE INTO rollup_dirty_day
+    SELECT 'hours', DATE(scheduled_departure) FROM truckdelivery WHERE delivery_id = OLD.truck_delivery_id;
+END ;;
+DELIMITER ;
+
+-- mark every existing day dirty; the next report request builds the rollups
+INSERT IGNORE INTO rollup_dirty_day SELECT DISTINCT 'sales', order_date FROM `order`;
+INSERT IGNORE INTO rollup_dirty_day SELECT DISTINCT 'deliveries', DATE(scheduled_departure) FROM truckdelivery;
+INSERT IGNORE INTO rollup_dirty_day SELECT DISTINCT 'hours', DATE(scheduled_departure) FROM truckdelivery;
@@ -0,0 +1,77 @@
+-- Migration: maintained per-train utilization ledger.
+-- Adds Train.utilized_space, keeps it current with triggers on TrainAllocation
+-- and backfills it from existing allocations.
+USE kandypacklogistics;
+
+ALTER TABLE Train
+  ADD COLUMN utilized_space DOUBLE NOT NULL DEFAULT 0 AFTER capacity_space,
+  ADD KEY idx_train_departure (departure_date_time);
+
+DROP TRIGGER IF EXISTS trainallocation_utilization_insert;
+DROP TRIGGER IF EXISTS trainallocation_utilization_update;
+DROP TRIGGER IF EXISTS trainallocation_utilization_delete;
+DROP PROCEDURE IF EXISTS sp_rebuild_train_utilization;
+
+DELIMITER //
+
+-- cancelled allocations do not use space
+CREATE TRIGGER trainallocation_utilization_insert
+AFTER INSERT ON trainallocation
+FOR EACH ROW
+BEGIN
+    IF NEW.status <> 'Cancelled' THEN
+        UPDATE train
+        SET utilized_space = utilized_space + NEW.allocated_qty * NEW.unit_space
+        WHERE train_id = NEW.train_id;
+    END IF;
+END;
+//
+
+CREATE TRIGGER trainallocation_utilization_update
+AFTER UPDATE ON trainallocation
+FOR EACH ROW
+BEGIN
+    IF OLD.status <> 'Cancelled' THEN
+        UPDATE train
+        SET utilized_space = utilized_space - OLD.allocated_qty * OLD.unit_space
+        WHERE train_id = OLD.train_id;
+    END IF;
+    IF NEW.status <> 'Cancelled' THEN
+        UPDATE train
+        SET utilized_space = utilized_space + NEW.allocated_qty * NEW.unit_space
+        WHERE train_id = NEW.train_id;
+    END IF;
+END;
+//
+
+CREATE TRIGGER trainallocation_utilization_delete
+AFTER DELETE ON trainallocation
+FOR EACH ROW
+BEGIN
+    IF OLD.status <> 'Cancelled' THEN
+        UPDATE train
+        SET utilized_space = utilized_space - OLD.allocated_qty * OLD.unit_space
+        WHERE train_id = OLD.train_id;
+    END IF;
+END;
+//
+
+-- Recompute utilized_space from TrainAllocation (repairs ledger drift)
+CREATE PROCEDURE sp_rebuild_train_utilization()
+BEGIN
+  UPDATE Train t
+  LEFT JOIN (
+    SELECT train_id, SUM(allocated_qty * unit_space) AS utilized
+    FROM TrainAllocation
+    WHERE status <> 'Cancelled'
+    GROUP BY train_id
+  ) a ON a.train_id = t.train_id
+  SET t.utilized_space = COALESCE(a.utilized, 0)
+  WHERE ABS(t.utilized_space - COALESCE(a.utilized, 0)) > 1e-6;
+END;
+//
+
+DELIMITER ;
+
+-- backfill
+CALL sp_rebuild_train_utilization();
@@ -0,0 +1,102 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import aiomysql
+
+from app.core.database import DB_CONFIG, POOL_SIZE, POOL_MAX_OVERFLOW, POOL_RECYCLE
+
+_pool = None
+_pool_lock = asyncio.Lock()
+
+
+async def get_async_pool():
+    """
+    Return the process-wide aiomysql pool, creating it on first use.
+    Sized like the sync pool (DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW).
+    """
+    global _pool
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                _pool = await aiomysql.create_pool(
+                    host=DB_CONFIG["host"],
+                    user=DB_CONFIG["user"],
+                    password=DB_CONFIG["password"],
+                    db=DB_CONFIG["database"],
+                    minsize=1,
+                    maxsize=POOL_SIZE + POOL_MAX_OVERFLOW,
+                    pool_recycle=POOL_RECYCLE if POOL_RECYCLE > 0 else -1,
+                    autocommit=True,  # reads never hold a snapshot; writes use transaction()
+                )
+    return _pool
+
+
+async def close_async_pool():
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        await _pool.wait_closed()
+        _pool = None
+
+
+def get_async_pool_stats():
+    if _pool is None:
+        return {"size": 0, "free": 0, "maxsize": POOL_SIZE + POOL_MAX_OVERFLOW}
+    return {"size": _pool.size, "free": _pool.freesize, "maxsize": _pool.maxsize}
+
+
+@asynccontextmanager
+async def acquire():
+    """
+    Borrow a connection from the async pool.
+    Usage:
+        async with acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur: ...
+    """
+    pool = await get_async_pool()
+    async with pool.acquire() as conn:
+        yield conn
+
+
+@asynccontextmanager
+async def transaction():
+    """
+    Borrow a connection and run everything inside one transaction.
+    Commits on success, rolls back on any exception.
+    """
+    async with acquire() as conn:
+        await conn.begin()
+        try:
+            yield conn
+            await conn.commit()
+        except BaseException:
+            await conn.rollback()
+            raise
+
+
+async def fetch_all(query, params=None):
+    async with acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cur:
+            await cur.execute(query, params)
+            return await cur.fetchall()
+
+
+async def fetch_one(query, params=None):
+    async with acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cur:
+            await cur.execute(query, params)
+            return await cur.fetchone()
+
+
+async def call_proc(name, args=()):
+    """
+    Call a stored procedure and return the rows of its result set.
+    """
+    async with acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cur:
+            await cur.callproc(name, args)
+            rows = await cur.fetchall()
+            # drain the trailing status result so the connection is reusable
+            while await cur.nextset():
+                pass
+            return list(rows)
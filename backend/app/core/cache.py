@@ -0,0 +1,121 @@
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+# ----- REPORT CACHE CONFIG -----
+REPORT_CACHE_MAXSIZE = int(os.getenv("REPORT_CACHE_MAXSIZE", "512"))
+REPORT_CACHE_CLOSED_TTL = float(os.getenv("REPORT_CACHE_CLOSED_TTL", "86400"))  # past periods, seconds
+REPORT_CACHE_OPEN_TTL = float(os.getenv("REPORT_CACHE_OPEN_TTL", "60"))  # current period, seconds
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe in-process cache with a per-entry TTL and LRU eviction.
+    Entries can carry tags so every entry built from some table can be
+    dropped at once (invalidate).
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # key -> (expires_at, value, tags)
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._hits = 0
+        self._misses = 0
+
+    def _lookup(self, key):
+        # caller holds self._lock
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            return _MISSING
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._lookup(key)
+            if value is _MISSING:
+                self._misses += 1
+                return default
+            self._hits += 1
+            return value
+
+    def set(self, key, value, ttl, tags=()):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value, frozenset(tags))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_load(self, key, loader, ttl, tags=()):
+        """
+        Return the cached value, or call loader() and cache its result.
+        Concurrent misses on the same key run the loader only once.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                value = self._lookup(key)  # another thread may have loaded it meanwhile
+            if value is _MISSING:
+                value = loader()
+                self.set(key, value, ttl, tags)
+        with self._lock:
+            self._key_locks.pop(key, None)
+        return value
+
+    def invalidate(self, *tags):
+        """Drop every entry carrying any of the given tags."""
+        tags = set(tags)
+        with self._lock:
+            for key in [k for k, (_, _, t) in self._entries.items() if t & tags]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self._hits, "misses": self._misses}
+
+
+# results of reports_crud, shared by the JSON and PDF endpoints
+report_cache = TTLCache(maxsize=REPORT_CACHE_MAXSIZE)
+
+
+def cached_report(name, tags, period=None):
+    """
+    Cache a report function in report_cache, keyed by
+    (report, period, arguments).
+
+    `period` maps the function's arguments to its Period. Periods that have
+    already ended never change, so they are kept for REPORT_CACHE_CLOSED_TTL;
+    the current period (or a report without one) only for
+    REPORT_CACHE_OPEN_TTL. Writes drop entries early through
+    report_cache.invalidate(<tag>). Reports do not depend on the caller's
+    role or store, so one entry serves every user.
+    Cached results are shared - treat them as read-only.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            p = period(*args, **kwargs) if period else None
+            closed = p is not None and p.end <= datetime.now()
+            ttl = REPORT_CACHE_CLOSED_TTL if closed else REPORT_CACHE_OPEN_TTL
+            key = (name, p, args, tuple(sorted(kwargs.items())))
+            return report_cache.get_or_load(key, lambda: fn(*args, **kwargs), ttl, tags)
+
+        wrapper.uncached = fn
+        return wrapper
+    return decorator
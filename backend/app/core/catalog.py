@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.database import pool
+
+# ----- CATALOG CONFIG -----
+# reload at least this often, to pick up changes made outside the API (seconds, <= 0 disables)
+CATALOG_MAX_AGE = float(os.getenv("CATALOG_MAX_AGE", "300"))
+# an unknown product id reloads a snapshot only once it is this old (seconds);
+# until then the id is treated as invalid, so bogus ids cannot force reloads
+CATALOG_MISS_RELOAD_INTERVAL = float(os.getenv("CATALOG_MISS_RELOAD_INTERVAL", "10"))
+
+
+class Catalog:
+    """
+    Immutable snapshot of the reference tables: products, product types,
+    cities, customer types, truck routes and stores, as dicts keyed by id,
+    plus lower-cased name indexes. Treat the rows as read-only.
+    """
+
+    def __init__(self, version, products, product_types, cities, customer_types, routes, stores):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.products = {r["product_id"]: r for r in products}
+        self.product_types = {r["product_type_id"]: r for r in product_types}
+        self.cities = {r["city_id"]: r for r in cities}
+        self.customer_types = {r["customer_type_id"]: r for r in customer_types}
+        self.routes = {r["route_id"]: r for r in routes}
+        self.stores = {r["store_id"]: r for r in stores}
+
+        self.products_by_name = {r["product_name"].lower(): r for r in products}
+        self.product_types_by_name = {r["type_name"].lower(): r for r in product_types}
+        self.cities_by_name = {r["city_name"].lower(): r for r in cities}
+        self.customer_types_by_name = {r["customer_type"].lower(): r for r in customer_types}
+        # the store serving a city: the lowest store id located there
+        self.store_by_city = {}
+        for r in sorted(stores, key=lambda r: r["store_id"]):
+            if r["city_id"] is not None:
+                self.store_by_city.setdefault(r["city_id"], r["store_id"])
+
+    def city_name(self, city_id):
+        city = self.cities.get(city_id)
+        return city["city_name"] if city else None
+
+
+_QUERIES = {
+    "products": """
+        SELECT p.product_id, p.product_name, p.unit_space, p.unit_price,
+               p.product_type_id, pt.type_name AS product_type
+        FROM product p
+        JOIN product_type pt ON p.product_type_id = pt.product_type_id
+        ORDER BY p.product_id
+    """,
+    "product_types": "SELECT product_type_id, type_name FROM product_type ORDER BY product_type_id",
+    "cities": "SELECT city_id, city_name FROM city ORDER BY city_id",
+    "customer_types": """
+        SELECT customer_type_id, customer_type, credit_limit
+        FROM customertype ORDER BY customer_type_id
+    """,
+    "routes": "SELECT route_id, area_name, max_delivery_time FROM truckroute ORDER BY route_id",
+    "stores": "SELECT store_id, store_name, city_id FROM store ORDER BY store_id",
+}
+
+_catalog = None
+_version = 0  # bumped by invalidate_catalog(); a snapshot of an older version is stale
+_lock = threading.Lock()  # serializes reloads
+_version_lock = threading.Lock()
+
+
+def _is_current(catalog):
+    return (
+        catalog is not None
+        and catalog.version == _version
+        and (CATALOG_MAX_AGE <= 0 or time.monotonic() - catalog.loaded_at < CATALOG_MAX_AGE)
+    )
+
+
+def _needs_reload(catalog, product_ids):
+    if not _is_current(catalog):
+        return True
+    if all(p in catalog.products for p in product_ids):
+        return False
+    return time.monotonic() - catalog.loaded_at >= CATALOG_MISS_RELOAD_INTERVAL
+
+
+def load_catalog():
+    """Read every reference table (on its own connection) and publish a new snapshot."""
+    global _catalog
+    version = _version  # an invalidation during the load leaves the result stale
+    conn = pool.connect()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        tables = {}
+        for name, sql in _QUERIES.items():
+            cursor.execute(sql)
+            tables[name] = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+    _catalog = Catalog(version, **tables)
+    return _catalog
+
+
+def get_catalog(product_ids=()):
+    """
+    Current reference-data snapshot, reloaded if it was invalidated or has
+    expired. Pass product_ids to reload when one of them is unknown (e.g.
+    created by another API process) - at most once per
+    CATALOG_MISS_RELOAD_INTERVAL; ids still unknown are the caller's to reject.
+    """
+    catalog = _catalog
+    if not _needs_reload(catalog, product_ids):
+        return catalog
+    with _lock:
+        if _catalog is not catalog and _is_current(_catalog):
+            return _catalog  # another thread reloaded meanwhile
+        return load_catalog()
+
+
+async def get_catalog_async(product_ids=()):
+    """get_catalog() for async code: reloads run in the threadpool."""
+    catalog = _catalog
+    if not _needs_reload(catalog, product_ids):
+        return catalog
+    return await run_in_threadpool(get_catalog, product_ids)
+
+
+def invalidate_catalog():
+    """Mark the snapshot stale; call after committing a change to a reference table."""
+    global _version
+    with _version_lock:
+        _version += 1
@@ -1,18 +1,315 @@
 import mysql.connector
 from dotenv import load_dotenv
+from contextvars import ContextVar
+from queue import Empty, LifoQueue
+from starlette.concurrency import run_in_threadpool
+import threading
+import time
 import os
 
 load_dotenv()  # loads environment variables from .env
 
+DB_CONFIG = {
+    "host": os.getenv("DB_HOST", "localhost"),
+    "user": os.getenv("DB_USER", "root"),
+    "password": os.getenv("DB_PASS", ""),
+    "database": os.getenv("DB_NAME", "kandypacklogistics"),
+}
+
+# ----- POOL CONFIG -----
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds, <= 0 disables
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+
+class PoolTimeoutError(mysql.connector.errors.PoolError):
+    pass
+
+
+class PooledConnection:
+    """
+    Thin proxy around a mysql.connector connection.
+    Behaves like the raw connection, except close() hands it back to the pool.
+    """
+
+    def __init__(self, pool, conn, created_at):
+        self._pool = pool
+        self._conn = conn
+        self._created_at = created_at
+        self._closed = False
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._conn, name)
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._pool._release(self._conn, self._created_at)
+
+    def __del__(self):
+        # Safety net for code paths that forget to call close().
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """
+    Process-wide pool of MySQL connections.
+
+    - `size` connections are kept open once created.
+    - up to `max_overflow` extra connections are opened under load and
+      closed again when they are returned.
+    - connections older than `recycle` seconds are replaced on checkout.
+    - with `pre_ping`, idle connections are checked before being handed out.
+    """
+
+    def __init__(self, size=POOL_SIZE, max_overflow=POOL_MAX_OVERFLOW, timeout=POOL_TIMEOUT,
+                 recycle=POOL_RECYCLE, pre_ping=POOL_PRE_PING, **connect_args):
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        self.connect_args = connect_args
+
+        self._idle = LifoQueue()
+        self._lock = threading.Lock()
+        self._opened = 0  # connections currently open (idle + checked out)
+        self._waiting = 0  # threads blocked in connect()
+
+        # stats
+        self._checked_out = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._timeouts = 0
+        self._recycled = 0
+        self._invalidated = 0
+
+    # ----- internals -----
+    def _connect(self):
+        return mysql.connector.connect(**self.connect_args), time.monotonic()
+
+    def _discard(self, conn):
+        with self._lock:
+            self._opened -= 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_usable(self, conn, created_at):
+        if self.recycle > 0 and time.monotonic() - created_at > self.recycle:
+            self._recycled += 1
+            return False
+        if self.pre_ping:
+            try:
+                conn.ping(reconnect=False)
+            except Exception:
+                self._invalidated += 1
+                return False
+        return True
+
+    def _release(self, conn, created_at):
+        with self._lock:
+            self._checked_out -= 1
+        try:
+            # never hand out a connection with pending rows or a half-finished transaction
+            if conn.unread_result:
+                conn.consume_results()
+            if conn.in_transaction:
+                conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+
+        with self._lock:
+            # overflow connections are closed, unless someone is waiting for one
+            overflow = self._opened > self.size and self._waiting == 0
+        if overflow:
+            self._discard(conn)
+        else:
+            self._idle.put((conn, created_at))
+
+    # ----- public API -----
+    def connect(self):
+        """
+        Check a connection out of the pool, opening a new one if the pool
+        (plus overflow) is not exhausted, otherwise waiting up to `timeout`.
+        """
+        waited = False
+        started = time.monotonic()
+
+        while True:
+            try:
+                conn, created_at = self._idle.get_nowait()
+            except Empty:
+                with self._lock:
+                    can_open = self._opened < self.size + self.max_overflow
+                    if can_open:
+                        self._opened += 1
+                if can_open:
+                    try:
+                        conn, created_at = self._connect()
+                    except Exception:
+                        with self._lock:
+                            self._opened -= 1
+                        raise
+                    break
+
+                remaining = self.timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"Connection pool exhausted (size={self.size}, overflow={self.max_overflow})"
+                    )
+                waited = True
+                with self._lock:
+                    self._waiting += 1
+                try:
+                    conn, created_at = self._idle.get(timeout=remaining)
+                except Empty:
+                    continue
+                finally:
+                    with self._lock:
+                        self._waiting -= 1
+
+            if self._is_usable(conn, created_at):
+                break
+            self._discard(conn)
+
+        with self._lock:
+            self._checked_out += 1
+            self._checkouts += 1
+            if waited:
+                self._waits += 1
+                self._wait_time += time.monotonic() - started
+
+        return PooledConnection(self, conn, created_at)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self.size,
+                "max_overflow": self.max_overflow,
+                "opened": self._opened,
+                "idle": self._idle.qsize(),
+                "checked_out": self._checked_out,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "wait_time_seconds": round(self._wait_time, 4),
+                "timeouts": self._timeouts,
+                "recycled": self._recycled,
+                "invalidated": self._invalidated,
+            }
+
+    def dispose(self):
+        """Close every idle connection (checked out ones are closed on return)."""
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except Empty:
+                break
+            self._discard(conn)
+
+
+class _BorrowedConnection:
+    """
+    Handle on the request's connection given to a single get_db() caller.
+    close() is a no-op: the connection goes back to the pool when the
+    request finishes.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._conn, name)
+
+    def close(self):
+        pass
+
+
+class RequestSession:
+    """
+    One pooled connection shared by every get_db() call made while handling
+    a request. The connection is only checked out on first use.
+    """
+
+    def __init__(self, pool):
+        self._pool = pool
+        self._conn = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def connection(self):
+        with self._lock:
+            if self._closed:
+                # request already finished - behave like a plain checkout
+                return self._pool.connect()
+            if self._conn is None:
+                self._conn = self._pool.connect()
+            return _BorrowedConnection(self._conn)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.close()
+
+
+pool = ConnectionPool(**DB_CONFIG)
+
+_request_session: ContextVar = ContextVar("db_request_session", default=None)
+
+
 def get_db():
     """
-    Create and return a MySQL database connection.
-    Make sure to close it after use.
+    Return a MySQL connection from the shared pool.
+    Inside a request this is the request's connection (see db_session),
+    otherwise a fresh checkout. Make sure to close it after use - closing
+    returns it to the pool (or is a no-op inside a request).
+    """
+    session = _request_session.get()
+    if session is not None:
+        return session.connection()
+    return pool.connect()
+
+
+async def db_session():
+    """
+    FastAPI dependency binding one pooled connection to the current request.
+    Every get_db() call during the request reuses it, and it is always
+    returned to the pool (uncommitted work rolled back) once the request ends.
+    """
+    session = RequestSession(pool)
+    _request_session.set(session)
+    try:
+        yield session
+    finally:
+        await run_in_threadpool(session.close)
+
+
+def unbind_request_session():
+    """
+    Stop using the request's connection in the current context. Call this at
+    the start of background work that may outlive the request; get_db() then
+    checks out its own connections.
+    """
+    _request_session.set(None)
+
+
+def get_pool_stats():
+    """
+    Pool counters for monitoring (checked-out connections, waits, wait time...).
     """
-    db = mysql.connector.connect(
-        host=os.getenv("DB_HOST", "localhost"),
-        user=os.getenv("DB_USER", "root"),
-        password=os.getenv("DB_PASS", ""),
-        database=os.getenv("DB_NAME", "kandypacklogistics")
-    )
-    return db
\ No newline at end of file
+    return pool.stats()
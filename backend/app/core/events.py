@@ -0,0 +1,110 @@
+import asyncio
+import json
+import os
+from datetime import date, datetime
+from decimal import Decimal
+
+# ----- SSE CONFIG -----
+SSE_HEARTBEAT = float(os.getenv("SSE_HEARTBEAT", "15"))  # seconds between keep-alive comments
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "256"))  # pending events per subscriber
+
+RESYNC = {"change": "resync"}  # queued instead of events a slow subscriber missed
+
+
+class DeliveryBroker:
+    """
+    Fans delivery change events out to SSE subscribers, per store.
+
+    publish() may be called from any thread (sync endpoints run in the
+    threadpool); events are handed to the event loop and copied to each
+    subscriber's queue there. Subscribers of store None get every store.
+    """
+
+    def __init__(self, queue_size=SSE_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers = {}  # store_id -> set of asyncio.Queue
+        self._loop = None
+        self._next_id = 0
+
+    def bind_loop(self, loop):
+        """Attach the event loop subscribers live on (call at startup)."""
+        self._loop = loop
+
+    def subscribe(self, store_id=None):
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(store_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, store_id, queue):
+        queues = self._subscribers.get(store_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[store_id]
+
+    def subscriber_count(self):
+        return sum(len(q) for q in self._subscribers.values())
+
+    def publish(self, event):
+        """Queue a change event (a dict with at least store_id) for delivery."""
+        if self._loop is None or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._dispatch, event)
+
+    def _dispatch(self, event):
+        self._next_id += 1
+        event = {**event, "event_id": self._next_id}
+        targets = set(self._subscribers.get(event.get("store_id"), ()))
+        targets |= self._subscribers.get(None, set())
+        for queue in targets:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # too slow to keep up - drop its backlog and make it reload
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC)
+
+
+delivery_events = DeliveryBroker()
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def sse_message(event, data, event_id=None):
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, default=_json_default)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def delivery_event_stream(request, store_id, load_snapshot):
+    """
+    SSE body for one dashboard: a snapshot of the active deliveries
+    (await load_snapshot()), then every change for store_id (None = all
+    stores) as it is published, with keep-alive comments in between.
+    """
+    queue = delivery_events.subscribe(store_id)  # before the snapshot, so nothing is missed
+    try:
+        yield sse_message("snapshot", await load_snapshot())
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keep-alive\n\n"
+                continue
+            if event is RESYNC:
+                yield sse_message("snapshot", await load_snapshot())
+            else:
+                yield sse_message("delivery", event, event["event_id"])
+    finally:
+        delivery_events.unsubscribe(store_id, queue)
@@ -0,0 +1,59 @@
+from datetime import date, datetime, timedelta
+from typing import NamedTuple, Optional
+
+
+class Period(NamedTuple):
+    """Half-open reporting period: start <= t < end."""
+    start: datetime
+    end: datetime
+
+
+def _first_of_month(year: int, month: int) -> datetime:
+    # month may run one past December
+    return datetime(year + (month - 1) // 12, (month - 1) % 12 + 1, 1)
+
+
+def resolve_period(year: Optional[int] = None, quarter: Optional[int] = None, month: Optional[int] = None,
+                   start: Optional[date] = None, end: Optional[date] = None) -> Period:
+    """
+    Turn report parameters into a half-open [start, end) datetime range.
+
+    - start/end: custom range of whole days, both inclusive
+    - year + quarter: that quarter
+    - year + month: that month
+    - year: the whole year
+    The year defaults to the current one. Filter with
+    `col >= period.start AND col < period.end` so the date index is used.
+    Raises ValueError for invalid combinations.
+    """
+    if start is not None or end is not None:
+        if start is None or end is None:
+            raise ValueError("A custom period needs both start and end")
+        if any(v is not None for v in (year, quarter, month)):
+            raise ValueError("Use either a custom range or year/quarter/month")
+        if end < start:
+            raise ValueError("end must not be before start")
+        first = datetime(start.year, start.month, start.day)
+        return Period(first, datetime(end.year, end.month, end.day) + timedelta(days=1))
+
+    if quarter is not None and month is not None:
+        raise ValueError("Use either quarter or month, not both")
+    if year is None:
+        year = date.today().year
+
+    if quarter is not None:
+        if not 1 <= quarter <= 4:
+            raise ValueError("quarter must be between 1 and 4")
+        first_month = 3 * quarter - 2
+        return Period(_first_of_month(year, first_month), _first_of_month(year, first_month + 3))
+    if month is not None:
+        if not 1 <= month <= 12:
+            raise ValueError("month must be between 1 and 12")
+        return Period(_first_of_month(year, month), _first_of_month(year, month + 1))
+    return Period(datetime(year, 1, 1), datetime(year + 1, 1, 1))
+
+
+def current_quarter(today: Optional[date] = None) -> Period:
+    """The quarter containing `today` (default: today)."""
+    today = today or date.today()
+    return resolve_period(today.year, quarter=(today.month - 1) // 3 + 1)
@@ -1,16 +1,33 @@
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
 from jose import jwt, JWTError
 from datetime import datetime, timedelta, timezone
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
+from app.core.cache import TTLCache
+import asyncio
+import hashlib
 import os
+import threading
+import time
 
 # ----- CONFIG -----
-pwd_context = CryptContext(schemes=['bcrypt'], deprecated="auto")
+# bcrypt cost factor; hashes with any other cost are rehashed on the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# concurrent bcrypt checks; re-check sizing with scripts/bench_login.py
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+pwd_context = CryptContext(
+    schemes=['bcrypt'],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
 SECRET_KEY = os.getenv("JWT_SECRET", "supersecret")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))  # verified tokens kept in memory
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login/")
@@ -31,6 +48,27 @@ def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 
+# bcrypt releases the GIL, so a small thread pool runs hashes in parallel
+# while bounding how many CPU-heavy checks run at once
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+
+
+async def verify_and_update_password(plain_password, hashed_password):
+    """
+    Check a password off the event loop.
+    Returns (valid, new_hash); new_hash is set when the stored hash should be
+    replaced (e.g. BCRYPT_ROUNDS changed), otherwise None.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _hash_executor, pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+
+def shutdown_hash_executor():
+    _hash_executor.shutdown(wait=False, cancel_futures=True)
+
+
 # ----- TOKEN CREATION -----
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
@@ -43,6 +81,38 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
 
 
 # ----- TOKEN VALIDATION -----
+# Verified tokens are cached by their SHA-256 until they expire, so repeated
+# requests from a session skip signature checks and model validation.
+# Logged out tokens stay revoked until their own expiry (per process).
+_verified_tokens = TTLCache(maxsize=TOKEN_CACHE_SIZE)
+_revoked_tokens = {}  # token hash -> exp (unix time)
+_revoked_lock = threading.Lock()
+
+
+def _token_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+def _is_revoked(key) -> bool:
+    exp = _revoked_tokens.get(key)
+    return exp is not None and exp > time.time()
+
+
+def revoke_token(token: str):
+    """Invalidate a token (logout) until it would have expired anyway."""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return  # already unusable
+    key = _token_key(token)
+    now = time.time()
+    with _revoked_lock:
+        for k in [k for k, exp in _revoked_tokens.items() if exp <= now]:
+            del _revoked_tokens[k]
+        _revoked_tokens[key] = payload.get("exp", now + ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+    _verified_tokens.invalidate(key)
+
+
 def get_current_user(token: str = Depends(oauth2_scheme)) -> TokenData:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -50,6 +120,13 @@ def get_current_user(token: str = Depends(oauth2_scheme)) -> TokenData:
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+    key = _token_key(token)
+    if _is_revoked(key):
+        raise credentials_exception
+    user = _verified_tokens.get(key)
+    if user is not None:
+        return user
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
@@ -59,7 +136,13 @@ def get_current_user(token: str = Depends(oauth2_scheme)) -> TokenData:
         if username is None:
             raise credentials_exception
 
-        return TokenData(username=username, role=role, store_id=store_id)
+        user = TokenData(username=username, role=role, store_id=store_id)
 
     except JWTError:
         raise credentials_exception
+
+    ttl = payload.get("exp", 0) - time.time()
+    if ttl > 0:
+        # tagged with its own hash, so revoke_token can drop it
+        _verified_tokens.set(key, user, ttl, tags=(key,))
+    return user
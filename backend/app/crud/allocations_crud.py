@@ -0,0 +1,262 @@
+from datetime import date, datetime
+
+import aiomysql
+from fastapi import HTTPException
+from app.core.async_database import transaction
+from app.core.catalog import get_catalog_async
+
+# tolerance when comparing floating point space figures
+EPSILON = 1e-9
+
+
+PENDING_LINES_QUERY = """
+    SELECT
+        oi.order_id,
+        oi.product_id,
+        oi.quantity - COALESCE(alloc.total_allocated, 0) AS remaining_qty,
+        o.required_date,
+        ca.city_id
+    FROM `order` o
+    JOIN orderitem oi ON oi.order_id = o.order_id
+    LEFT JOIN customeraddress ca ON ca.address_id = o.address_id
+    LEFT JOIN (
+        SELECT ta.order_id, ta.product_id, SUM(ta.allocated_qty) AS total_allocated
+        FROM TrainAllocation ta
+        WHERE ta.status IN ('Allocated','Shipped','Delivered')
+        GROUP BY ta.order_id, ta.product_id
+    ) AS alloc
+        ON alloc.order_id = oi.order_id AND alloc.product_id = oi.product_id
+    WHERE o.status = 'Pending'
+      AND (%s IS NULL OR o.order_id = %s)
+      AND oi.quantity - COALESCE(alloc.total_allocated, 0) > 0
+"""
+
+
+async def attach_reference_data(lines):
+    """
+    Fill in unit_space, city_name and store_id (the store in the order's
+    city) of pending lines from the reference catalog. Lines of unknown
+    products are dropped.
+    """
+    catalog = await get_catalog_async({l["product_id"] for l in lines})
+    known = []
+    for line in lines:
+        product = catalog.products.get(line["product_id"])
+        if product is None:
+            continue
+        line["unit_space"] = product["unit_space"]
+        line["city_name"] = catalog.city_name(line["city_id"])
+        line["store_id"] = catalog.store_by_city.get(line["city_id"])
+        known.append(line)
+    return known
+
+
+async def lock_trains(cursor, train_ids=None, horizon_days=None):
+    """
+    Lock Train rows (SELECT ... FOR UPDATE) and return them keyed by train_id.
+    Either an explicit list of train ids or every train departing within the
+    next `horizon_days` days.
+    """
+    if train_ids is not None:
+        train_ids = sorted(set(train_ids))
+        if not train_ids:
+            return {}
+        placeholders = ", ".join(["%s"] * len(train_ids))
+        where = f"t.train_id IN ({placeholders})"
+        params = tuple(train_ids)
+    else:
+        where = """t.departure_date_time >= NOW()
+          AND t.departure_date_time < DATE_ADD(CURDATE(), INTERVAL %s DAY)"""
+        params = (horizon_days,)
+
+    # ordered by primary key so concurrent lockers always take locks in the same order
+    await cursor.execute(
+        f"""
+        SELECT
+            t.train_id,
+            t.destination_station,
+            t.departure_date_time,
+            t.arrival_date_time,
+            t.capacity_space AS capacity,
+            t.utilized_space AS utilized,
+            t.status
+        FROM Train t
+        WHERE {where}
+        ORDER BY t.train_id
+        FOR UPDATE
+        """,
+        params,
+    )
+    return {row["train_id"]: row for row in await cursor.fetchall()}
+
+
+async def insert_allocations(cursor, rows):
+    """
+    Write allocations with a single multi-row INSERT.
+    rows: dicts with train_id, order_id, product_id, store_id, allocated_qty, unit_space.
+    Returns the trip_id of the first inserted row.
+    """
+    if not rows:
+        return None
+    values = ", ".join(["(%s, %s, %s, %s, %s, NOW(), 'Allocated', %s)"] * len(rows))
+    params = []
+    for r in rows:
+        params.extend((r["train_id"], r["order_id"], r["product_id"], r["store_id"],
+                       r["allocated_qty"], r["unit_space"]))
+    await cursor.execute(
+        f"""
+        INSERT INTO TrainAllocation (
+            train_id, order_id, product_id, store_id, allocated_qty,
+            start_date_time, status, unit_space
+        ) VALUES {values}
+        """,
+        params,
+    )
+    return cursor.lastrowid
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.fromisoformat(str(value)).date()
+
+
+def plan_allocations(lines, trains):
+    """
+    Pack pending order lines onto trains.
+
+    Lines are taken earliest required_date first and, within the same
+    deadline, largest total space first (first-fit decreasing). Each line
+    goes to the earliest departing eligible train with room - one whose
+    destination is the order's city, arriving by the required date - and is
+    split across further trains when it does not fit on one.
+
+    Returns (allocations, unallocated); the `utilized` figure of each train
+    dict is advanced as space is handed out.
+    """
+    by_destination = {}
+    for train in sorted(trains, key=lambda t: (t["departure_date_time"], t["train_id"])):
+        if (train["status"] or "").lower() == "cancelled":
+            continue
+        key = (train["destination_station"] or "").strip().lower()
+        by_destination.setdefault(key, []).append(train)
+
+    ordered = sorted(
+        lines,
+        key=lambda l: (
+            _as_date(l["required_date"]),
+            -float(l["remaining_qty"]) * float(l["unit_space"]),
+            l["order_id"],
+            l["product_id"],
+        ),
+    )
+
+    allocations, unallocated = [], []
+    for line in ordered:
+        remaining = int(line["remaining_qty"])
+        unit_space = float(line["unit_space"])
+
+        if line["store_id"] is None:
+            unallocated.append({**_line_key(line), "remaining_qty": remaining,
+                                "reason": "No store in the order's destination city"})
+            continue
+
+        deadline = _as_date(line["required_date"])
+        candidates = [
+            t for t in by_destination.get((line["city_name"] or "").strip().lower(), [])
+            if _as_date(t["arrival_date_time"]) <= deadline
+        ]
+
+        for train in candidates:
+            if remaining == 0:
+                break
+            free = float(train["capacity"]) - float(train["utilized"] or 0)
+            fits = remaining if unit_space <= 0 else min(remaining, int((free + EPSILON) // unit_space))
+            if fits <= 0:
+                continue
+            allocations.append({
+                "train_id": train["train_id"],
+                "order_id": line["order_id"],
+                "product_id": line["product_id"],
+                "store_id": line["store_id"],
+                "allocated_qty": fits,
+                "unit_space": unit_space,
+                "space": fits * unit_space,
+            })
+            train["utilized"] = float(train["utilized"] or 0) + fits * unit_space
+            remaining -= fits
+
+        if remaining > 0:
+            reason = "Not enough capacity on eligible trains" if candidates else "No eligible train before the required date"
+            unallocated.append({**_line_key(line), "remaining_qty": remaining, "reason": reason})
+
+    return allocations, unallocated
+
+
+def _line_key(line):
+    return {"order_id": line["order_id"], "product_id": line["product_id"]}
+
+
+def _train_summary(trains, allocations):
+    used = {a["train_id"] for a in allocations}
+    return [
+        {
+            "train_id": t["train_id"],
+            "capacity": float(t["capacity"]),
+            "utilized": float(t["utilized"] or 0),
+            "remaining_capacity": max(float(t["capacity"]) - float(t["utilized"] or 0), 0.0),
+        }
+        for t in trains.values() if t["train_id"] in used
+    ]
+
+
+async def auto_allocate(dry_run: bool = True, horizon_days: int = 14, order_id: int = None):
+    """
+    Plan (and unless dry_run, write) TrainAllocation rows for every pending
+    order line. In commit mode the horizon's trains are locked first, the
+    plan is built against the locked capacities and all rows are inserted
+    in the same transaction.
+    """
+    if horizon_days <= 0:
+        raise HTTPException(status_code=400, detail="horizon_days must be > 0")
+
+    try:
+        async with transaction() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                if dry_run:
+                    # plain reads, nothing is locked
+                    await cursor.execute(
+                        """
+                        SELECT train_id, destination_station, departure_date_time, arrival_date_time,
+                               capacity_space AS capacity, utilized_space AS utilized, status
+                        FROM Train
+                        WHERE departure_date_time >= NOW()
+                          AND departure_date_time < DATE_ADD(CURDATE(), INTERVAL %s DAY)
+                        """,
+                        (horizon_days,),
+                    )
+                    trains = {row["train_id"]: row for row in await cursor.fetchall()}
+                else:
+                    # lock before reading the lines, so concurrent allocators
+                    # on these trains are serialized and see each other's rows
+                    trains = await lock_trains(cursor, horizon_days=horizon_days)
+
+                await cursor.execute(PENDING_LINES_QUERY, (order_id, order_id))
+                lines = await attach_reference_data(await cursor.fetchall())
+
+                allocations, unallocated = plan_allocations(lines, list(trains.values()))
+
+                if not dry_run:
+                    await insert_allocations(cursor, allocations)
+    except aiomysql.Error as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        "dry_run": dry_run,
+        "allocations": allocations,
+        "unallocated": unallocated,
+        "trains": _train_summary(trains, allocations),
+        "allocated_rows": len(allocations),
+    }
@@ -1,15 +1,23 @@
+from app.core.async_database import fetch_one, transaction
 
-from app.core.database import get_db
 
-def get_user_by_username(username: str):
-    
-    db = get_db() 
-    cursor = db.cursor(dictionary=True)
-    cursor.execute(
-        "SELECT * FROM employee WHERE username=%s", (username,)
+async def get_login_user(username: str):
+    """
+    The employee columns login needs, read fresh on every login (one
+    unique-index lookup, next to a bcrypt check) so a password reset or a
+    role/store change takes effect immediately.
+    """
+    return await fetch_one(
+        "SELECT employee_id, username, password_hash, role_id, store_id FROM employee WHERE username = %s",
+        (username,),
     )
-    user = cursor.fetchone() 
-    cursor.close() 
-    db.close() 
-    return user   
 
+
+async def update_password_hash(employee_id: int, password_hash: str):
+    """Store a rehashed password (see security.verify_and_update_password)."""
+    async with transaction() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute(
+                "UPDATE employee SET password_hash = %s WHERE employee_id = %s",
+                (password_hash, employee_id),
+            )
@@ -1,11 +1,9 @@
 from fastapi import HTTPException
+from app.core.catalog import get_catalog, invalidate_catalog
 from app.core.database import get_db
 from app.models.city_models import CityCreate
 
 def create_city(city: CityCreate, user_role: str):
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-    
     # Validate user role (only admins can create cities)
     if user_role != "admin":
         raise HTTPException(status_code=403, detail="Only admins can create cities")
@@ -13,12 +11,16 @@ def create_city(city: CityCreate, user_role: str):
     # Validate city name length
     if len(city.city_name) > 50:
         raise HTTPException(status_code=400, detail="City name must be 50 characters or less")
-    
+
+    conn = get_db()
+    cursor = conn.cursor(dictionary=True)
+
     try:
         # Insert new city
         query = "INSERT INTO city (city_name) VALUES (%s)"
         cursor.execute(query, (city.city_name,))
         conn.commit()
+        invalidate_catalog()
         
         # Fetch the inserted city
         city_id = cursor.lastrowid
@@ -34,15 +36,4 @@ def create_city(city: CityCreate, user_role: str):
         conn.close()
 
 def get_cities():
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-    
-    try:
-        cursor.execute("SELECT city_id, city_name FROM city")
-        results = cursor.fetchall()
-        return results
-    except:
-        raise HTTPException(status_code=500, detail="Database error")
-    finally:
-        cursor.close()
-        conn.close()
\ No newline at end of file
+    return [{"city_id": c["city_id"], "city_name": c["city_name"]} for c in get_catalog().cities.values()]
@@ -1,12 +1,10 @@
 from fastapi import HTTPException
+from app.core.catalog import invalidate_catalog
 from app.core.database import get_db
 from app.models.customer_type_models import CustomerTypeCreate
 from app.models.customers1_models import CustomerCreate
 
 def create_customer_type(customer_type: CustomerTypeCreate, user_role: str):
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-    
     # Validate user role (only admins can create customer types)
     if user_role != "admin":
         raise HTTPException(status_code=403, detail="Only admins can create customer types")
@@ -18,7 +16,10 @@ def create_customer_type(customer_type: CustomerTypeCreate, user_role: str):
     # Validate credit limit (non-negative and within reasonable range)
     if customer_type.credit_limit < 0 or customer_type.credit_limit > 99999999.99:
         raise HTTPException(status_code=400, detail="Credit limit must be between 0 and 99999999.99")
-    
+
+    conn = get_db()
+    cursor = conn.cursor(dictionary=True)
+
     try:
         # Insert new customer type
         query = """
@@ -27,6 +28,7 @@ def create_customer_type(customer_type: CustomerTypeCreate, user_role: str):
         """
         cursor.execute(query, (customer_type.customer_type, customer_type.credit_limit))
         conn.commit()
+        invalidate_catalog()
         
         # Fetch the inserted customer type
         customer_type_id = cursor.lastrowid
@@ -70,9 +72,6 @@ def get_customers(role: str, store_id: int):
 
 
 def create_customer(customer: CustomerCreate, user_role: str):
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-    
     # Validate user role (only admins can create customers)
     if user_role != "admin":
         raise HTTPException(status_code=403, detail="Only admins can create customers")
@@ -81,12 +80,15 @@ def create_customer(customer: CustomerCreate, user_role: str):
     if len(customer.customer_name) > 20:
         raise HTTPException(status_code=400, detail="Customer name must be 20 characters or less")
     
-    # Validate customer_type_id exists
-    cursor.execute("SELECT customer_type_id FROM customertype WHERE customer_type_id = %s", (customer.customer_type_id,))
-    if not cursor.fetchone():
-        raise HTTPException(status_code=400, detail="Invalid customer type ID")
-    
+    conn = get_db()
+    cursor = conn.cursor(dictionary=True)
+
     try:
+        # Validate customer_type_id exists
+        cursor.execute("SELECT customer_type_id FROM customertype WHERE customer_type_id = %s", (customer.customer_type_id,))
+        if not cursor.fetchone():
+            raise HTTPException(status_code=400, detail="Invalid customer type ID")
+
         # Insert new customer
         query = """
             INSERT INTO customer (customer_name, registration_date, customer_type_id)
@@ -112,6 +114,8 @@ def create_customer(customer: CustomerCreate, user_role: str):
         result = cursor.fetchone()
         
         return result
+    except HTTPException:
+        raise
     except:
         conn.rollback()
         raise HTTPException(status_code=500, detail="Database error")
@@ -120,13 +124,13 @@ def create_customer(customer: CustomerCreate, user_role: str):
         conn.close()
 
 def delete_customer(customer_id: int, user_role: str):
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-    
     # Validate user role (only admins can delete customers)
     if user_role != "admin":
         raise HTTPException(status_code=403, detail="Only admins can delete customers")
-    
+
+    conn = get_db()
+    cursor = conn.cursor(dictionary=True)
+
     try:
         # Check if customer exists
         cursor.execute("SELECT customer_id FROM customer WHERE customer_id = %s", (customer_id,))
@@ -1,20 +1,9 @@
-import mysql.connector, os
-from dotenv import load_dotenv
 from fastapi import HTTPException
+from app.core.database import get_db
 from app.models.customer_models import CustomerCreate
 
-load_dotenv()
-
-def get_connection():
-    return mysql.connector.connect(
-        host=os.getenv("DB_HOST", "localhost"),
-        user=os.getenv("DB_USER", "root"),
-        password=os.getenv("DB_PASS", ""),
-        database=os.getenv("DB_NAME", "kandypacklogistics"),
-    )
-
 def create_customer(customer: CustomerCreate):
-    conn = get_connection()
+    conn = get_db()
     cursor = conn.cursor(dictionary=True)
     try:
         cursor.execute(
@@ -51,7 +40,7 @@ def create_customer(customer: CustomerCreate):
         conn.close()
 
 def get_customers():
-    conn = get_connection()
+    conn = get_db()
     cursor = conn.cursor(dictionary=True)
     cursor.execute("SELECT * FROM customer ORDER BY customer_id DESC")
     rows = cursor.fetchall()
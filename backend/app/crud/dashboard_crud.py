@@ -1,22 +1,174 @@
-from app.core.database import get_db
+import asyncio
+import os
 
+from app.core.async_database import call_proc, fetch_all, fetch_one
+from app.core.cache import report_cache
+from app.core.events import delivery_events
+from app.core.periods import current_quarter
 
+DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL", "5"))  # seconds
+FINISHED_DELIVERY_STATUSES = ("Delivered", "Delayed")
 
+_loading = {}  # cache key -> task loading it, so concurrent misses share one query
 
-def get_active_deliveries(role: str, store_id: int):
+DELIVERY_EVENT_COLUMNS = """
+    td.delivery_id, td.store_id, td.order_id, td.route_id, td.truck_id,
+    td.scheduled_departure, td.actual_departure, td.actual_arrival, td.status
+"""
+
+
+async def get_active_deliveries(role: str, store_id: int):
     """
     Returns active deliveries filtered by the current user's role and store.
     """
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-    
     # Call the role/store-based procedure
-    cursor.callproc("get_active_deliveries_for_user", [role, store_id])
-    
-    results = []
-    for res in cursor.stored_results():
-        results = res.fetchall()
-    
+    return await call_proc("get_active_deliveries_for_user", (role, store_id))
+
+
+def _overview_query(role, store_id, start, end):
+    # everyone but an admin sees their own store (orders by the store's city);
+    # admins see everything
+    order_filter, delivery_filter, staff_filter = "", "", ""
+    params = {
+        "start": start,
+        "end": end,
+        "store_id": store_id,
+        "finished": FINISHED_DELIVERY_STATUSES,
+    }
+    if role != "admin":
+        order_filter = "AND ca.city_id = (SELECT city_id FROM store WHERE store_id = %(store_id)s)"
+        delivery_filter = "AND td.store_id = %(store_id)s"
+        staff_filter = "WHERE e.store_id = %(store_id)s"
+
+    sql = f"""
+        SELECT
+            q.revenue,
+            q.orders_delivered,
+            (SELECT COUNT(*) FROM truckdelivery td
+             WHERE td.status NOT IN %(finished)s {delivery_filter}) AS active_deliveries,
+            s.on_duty_drivers,
+            s.on_duty_assistants,
+            s.available_drivers,
+            s.available_assistants
+        FROM (
+            SELECT
+                COALESCE(SUM(o.total_price), 0) AS revenue,
+                COALESCE(SUM(o.status = 'Delivered'), 0) AS orders_delivered
+            FROM `order` o
+            LEFT JOIN customeraddress ca ON ca.address_id = o.address_id
+            WHERE o.order_date >= %(start)s AND o.order_date < %(end)s {order_filter}
+        ) q
+        CROSS JOIN (
+            SELECT
+                COALESCE(SUM(d.status = 'On Duty'), 0) AS on_duty_drivers,
+                COALESCE(SUM(a.status = 'On Duty'), 0) AS on_duty_assistants,
+                COALESCE(SUM(d.status = 'Available' AND d.next_available_time <= NOW()), 0) AS available_drivers,
+                COALESCE(SUM(a.status = 'Available' AND a.next_available_time <= NOW()), 0) AS available_assistants
+            FROM employee e
+            LEFT JOIN driver d ON d.employee_id = e.employee_id
+            LEFT JOIN assistant a ON a.employee_id = e.employee_id
+            {staff_filter}
+        ) s
+    """
+    return sql, params
+
+
+async def _cached(key, loader, tags):
+    """
+    Return report_cache[key], or await loader() and cache it for
+    DASHBOARD_CACHE_TTL seconds. Concurrent misses share one load.
+    """
+    value = report_cache.get(key)
+    if value is not None:
+        return value
+
+    async def load():
+        value = await loader()
+        report_cache.set(key, value, DASHBOARD_CACHE_TTL, tags=tags)
+        return value
+
+    task = _loading.get(key)
+    if task is None:
+        task = asyncio.ensure_future(load())
+        _loading[key] = task
+        task.add_done_callback(lambda _: _loading.pop(key, None))
+    # shielded: a client going away must not cancel the load other requests wait on
+    return await asyncio.shield(task)
+
+
+async def _load_overview(role, store_id):
+    start, end = current_quarter()
+    sql, params = _overview_query(role, store_id, start, end)
+    row = await fetch_one(sql, params)
+    return {
+        "quarter_start": start.date(),
+        "quarter_revenue": float(row["revenue"]),
+        "orders_delivered": int(row["orders_delivered"]),
+        "active_deliveries": int(row["active_deliveries"]),
+        "staff": {
+            "on_duty_drivers": int(row["on_duty_drivers"]),
+            "on_duty_assistants": int(row["on_duty_assistants"]),
+            "available_drivers": int(row["available_drivers"]),
+            "available_assistants": int(row["available_assistants"]),
+        },
+    }
+
+
+async def get_overview(role: str, store_id: int):
+    """
+    Landing page KPIs (quarter revenue, delivered orders, active deliveries,
+    staff availability) in one query, cached for DASHBOARD_CACHE_TTL seconds
+    per (role, store).
+    """
+    return await _cached(
+        ("dashboard_overview", role, store_id),
+        lambda: _load_overview(role, store_id),
+        tags=("sales", "deliveries", "hours"),
+    )
+
+
+# ----- delivery change feed -----
+
+def delivery_scope(role: str, store_id: int):
+    """Store whose deliveries a user follows: their own, or None (every store) for an admin."""
+    return None if role == "admin" else store_id
+
+
+async def get_active_delivery_snapshot(scope):
+    """
+    Deliveries that are not finished yet, for one store (or all stores when
+    scope is None). Shared by every stream of the same scope for a few seconds.
+    """
+    async def load():
+        where, params = "td.status NOT IN %s", [FINISHED_DELIVERY_STATUSES]
+        if scope is not None:
+            where += " AND td.store_id = %s"
+            params.append(scope)
+        return await fetch_all(f"""
+            SELECT {DELIVERY_EVENT_COLUMNS}
+            FROM truckdelivery td
+            WHERE {where}
+            ORDER BY td.scheduled_departure
+        """, params)
+
+    return await _cached(("active_delivery_snapshot", scope), load, tags=("deliveries",))
+
+
+def publish_delivery_changes(conn, delivery_ids, change):
+    """
+    Publish the current state of the given truck deliveries to the SSE
+    subscribers of their stores. Call after the change is committed.
+    """
+    if not delivery_ids:
+        return
+    cursor = conn.cursor(dictionary=True)
+    placeholders = ", ".join(["%s"] * len(delivery_ids))
+    cursor.execute(f"""
+        SELECT {DELIVERY_EVENT_COLUMNS}
+        FROM truckdelivery td
+        WHERE td.delivery_id IN ({placeholders})
+    """, list(delivery_ids))
+    rows = cursor.fetchall()
     cursor.close()
-    conn.close()
-    return results
\ No newline at end of file
+    for row in rows:
+        delivery_events.publish({"change": change, **row})
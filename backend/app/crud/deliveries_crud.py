@@ -0,0 +1,223 @@
+from datetime import datetime
+
+import aiomysql
+from fastapi import HTTPException
+from app.core.async_database import fetch_all, fetch_one, transaction
+from app.core.cache import report_cache
+from app.core.events import delivery_events
+from app.crud.dashboard_crud import DELIVERY_EVENT_COLUMNS, FINISHED_DELIVERY_STATUSES
+
+
+def _in_list(values):
+    return ", ".join(["%s"] * len(values))
+
+
+async def _complete(cursor, arrivals):
+    """
+    Mark deliveries finished and release the crew of every trip they
+    finish, with one statement per table whatever the number of
+    deliveries or crew.
+
+    arrivals: delivery_id -> (actual arrival or None for now, final status),
+    for deliveries already locked and known to be unfinished.
+    """
+    ids = list(arrivals)
+    rows = " UNION ALL ".join(["SELECT %s AS delivery_id, %s AS arrival, %s AS status"] * len(ids))
+    await cursor.execute(
+        f"""
+        UPDATE truckdelivery td
+        JOIN ({rows}) v ON v.delivery_id = td.delivery_id
+        SET td.actual_arrival = COALESCE(v.arrival, NOW()),
+            td.actual_departure = COALESCE(td.actual_departure, td.scheduled_departure),
+            td.status = v.status
+        """,
+        [v for delivery_id, (arrival, status) in arrivals.items() for v in (delivery_id, arrival, status)],
+    )
+
+    # a trip is the deliveries sharing a truck and departure; its crew are
+    # assigned on any of them and are free once none of them is unfinished.
+    # Arrival is the trip's last arrival (deliveries closed in earlier
+    # batches included); each finished trip counts once per crew member.
+    await cursor.execute(
+        f"""
+        UPDATE (
+            SELECT tea.employee_id,
+                   MAX(trips.arrival) AS arrival,
+                   COUNT(DISTINCT trips.truck_id, trips.scheduled_departure) AS trips
+            FROM (
+                SELECT trip.truck_id, trip.scheduled_departure, MAX(trip.actual_arrival) AS arrival
+                FROM truckdelivery td
+                JOIN truckdelivery trip
+                  ON trip.truck_id = td.truck_id AND trip.scheduled_departure = td.scheduled_departure
+                WHERE td.delivery_id IN ({_in_list(ids)})
+                GROUP BY trip.truck_id, trip.scheduled_departure
+                HAVING SUM(trip.status NOT IN %s) = 0
+            ) trips
+            JOIN truckdelivery leg
+              ON leg.truck_id = trips.truck_id AND leg.scheduled_departure = trips.scheduled_departure
+            JOIN truckemployeeassignment tea ON tea.truck_delivery_id = leg.delivery_id
+            GROUP BY tea.employee_id
+        ) crew
+        LEFT JOIN driver d ON d.employee_id = crew.employee_id
+        LEFT JOIN assistant a ON a.employee_id = crew.employee_id
+        SET d.status = 'Available',
+            d.next_available_time = GREATEST(d.next_available_time, crew.arrival),
+            d.last_delivery_time = GREATEST(COALESCE(d.last_delivery_time, crew.arrival), crew.arrival),
+            d.consecutive_deliveries = d.consecutive_deliveries + crew.trips,
+            a.status = 'Available',
+            a.next_available_time = GREATEST(a.next_available_time, crew.arrival),
+            a.last_delivery_time = GREATEST(COALESCE(a.last_delivery_time, crew.arrival), crew.arrival),
+            a.consecutive_deliveries = a.consecutive_deliveries + crew.trips
+        """,
+        [*ids, FINISHED_DELIVERY_STATUSES],
+    )
+    crew_released = cursor.rowcount
+
+    await cursor.execute(
+        f"""
+        UPDATE `order` o
+        JOIN truckdelivery td ON td.order_id = o.order_id
+        SET o.status = 'Delivered'
+        WHERE td.delivery_id IN ({_in_list(ids)})
+        """,
+        ids,
+    )
+    return crew_released
+
+
+async def finish_deliveries(items, role: str, store_id: int):
+    """
+    Complete many truck deliveries in one transaction.
+
+    items: dicts with delivery_id, an optional actual_arrival and an
+    optional final status (Delivered or Delayed, default Delivered). Returns
+    an outcome per delivery: finished, not_found, other_store (everyone
+    but an admin may only finish their own store's deliveries), invalid_status,
+    already_finished or invalid_arrival (before the departure or in the
+    future). Deliveries that cannot be finished do not stop the others.
+    """
+    arrivals = {}
+    for item in items:
+        arrival = item.get("actual_arrival")
+        if arrival is not None and arrival.tzinfo is not None:
+            arrival = arrival.astimezone().replace(tzinfo=None)  # DATETIME columns hold local time
+        arrivals[item["delivery_id"]] = (arrival, item.get("status") or "Delivered")
+    if not arrivals:
+        return {"finished": 0, "crew_released": 0, "results": []}
+
+    ids = list(arrivals)
+    now = datetime.now()
+    outcomes = {}
+    try:
+        async with transaction() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                # locked in primary key order, like lock_trains
+                await cursor.execute(
+                    f"""
+                    SELECT delivery_id, store_id, status, scheduled_departure
+                    FROM truckdelivery
+                    WHERE delivery_id IN ({_in_list(ids)})
+                    ORDER BY delivery_id
+                    FOR UPDATE
+                    """,
+                    ids,
+                )
+                found = {r["delivery_id"]: r for r in await cursor.fetchall()}
+                for delivery_id, (arrival, status) in arrivals.items():
+                    row = found.get(delivery_id)
+                    if row is None:
+                        outcomes[delivery_id] = "not_found"
+                    elif role != "admin" and row["store_id"] != store_id:
+                        outcomes[delivery_id] = "other_store"
+                    elif status not in FINISHED_DELIVERY_STATUSES:
+                        outcomes[delivery_id] = "invalid_status"
+                    elif row["status"] in FINISHED_DELIVERY_STATUSES:
+                        outcomes[delivery_id] = "already_finished"
+                    elif arrival is not None and not row["scheduled_departure"] <= arrival <= now:
+                        outcomes[delivery_id] = "invalid_arrival"
+                    else:
+                        outcomes[delivery_id] = "finished"
+
+                done = {d: a for d, a in arrivals.items() if outcomes[d] == "finished"}
+                crew_released = 0
+                events = []
+                if done:
+                    crew_released = await _complete(cursor, done)
+                    await cursor.execute(
+                        f"""
+                        SELECT {DELIVERY_EVENT_COLUMNS}
+                        FROM truckdelivery td
+                        WHERE td.delivery_id IN ({_in_list(list(done))})
+                        """,
+                        list(done),
+                    )
+                    events = await cursor.fetchall()
+    except aiomysql.Error as e:
+        raise HTTPException(status_code=400, detail=f"MySQL Error: {str(e)}")
+
+    if events:
+        report_cache.invalidate("sales", "deliveries", "hours")
+        for row in events:
+            delivery_events.publish({"change": "finished", **row})
+
+    return {
+        "finished": len(events),
+        "crew_released": crew_released,
+        "results": [{"delivery_id": d, "outcome": outcomes[d]} for d in ids],
+    }
+
+
+_COMPLETION_ERRORS = {
+    "not_found": (404, "Delivery not found"),
+    "other_store": (403, "Delivery belongs to another store"),
+    "invalid_status": (422, f"status must be one of {', '.join(FINISHED_DELIVERY_STATUSES)}"),
+    "already_finished": (409, "Delivery is already finished"),
+    "invalid_arrival": (422, "Arrival must be after the scheduled departure and not in the future"),
+}
+
+
+async def get_delivery_status(delivery_id: int):
+    """A truck delivery with its crew (assigned anywhere on its trip) and their availability."""
+    delivery = await fetch_one(
+        f"SELECT {DELIVERY_EVENT_COLUMNS} FROM truckdelivery td WHERE td.delivery_id = %s",
+        (delivery_id,),
+    )
+    if delivery is None:
+        raise HTTPException(status_code=404, detail="Delivery not found")
+    crew = await fetch_all(
+        """
+        SELECT DISTINCT e.employee_id, e.employee_name,
+               IF(d.employee_id IS NOT NULL, 'driver', 'assistant') AS crew_role,
+               COALESCE(d.status, a.status) AS status,
+               COALESCE(d.next_available_time, a.next_available_time) AS next_available_time,
+               COALESCE(d.last_delivery_time, a.last_delivery_time) AS last_delivery_time,
+               COALESCE(d.consecutive_deliveries, a.consecutive_deliveries) AS consecutive_deliveries
+        FROM truckdelivery trip
+        JOIN truckemployeeassignment tea ON tea.truck_delivery_id = trip.delivery_id
+        JOIN employee e ON e.employee_id = tea.employee_id
+        LEFT JOIN driver d ON d.employee_id = e.employee_id
+        LEFT JOIN assistant a ON a.employee_id = e.employee_id
+        WHERE trip.truck_id = %s AND trip.scheduled_departure = %s
+        ORDER BY e.employee_id
+        """,
+        (delivery["truck_id"], delivery["scheduled_departure"]),
+    )
+    return {"delivery": delivery, "assigned_employees": crew}
+
+
+async def complete_delivery(delivery_id: int, actual_arrival, status: str, role: str, store_id: int):
+    """
+    Finish one delivery (see finish_deliveries) and return it with the
+    crew's new availability. Raises the HTTP error matching the outcome.
+    """
+    result = await finish_deliveries(
+        [{"delivery_id": delivery_id, "actual_arrival": actual_arrival, "status": status}],
+        role=role,
+        store_id=store_id,
+    )
+    outcome = result["results"][0]["outcome"]
+    if outcome in _COMPLETION_ERRORS:
+        code, detail = _COMPLETION_ERRORS[outcome]
+        raise HTTPException(status_code=code, detail=detail)
+    return {"success": True, "crew_released": result["crew_released"],
+            **await get_delivery_status(delivery_id)}
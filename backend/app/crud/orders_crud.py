@@ -1,19 +1,20 @@
+import base64
+import csv
+import io
 import mysql.connector
+import aiomysql
+from datetime import date, timedelta
 from fastapi import HTTPException
-from app.models.order_models import OrderCreate
-import os
+from pydantic import ValidationError
+from app.core.cache import report_cache
+from app.core.catalog import get_catalog, get_catalog_async
+from app.core.database import get_db
+from typing import List
+from app.core.async_database import fetch_all, transaction
+from app.crud.allocations_crud import insert_allocations, lock_trains
+from app.models.order_models import BulkOrderCreate, OrderCreate, TrainAllocationRequest
 
 
-
-
-def get_db():
-    return mysql.connector.connect(
-        host=os.getenv("DB_HOST", "localhost"),
-        user=os.getenv("DB_USER", "root"),
-        password=os.getenv("DB_PASS", ""),
-        database=os.getenv("DB_NAME", "kandypacklogistics"),
-    )
-
 def create_order(order: OrderCreate):
     conn = get_db()
     cursor = conn.cursor(dictionary=True)
@@ -46,6 +47,7 @@ def create_order(order: OrderCreate):
             ))
 
         conn.commit()
+        report_cache.invalidate("sales")
         return { "order_id": order_id, "message": "Order created successfully" }
 
     except mysql.connector.Error as e:
@@ -58,11 +60,277 @@ def create_order(order: OrderCreate):
 
 
 
-def get_orders():
+# orders written per multi-row INSERT in bulk ingestion
+BULK_CHUNK_SIZE = 200
+# minimum gap between order_date and required_date (order_chk_1)
+MIN_LEAD_DAYS = 7
+CSV_COLUMNS = ("order_ref", "customer_id", "address_id", "order_date", "required_date", "product_id", "quantity")
+
+
+def _load_customer_addresses(cursor, customer_ids):
+    """customer_id -> set of its address ids, for the customers that exist."""
+    if not customer_ids:
+        return {}
+    ids = sorted(customer_ids)
+    placeholders = ", ".join(["%s"] * len(ids))
+    cursor.execute(f"""
+        SELECT c.customer_id, ca.address_id
+        FROM customer c
+        LEFT JOIN customeraddress ca ON ca.customer_id = c.customer_id
+        WHERE c.customer_id IN ({placeholders})
+    """, tuple(ids))
+    addresses = {}
+    for r in cursor.fetchall():
+        addresses.setdefault(r["customer_id"], set())
+        if r["address_id"] is not None:
+            addresses[r["customer_id"]].add(r["address_id"])
+    return addresses
+
+
+def _prepare_order(order: BulkOrderCreate, products, addresses):
+    """
+    Validate one order and compute its totals.
+    Returns (order row, item rows); raises ValueError with the reason otherwise.
+    """
+    try:
+        order_date = date.fromisoformat(order.order_date)
+        required_date = date.fromisoformat(order.required_date)
+    except ValueError:
+        raise ValueError("order_date and required_date must be YYYY-MM-DD")
+    if required_date < order_date + timedelta(days=MIN_LEAD_DAYS):
+        raise ValueError(f"required_date must be at least {MIN_LEAD_DAYS} days after order_date")
+
+    if order.customer_id not in addresses:
+        raise ValueError(f"Customer {order.customer_id} not found")
+    if order.address_id is not None and order.address_id not in addresses[order.customer_id]:
+        raise ValueError(f"Address {order.address_id} does not belong to customer {order.customer_id}")
+
+    if not order.items:
+        raise ValueError("Order has no items")
+    quantities = {}
+    for item in order.items:
+        if item.quantity <= 0:
+            raise ValueError(f"quantity must be > 0 (product {item.product_id})")
+        if item.product_id not in products:
+            raise ValueError(f"Product {item.product_id} not found")
+        # (order_id, product_id) is the OrderItem key - merge repeated products
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+
+    items = []
+    total_quantity, total_price, total_space = 0, 0.0, 0.0
+    for product_id, quantity in quantities.items():
+        product = products[product_id]
+        unit_price = round(float(product["unit_price"]), 2)
+        items.append((product_id, quantity, unit_price))
+        total_quantity += quantity
+        total_price += quantity * unit_price
+        total_space += quantity * float(product["unit_space"])
+
+    row = (order.customer_id, order.address_id, order_date, required_date, order.status,
+           total_quantity, round(total_price, 2), round(total_space, 2))
+    return row, items
+
+
+def _insert_orders(cursor, prepared):
+    """
+    Write prepared orders with one multi-row INSERT for the orders and one for
+    their items. Returns the new order ids, in input order.
+    """
+    values = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s)"] * len(prepared))
+    cursor.execute(f"""
+        INSERT INTO `Order` (customer_id, address_id, order_date, required_date, status,
+                             total_quantity, total_price, total_space)
+        VALUES {values}
+    """, [v for row, _ in prepared for v in row])
+
+    # a single-statement insert gets consecutive auto-increment ids
+    first_id = cursor.lastrowid
+    order_ids = [first_id + i for i in range(len(prepared))]
+
+    item_params = [
+        v
+        for order_id, (_, items) in zip(order_ids, prepared)
+        for item in items
+        for v in (order_id, *item)
+    ]
+    values = ", ".join(["(%s, %s, %s, %s)"] * (len(item_params) // 4))
+    cursor.execute(f"""
+        INSERT INTO OrderItem (order_id, product_id, quantity, unit_price)
+        VALUES {values}
+    """, item_params)
+    return order_ids
+
+
+def bulk_create_orders(orders: List[BulkOrderCreate], errors=None):
+    """
+    Create many orders at once.
+
+    Every order is validated up front against the product catalog and the
+    customers' addresses (one query), and totals are computed here.
+    Valid orders are written in chunks of BULK_CHUNK_SIZE, each chunk with
+    two multi-row INSERTs in its own transaction. If a chunk fails it is
+    retried order by order so one bad order does not sink the rest.
+
+    Returns the created orders and a per-order error list; `errors` may carry
+    errors found while parsing the input.
+    """
+    errors = list(errors or [])
+    created = []
+
     conn = get_db()
     cursor = conn.cursor(dictionary=True)
+    try:
+        products = get_catalog({i.product_id for o in orders for i in o.items}).products
+        addresses = _load_customer_addresses(cursor, {o.customer_id for o in orders})
 
-    query = """
+        valid = []  # (index, order, prepared)
+        for index, order in enumerate(orders):
+            try:
+                valid.append((index, order, _prepare_order(order, products, addresses)))
+            except ValueError as e:
+                errors.append({"index": index, "order_ref": order.order_ref, "error": str(e)})
+
+        for start in range(0, len(valid), BULK_CHUNK_SIZE):
+            chunk = valid[start:start + BULK_CHUNK_SIZE]
+            try:
+                order_ids = _insert_orders(cursor, [p for _, _, p in chunk])
+                conn.commit()
+            except mysql.connector.Error:
+                conn.rollback()
+            else:
+                created.extend(
+                    {"index": index, "order_ref": order.order_ref, "order_id": order_id}
+                    for (index, order, _), order_id in zip(chunk, order_ids)
+                )
+                continue
+
+            # fall back to one transaction per order to isolate the failing rows
+            for index, order, prepared in chunk:
+                try:
+                    order_id = _insert_orders(cursor, [prepared])[0]
+                    conn.commit()
+                except mysql.connector.Error as e:
+                    conn.rollback()
+                    errors.append({"index": index, "order_ref": order.order_ref, "error": str(e)})
+                else:
+                    created.append({"index": index, "order_ref": order.order_ref, "order_id": order_id})
+    finally:
+        cursor.close()
+        conn.close()
+
+    if created:
+        report_cache.invalidate("sales")
+    errors.sort(key=lambda e: (e.get("index") is None, e.get("index") or 0))
+    return {
+        "created_count": len(created),
+        "error_count": len(errors),
+        "created": created,
+        "errors": errors,
+    }
+
+
+def parse_orders_csv(content: bytes):
+    """
+    Parse a CSV upload with one order item per line:
+        order_ref,customer_id,address_id,order_date,required_date,product_id,quantity
+    Lines sharing an order_ref form one order; a line with a blank
+    order_ref is an order of its own. Returns (orders, errors).
+    """
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV file must be UTF-8 encoded")
+
+    reader = csv.DictReader(io.StringIO(text))
+    missing = [c for c in CSV_COLUMNS if c not in (reader.fieldnames or []) and c != "address_id"]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Missing CSV columns: {', '.join(missing)}")
+
+    groups = {}  # (order_ref, line) -> (first line number, header fields, items, line numbers)
+    for line_no, row in enumerate(reader, start=2):
+        ref = (row.get("order_ref") or "").strip()
+        key = (ref, None) if ref else ("", line_no)  # blank refs never group
+        header = tuple((row.get(c) or "").strip() for c in CSV_COLUMNS[1:5])
+        item = {"product_id": (row.get("product_id") or "").strip(),
+                "quantity": (row.get("quantity") or "").strip()}
+        if key not in groups:
+            groups[key] = (line_no, header, [item], [line_no])
+            continue
+        first_line, first_header, items, lines = groups[key]
+        if header != first_header:
+            groups[key] = (first_line, None, items, lines + [line_no])
+        else:
+            items.append(item)
+            lines.append(line_no)
+
+    orders, errors = [], []
+    for (ref, _), (first_line, header, items, lines) in groups.items():
+        if header is None:
+            errors.append({"index": None, "order_ref": ref, "lines": lines,
+                           "error": "Lines of the same order_ref disagree on customer, address or dates"})
+            continue
+        customer_id, address_id, order_date, required_date = header
+        try:
+            orders.append(BulkOrderCreate(
+                order_ref=ref or None,
+                customer_id=customer_id,
+                address_id=address_id or None,
+                order_date=order_date,
+                required_date=required_date,
+                items=items,
+            ))
+        except ValidationError as e:
+            errors.append({"index": None, "order_ref": ref, "lines": lines,
+                           "error": "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())})
+    return orders, errors
+
+
+ORDER_PAGE_SIZE = 50  # default page when paging by cursor
+ORDER_PAGE_MAX = 500
+
+
+def encode_order_cursor(order_date, order_id):
+    raw = f"{order_date.isoformat()}|{order_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_order_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        day, order_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return date.fromisoformat(day), int(order_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _orders_query(status=None, customer_id=None, date_from=None, date_to=None, store_id=None,
+                  cursor=None, limit=None):
+    joins, where, params = [], [], []
+    if status:
+        where.append("o.status = %s")
+        params.append(status)
+    if customer_id is not None:
+        where.append("o.customer_id = %s")
+        params.append(customer_id)
+    if date_from is not None:
+        where.append("o.order_date >= %s")
+        params.append(date_from)
+    if date_to is not None:
+        where.append("o.order_date <= %s")
+        params.append(date_to)
+    if store_id is not None:
+        # an order belongs to the store in its delivery address' city
+        joins.append("JOIN customeraddress ca ON ca.address_id = o.address_id")
+        where.append("ca.city_id = (SELECT s.city_id FROM store s WHERE s.store_id = %s)")
+        params.append(store_id)
+    if cursor:
+        last_date, last_id = decode_order_cursor(cursor)
+        where.append("(o.order_date < %s OR (o.order_date = %s AND o.order_id < %s))")
+        params.extend((last_date, last_date, last_id))
+    if limit is not None:
+        params.append(limit)
+
+    query = f"""
         SELECT 
             o.order_id,
             o.customer_id,
@@ -70,21 +338,44 @@ def get_orders():
             o.order_date,
             o.required_date,
             o.status,
-            COALESCE(SUM(oi.quantity), 0) AS total_quantity,
+            o.total_quantity,
             o.total_space,
-            COALESCE(SUM(oi.quantity * oi.unit_price), 0) AS total_price
+            o.total_price
         FROM `order` o
         JOIN customer c ON o.customer_id = c.customer_id
-        LEFT JOIN orderitem oi ON o.order_id = oi.order_id
-        GROUP BY o.order_id, o.customer_id, c.customer_name, o.order_date, o.required_date, o.status
-        ORDER BY o.order_date DESC
+        {" ".join(joins)}
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY o.order_date DESC, o.order_id DESC
+        {"LIMIT %s" if limit is not None else ""}
     """
-    cursor.execute(query)
-    orders = cursor.fetchall()
+    return query, tuple(params)
 
-    cursor.close()
-    conn.close()
-    return orders
+
+async def get_orders(limit: int = None, cursor: str = None, status: str = None, customer_id: int = None,
+                     date_from: date = None, date_to: date = None, store_id: int = None):
+    """
+    Orders newest first, keyset-paginated on (order_date, order_id).
+    Totals come from the stored Order columns. Returns (rows, next_cursor);
+    next_cursor is None on the last page.
+    Without limit and cursor every matching order is returned, as before
+    pagination (the Orders page pages client-side); a cursor without a
+    limit gets ORDER_PAGE_SIZE rows.
+    """
+    filters = dict(status=status, customer_id=customer_id, date_from=date_from,
+                   date_to=date_to, store_id=store_id)
+    if limit is None:
+        if not cursor:
+            return await fetch_all(*_orders_query(**filters)), None
+        limit = ORDER_PAGE_SIZE
+    if not 1 <= limit <= ORDER_PAGE_MAX:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {ORDER_PAGE_MAX}")
+
+    # one extra row tells whether there is a next page
+    rows = await fetch_all(*_orders_query(**filters, cursor=cursor, limit=limit + 1))
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_order_cursor(rows[-1]["order_date"], rows[-1]["order_id"])
 
 def get_order_items(order_id: int):
     conn = get_db()
@@ -124,3 +415,154 @@ def get_order_items(order_id: int):
     conn.close()
 
     return items
+
+
+async def allocate_order_to_train(order_id: int, allocation: TrainAllocationRequest):
+    """
+    Insert a row into TrainAllocation for the given order.
+
+    The Train row is locked (SELECT ... FOR UPDATE) while its capacity is
+    checked, so concurrent allocations to the same train are serialized and
+    can never overbook it. Lock + check and insert run in one transaction
+    with two statements; Train.utilized_space is bumped by the
+    trainallocation trigger. Returns the train's remaining capacity.
+    """
+    train_id = allocation.train_id
+    product_id = allocation.product_id
+    allocated_qty = allocation.allocated_qty
+    store_id = allocation.store_id
+
+    if allocated_qty <= 0:
+        raise HTTPException(status_code=400, detail="allocated_qty must be > 0")
+
+    # product unit space if not provided
+    unit_space = allocation.unit_space
+    if unit_space is None:
+        product = (await get_catalog_async([product_id])).products.get(product_id)
+        if product is None:
+            raise HTTPException(status_code=404, detail="Product not found")
+        unit_space = float(product["unit_space"])
+
+    try:
+        async with transaction() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                # lock the train row together with its maintained utilization
+                await cursor.execute(
+                    """
+                    SELECT
+                        t.capacity_space AS capacity,
+                        t.status,
+                        t.utilized_space AS utilized
+                    FROM Train t
+                    WHERE t.train_id = %s
+                    FOR UPDATE
+                    """,
+                    (train_id,),
+                )
+                trow = await cursor.fetchone()
+                if not trow:
+                    raise HTTPException(status_code=404, detail="Train not found")
+                if trow["status"] == "cancelled":
+                    raise HTTPException(status_code=409, detail="Train is cancelled")
+
+                capacity = float(trow["capacity"])
+                utilized = float(trow["utilized"] or 0)
+                this_allocation_space = float(allocated_qty) * float(unit_space)
+                if utilized + this_allocation_space > capacity + 1e-9:
+                    raise HTTPException(
+                        status_code=409,
+                        detail=f"Not enough space on the train (remaining {max(capacity - utilized, 0):.2f})",
+                    )
+
+                # Insert allocation
+                await cursor.execute(
+                    """
+                    INSERT INTO TrainAllocation (
+                        train_id, order_id, product_id, store_id, allocated_qty,
+                        start_date_time, status, unit_space
+                    ) VALUES (%s,%s,%s,%s,%s, NOW(), 'Allocated', %s)
+                    """,
+                    (train_id, order_id, product_id, store_id, allocated_qty, unit_space),
+                )
+                utilized += this_allocation_space
+                return {
+                    "trip_id": cursor.lastrowid,
+                    "message": "Allocated",
+                    "capacity": capacity,
+                    "utilized": utilized,
+                    "remaining_capacity": max(capacity - utilized, 0.0),
+                }
+    except aiomysql.Error as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def allocate_order_batch(order_id: int, allocations: List[TrainAllocationRequest]):
+    """
+    Insert several TrainAllocation rows for the given order at once.
+
+    Unit spaces come from the product catalog, every train involved is locked
+    with one SELECT ... FOR UPDATE, capacity is checked per train for the
+    whole batch and the rows go in with a single multi-row INSERT. Either
+    every allocation is written or none is.
+    """
+    if not allocations:
+        raise HTTPException(status_code=400, detail="No allocations given")
+    if any(a.allocated_qty <= 0 for a in allocations):
+        raise HTTPException(status_code=400, detail="allocated_qty must be > 0")
+
+    missing = sorted({a.product_id for a in allocations if a.unit_space is None})
+    products = (await get_catalog_async(missing)).products
+    unknown = [pid for pid in missing if pid not in products]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Product not found: {unknown}")
+    unit_spaces = {pid: float(products[pid]["unit_space"]) for pid in missing}
+
+    try:
+        async with transaction() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                trains = await lock_trains(cursor, train_ids=[a.train_id for a in allocations])
+
+                rows, requested = [], {}
+                for a in allocations:
+                    train = trains.get(a.train_id)
+                    if train is None:
+                        raise HTTPException(status_code=404, detail=f"Train {a.train_id} not found")
+                    if train["status"] == "cancelled":
+                        raise HTTPException(status_code=409, detail=f"Train {a.train_id} is cancelled")
+                    unit_space = a.unit_space if a.unit_space is not None else unit_spaces[a.product_id]
+                    rows.append({
+                        "train_id": a.train_id,
+                        "order_id": order_id,
+                        "product_id": a.product_id,
+                        "store_id": a.store_id,
+                        "allocated_qty": a.allocated_qty,
+                        "unit_space": unit_space,
+                    })
+                    requested[a.train_id] = requested.get(a.train_id, 0.0) + a.allocated_qty * float(unit_space)
+
+                summary = []
+                for train_id, space in requested.items():
+                    capacity = float(trains[train_id]["capacity"])
+                    utilized = float(trains[train_id]["utilized"] or 0)
+                    if utilized + space > capacity + 1e-9:
+                        raise HTTPException(
+                            status_code=409,
+                            detail=f"Not enough space on train {train_id} (remaining {max(capacity - utilized, 0):.2f}, requested {space:.2f})",
+                        )
+                    utilized += space
+                    summary.append({
+                        "train_id": train_id,
+                        "capacity": capacity,
+                        "utilized": utilized,
+                        "remaining_capacity": max(capacity - utilized, 0.0),
+                    })
+
+                first_trip_id = await insert_allocations(cursor, rows)
+                return {
+                    # a single-statement insert gets consecutive auto-increment ids
+                    "trip_ids": [first_trip_id + i for i in range(len(rows))],
+                    "message": "Allocated",
+                    "trains": summary,
+                }
+    except aiomysql.Error as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,21 +1,13 @@
 from fastapi import HTTPException
+from app.core.catalog import get_catalog, invalidate_catalog
 from app.core.database import get_db
 from app.models.product_models import ProductCreate
 from app.models.product_type_models import ProductTypeCreate
 from mysql.connector.errors import Error as MySQLError
-import mysql.connector, os
-from dotenv import load_dotenv
-
-load_dotenv()
 
 
 def get_products():
-    conn = mysql.connector.connect(
-        host=os.getenv("DB_HOST", "localhost"),
-        user=os.getenv("DB_USER", "root"),
-        password=os.getenv("DB_PASS", ""),
-        database=os.getenv("DB_NAME", "kandypacklogistics"),
-    )
+    conn = get_db()
     cursor = conn.cursor(dictionary=True)
     cursor.execute("SELECT product_id, product_name, unit_price FROM Product")
     products = cursor.fetchall()
@@ -24,21 +16,10 @@ def get_products():
     return products
 
 def get_product_types():
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-    try:
-        query = """
-            SELECT product_type_id, type_name
-            FROM product_type
-        """
-        cursor.execute(query)
-        results = cursor.fetchall()
-        return results
-    except Exception as e:
-        raise HTTPException(status_code=500, detail="Database error")
-    finally:
-        cursor.close()
-        conn.close()
+    return [
+        {"product_type_id": t["product_type_id"], "type_name": t["type_name"]}
+        for t in get_catalog().product_types.values()
+    ]
 
 def create_product_type(product_type: ProductTypeCreate, user_role: str):
     if user_role != "admin":
@@ -56,6 +37,7 @@ def create_product_type(product_type: ProductTypeCreate, user_role: str):
         """
         cursor.execute(query, (product_type.type_name,))
         conn.commit()
+        invalidate_catalog()
 
         product_type_id = cursor.lastrowid
         cursor.execute("SELECT product_type_id, type_name FROM product_type WHERE product_type_id = %s", (product_type_id,))
@@ -70,28 +52,16 @@ def create_product_type(product_type: ProductTypeCreate, user_role: str):
 
 
 def get_products(role: str, store_id: int):
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-    try:
-        query = """
-            SELECT 
-                p.product_id,
-                p.product_name,
-                p.unit_space,
-                p.unit_price,
-                pt.type_name AS product_type
-            FROM product p
-            JOIN product_type pt ON p.product_type_id = pt.product_type_id
-            
-        """
-        cursor.execute(query)
-        results = cursor.fetchall()
-        return results
-    except Exception as e:
-        raise HTTPException(status_code=500, detail="Database error")
-    finally:
-        cursor.close()
-        conn.close()
+    return [
+        {
+            "product_id": p["product_id"],
+            "product_name": p["product_name"],
+            "unit_space": p["unit_space"],
+            "unit_price": p["unit_price"],
+            "product_type": p["product_type"],
+        }
+        for p in get_catalog().products.values()
+    ]
 
 def create_product(product: ProductCreate, user_role: str):
     if user_role != "admin":
@@ -126,6 +96,7 @@ def create_product(product: ProductCreate, user_role: str):
             product_type["product_type_id"]
         ))
         conn.commit()
+        invalidate_catalog()
 
         product_id = cursor.lastrowid
         cursor.execute("""
@@ -170,6 +141,7 @@ def delete_product(product_id: int, user_role: str):
             raise HTTPException(status_code=404, detail="Product not found")
         
         conn.commit()
+        invalidate_catalog()
         return {"detail": "Product deleted successfully"}
     except Exception as e:
         conn.rollback()
@@ -1,5 +1,171 @@
-from app.core.database import get_db
-
+import os
+from datetime import timedelta
+from typing import Callable, NamedTuple, Tuple
+from app.core.database import get_db, pool
+from app.core.cache import cached_report
+from app.core.periods import current_quarter, resolve_period
+
+
+# ----- rollups -----
+# Each rollup is rebuilt one day at a time: delete the day's rows, then
+# re-aggregate the day from the base tables. Triggers record changed days
+# in rollup_dirty_day (see kandypack_logistics_complete.sql).
+_ROLLUP_REBUILDS = {
+    "sales": [
+        ("rollup_orders_daily", "o.order_date", """
+            INSERT INTO rollup_orders_daily (day, city_id, order_count, delivered_count, total_price)
+            SELECT
+                o.order_date,
+                COALESCE(ca.city_id, 0),
+                COUNT(*),
+                SUM(o.status = 'Delivered'),
+                COALESCE(SUM(o.total_price), 0)
+            FROM `order` o
+            LEFT JOIN customeraddress ca ON ca.address_id = o.address_id
+            WHERE {where}
+            GROUP BY o.order_date, COALESCE(ca.city_id, 0)
+        """),
+        ("rollup_sales_daily", "o.order_date", """
+            INSERT INTO rollup_sales_daily (day, city_id, product_id, order_lines, quantity, revenue)
+            SELECT
+                o.order_date,
+                COALESCE(ca.city_id, 0),
+                oi.product_id,
+                COUNT(*),
+                SUM(oi.quantity),
+                SUM(oi.quantity * oi.unit_price)
+            FROM orderitem oi
+            JOIN `order` o ON o.order_id = oi.order_id
+            LEFT JOIN customeraddress ca ON ca.address_id = o.address_id
+            WHERE {where}
+            GROUP BY o.order_date, COALESCE(ca.city_id, 0), oi.product_id
+        """),
+    ],
+    "deliveries": [
+        ("rollup_deliveries_daily", "td.scheduled_departure", """
+            INSERT INTO rollup_deliveries_daily (
+                day, route_id, truck_id, total_deliveries, delivered_count, delayed_count,
+                on_time_count, timed_deliveries, total_hours
+            )
+            SELECT
+                DATE(td.scheduled_departure),
+                td.route_id,
+                td.truck_id,
+                COUNT(*),
+                SUM(td.status = 'Delivered'),
+                SUM(td.status = 'Delayed'),
+                SUM(td.status = 'Delivered'
+                    AND TIMESTAMPDIFF(HOUR, td.actual_departure, td.actual_arrival) <= tr.max_delivery_time),
+                COUNT(TIMESTAMPDIFF(HOUR, td.actual_departure, td.actual_arrival)),
+                COALESCE(SUM(TIMESTAMPDIFF(HOUR, td.actual_departure, td.actual_arrival)), 0)
+            FROM truckdelivery td
+            JOIN truckroute tr ON tr.route_id = td.route_id
+            WHERE {where}
+            GROUP BY DATE(td.scheduled_departure), td.route_id, td.truck_id
+        """),
+    ],
+    "hours": [
+        ("rollup_employee_hours_daily", "td.scheduled_departure", """
+            INSERT INTO rollup_employee_hours_daily (day, employee_id, assignment_count, assigned_hours)
+            SELECT
+                DATE(td.scheduled_departure),
+                tea.employee_id,
+                COUNT(*),
+                COALESCE(SUM(tea.assigned_hours), 0)
+            FROM truckemployeeassignment tea
+            JOIN truckdelivery td ON td.delivery_id = tea.truck_delivery_id
+            WHERE {where}
+            GROUP BY DATE(td.scheduled_departure), tea.employee_id
+        """),
+    ],
+}
+
+
+def _day_spans(days):
+    """Merge sorted days into half-open [start, end) spans of consecutive days."""
+    spans = []
+    for day in days:
+        if spans and spans[-1][1] == day:
+            spans[-1][1] = day + timedelta(days=1)
+        else:
+            spans.append([day, day + timedelta(days=1)])
+    return spans
+
+
+def _spans_predicate(column, spans):
+    sql = " OR ".join(f"({column} >= %s AND {column} < %s)" for _ in spans)
+    params = [d for span in spans for d in span]
+    return f"({sql})", params
+
+
+def _refresh_rollups(conn, *rollups):
+    """
+    Rebuild the dirty days of the given rollups ('sales', 'deliveries', 'hours').
+    conn must be a connection of the caller's own (pool.connect()), never
+    the request's: the rebuild commits and starts its own transaction.
+
+    A plain (non-locking) read checks for dirty days first, so reports
+    normally take no locks at all. The rebuild runs in its own READ
+    COMMITTED transaction: no gap locks, so the triggers can keep marking
+    new days dirty, and INSERT ... SELECT does not share-lock the base
+    rows. Markers are claimed with SKIP LOCKED - a day another reader is
+    rebuilding is left to it - and a day changed meanwhile stays dirty.
+    """
+    cur = conn.cursor()
+    try:
+        placeholders = ", ".join(["%s"] * len(rollups))
+        cur.execute(f"""
+            SELECT 1 FROM rollup_dirty_day
+            WHERE rollup_name IN ({placeholders})
+            LIMIT 1
+        """, rollups)
+        if not cur.fetchall():
+            return
+
+        conn.commit()  # end the read's snapshot; the rebuild is its own transaction
+        conn.start_transaction(isolation_level="READ COMMITTED")
+        cur.execute(f"""
+            SELECT rollup_name, day FROM rollup_dirty_day
+            WHERE rollup_name IN ({placeholders})
+            ORDER BY rollup_name, day
+            FOR UPDATE SKIP LOCKED
+        """, rollups)
+        dirty = {}
+        for rollup, day in cur.fetchall():
+            dirty.setdefault(rollup, []).append(day)
+
+        for rollup, days in dirty.items():
+            # spans only join consecutive claimed days, so a day skipped
+            # above is never rebuilt or cleared here
+            spans = _day_spans(days)
+            for table, column, insert_sql in _ROLLUP_REBUILDS[rollup]:
+                where, params = _spans_predicate("day", spans)
+                cur.execute(f"DELETE FROM {table} WHERE {where}", params)
+                where, params = _spans_predicate(column, spans)
+                cur.execute(insert_sql.format(where=where), params)
+            where, params = _spans_predicate("day", spans)
+            cur.execute(f"DELETE FROM rollup_dirty_day WHERE rollup_name = %s AND {where}", [rollup, *params])
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+# revenue and delivered orders of a period in one pass
+KPIS_QUERY = """
+    SELECT
+        COALESCE(SUM(total_price), 0) AS total_sales,
+        COALESCE(SUM(status = 'Delivered'), 0) AS delivered_count
+    FROM `order`
+    WHERE order_date >= %s
+      AND order_date < %s
+"""
+
+
+@cached_report("kpis", tags=("sales",), period=lambda: current_quarter())
 def get_kpis():
     """
     Get key performance indicators (KPIs) for the current quarter.
@@ -12,40 +178,19 @@ def get_kpis():
     """
 
 
+    start, end = current_quarter()
     conn = get_db()
     cur = conn.cursor()
 
-    """ Calculate current quarter revenue and delivered orders 
-    """
-
-    cur.execute("""
-        SELECT SUM(total_price) AS total_sales
-FROM `order`
-WHERE YEAR(order_date) = YEAR(CURDATE()) 
-  AND QUARTER(order_date) = QUARTER(CURDATE());
-        """)
-    
-    revenue = cur.fetchone()
-    current_revenue = revenue if revenue and revenue is not None else 0
-
+    cur.execute(KPIS_QUERY, (start, end))
 
-    # Calculate number of orders delivered in the current quarter
-
-    cur.execute("""
-        SELECT COUNT(*) AS delivered_count
-        FROM `order`
-        WHERE status = 'Delivered'
-          AND YEAR(order_date) = YEAR(CURDATE()) 
-          AND QUARTER(order_date) = QUARTER(CURDATE());
-        """)
-    
-    delivered = cur.fetchone()
-    delivered_count = delivered if delivered and delivered is not None else 0
+    current_revenue, delivered_count = cur.fetchone()
     cur.close()
+    conn.close()
 
     return [
         {"name": "This Quarter Revenue", "value": current_revenue},
-        {"name": "Orders Delivered", "value": delivered_count}
+        {"name": "Orders Delivered", "value": int(delivered_count)}
     ]
 
 
@@ -84,6 +229,89 @@ WHERE YEAR(order_date) = YEAR(CURDATE())
 #     return report
 
 
+# ----- report queries -----
+# Each report is a ReportQuery, so the JSON endpoints (get_* below, cached)
+# and the CSV/NDJSON exports (stream_report) run the same SQL.
+EXPORT_BATCH_SIZE = int(os.getenv("REPORT_EXPORT_BATCH_SIZE", "1000"))
+
+
+class ReportQuery(NamedTuple):
+    sql: str
+    params: tuple
+    columns: Tuple[str, ...]  # keys of the rows, in export column order
+    row: Callable  # maps a result tuple to a dict
+    rollups: Tuple[str, ...] = ()  # rollups to refresh before querying
+
+
+def _run_report(query):
+    """
+    Run a report on its own pooled connection rather than the request's
+    (get_db): refreshing the rollups commits, which must not touch work an
+    earlier call left pending on the request connection.
+    """
+    conn = pool.connect()
+    try:
+        if query.rollups:
+            _refresh_rollups(conn, *query.rollups)
+        cur = conn.cursor()
+        cur.execute(query.sql, query.params)
+        results = cur.fetchall()
+        cur.close()
+    finally:
+        conn.close()
+    return [query.row(row) for row in results]
+
+
+def stream_report(query):
+    """
+    Yield the rows of a report one at a time, keeping memory flat however
+    large the result is.
+
+    Runs on its own pooled connection with an unbuffered cursor, fetching
+    EXPORT_BATCH_SIZE rows at a time: a streamed response is still being
+    sent after the request's connection has gone back to the pool.
+    """
+    conn = pool.connect()
+    cur = None
+    try:
+        if query.rollups:
+            _refresh_rollups(conn, *query.rollups)
+        cur = conn.cursor()
+        cur.execute(query.sql, query.params)
+        while True:
+            rows = cur.fetchmany(EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                yield query.row(row)
+    finally:
+        if cur is not None:
+            try:
+                cur.close()
+            except Exception:
+                pass  # unread rows of an aborted export; the pool consumes them
+        conn.close()
+
+
+def most_ordered_items_query(year: int, quarter: int):
+    start, end = resolve_period(year, quarter=quarter)
+    return ReportQuery(
+        """
+        SELECT p.product_name, SUM(r.order_lines) AS order_count
+        FROM rollup_sales_daily r
+        JOIN product p ON p.product_id = r.product_id
+        WHERE r.day >= %s AND r.day < %s
+        GROUP BY p.product_name
+        ORDER BY order_count DESC
+        """,
+        (start, end),
+        ("product_name", "order_count"),
+        lambda row: {"product_name": row[0], "order_count": int(row[1] or 0)},
+        ("sales",),
+    )
+
+
+@cached_report("most_ordered_items", tags=("sales",), period=lambda year, quarter: resolve_period(year, quarter=quarter))
 def get_most_ordered_items(year: int, quarter: int):
     """
     Get the most ordered items for a given year and quarter.
@@ -96,79 +324,67 @@ def get_most_ordered_items(year: int, quarter: int):
         List[Dict]: List of dictionaries with product names and order counts,
                     ordered by order count descending.
     """
-    conn = get_db()
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT p.product_name, COUNT(*) AS order_count
-        FROM orderitem oi
-        JOIN `order` o USING(order_id)
-        JOIN product p USING(product_id)
-        WHERE YEAR(o.order_date) = %s
-          AND QUARTER(o.order_date) = %s
-        GROUP BY p.product_name
-        ORDER BY order_count DESC
-    """, (year, quarter))
-
-    results = cur.fetchall()
-    cur.close()
-
-    most_ordered = []
-    for row in results:
-        product_name, order_count = row
-        most_ordered.append({
-            "product_name": product_name,
-            "order_count": order_count
-        })
-
-    return most_ordered
-
-
-
-
-
-
+    return _run_report(most_ordered_items_query(year, quarter))
 
 
+def quarterly_sales_query():
+    start, end = current_quarter()
+    return ReportQuery(
+        """
+        SELECT 
+            MONTH(day) AS month_num,
+            MONTHNAME(day) AS month,
+            SUM(total_price) AS total_sales,
+            SUM(order_count) AS order_count
+        FROM rollup_orders_daily
+        WHERE day >= %s AND day < %s
+        GROUP BY MONTH(day), MONTHNAME(day)
+        ORDER BY MONTH(day);
+        """,
+        (start, end),
+        ("month", "month_num", "total_sales", "order_count"),
+        lambda row: {
+            "month": row[1],
+            "month_num": row[0],
+            "total_sales": row[2] or 0,
+            "order_count": int(row[3] or 0)
+        },
+        ("sales",),
+    )
+
+
+@cached_report("quarterly_sales", tags=("sales",), period=lambda: current_quarter())
 def get_quarterly_sales_report():
     """
     Get quarterly sales report data.
     Returns:
     - List of dictionaries with month names, total sales, and order count (volume).
     """
-    conn = get_db()
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT 
-            MONTH(order_date) AS month_num,
-            MONTHNAME(order_date) AS month,
-            SUM(total_price) AS total_sales,
-            COUNT(*) AS order_count
-        FROM `order`
-        WHERE YEAR(order_date) = YEAR(CURDATE()) AND QUARTER(order_date) = QUARTER(CURDATE())
-        GROUP BY MONTH(order_date), MONTHNAME(order_date)
-        ORDER BY MONTH(order_date);
-    """)
-
-    results = cur.fetchall()
-    cur.close()
-    conn.close()
-
-    report = []
-    for row in results:
-        month_num, month, total_sales, order_count = row
-        report.append({
-            "month": month,
-            "month_num": month_num,
-            "total_sales": total_sales or 0,
-            "order_count": order_count or 0
-        })
-
-    return report
-
+    return _run_report(quarterly_sales_query())
 
 
+def city_wise_sales_query(year: int, quarter: int):
+    start, end = resolve_period(year, quarter=quarter)
+    return ReportQuery(
+        """
+        SELECT 
+            c.city_name AS city,
+            SUM(r.total_price) AS total_sales,
+            SUM(r.order_count) AS order_count
+        FROM rollup_orders_daily r
+        JOIN `city` c ON c.city_id = r.city_id
+        WHERE r.day >= %s AND r.day < %s
+        GROUP BY c.city_name
+        ORDER BY total_sales DESC;
+        """,
+        (start, end),
+        ("city", "total_sales", "order_count"),
+        lambda row: {"city": row[0], "total_sales": row[1] or 0, "order_count": int(row[2] or 0)},
+        ("sales",),
+    )
+
+
+@cached_report("city_wise_sales", tags=("sales",), period=lambda year, quarter: resolve_period(year, quarter=quarter))
 def get_city_wise_sales(year: int, quarter: int):
     """
     Get city-wise sales data for a given year and quarter.
@@ -180,40 +396,44 @@ def get_city_wise_sales(year: int, quarter: int):
     Returns:
         List[Dict]: Each dict contains 'city', 'total_sales', and 'order_count'.
     """
-    conn = get_db()
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT 
-    c.city_name AS city,
-    SUM(o.total_price) AS total_sales,
-    COUNT(*) AS order_count
-FROM `order` o
-JOIN `customeraddress` ca ON o.address_id = ca.address_id
-JOIN `city` c ON ca.city_id = c.city_id
-WHERE YEAR(o.order_date) = %s
-  AND QUARTER(o.order_date) = %s
-GROUP BY c.city_name
-ORDER BY total_sales DESC;
-    """, (year, quarter))
-
-    results = cur.fetchall()
-    cur.close()
-    conn.close()
-
-    report = []
-    for row in results:
-        city, total_sales, order_count = row
-        report.append({
-            "city": city,
-            "total_sales": total_sales or 0,
-            "order_count": order_count or 0
-        })
-
-    return report
-
+    return _run_report(city_wise_sales_query(year, quarter))
 
 
+def route_wise_query(year: int, quarter: int):
+    start, end = resolve_period(year, quarter=quarter)
+    return ReportQuery(
+        """
+        SELECT 
+            tr.route_id,
+            tr.area_name,
+            SUM(r.total_deliveries) AS total_deliveries,
+            SUM(r.delivered_count) AS delivered_count,
+            SUM(r.delayed_count) AS delayed_count,
+            ROUND(SUM(r.total_hours) / NULLIF(SUM(r.timed_deliveries), 0), 2) AS avg_delivery_hours,
+            ROUND(SUM(r.on_time_count) / SUM(r.total_deliveries) * 100, 2) AS on_time_percentage
+        FROM rollup_deliveries_daily r
+        JOIN truckroute tr ON r.route_id = tr.route_id
+        WHERE r.day >= %s AND r.day < %s
+        GROUP BY tr.route_id, tr.area_name
+        ORDER BY total_deliveries DESC;
+        """,
+        (start, end),
+        ("route_id", "area_name", "total_deliveries", "delivered_count", "delayed_count",
+         "avg_delivery_hours", "on_time_percentage"),
+        lambda row: {
+            "route_id": row[0],
+            "area_name": row[1],
+            "total_deliveries": int(row[2] or 0),
+            "delivered_count": int(row[3] or 0),
+            "delayed_count": int(row[4] or 0),
+            "avg_delivery_hours": row[5] or 0.0,
+            "on_time_percentage": row[6] or 0.0
+        },
+        ("deliveries",),
+    )
+
+
+@cached_report("route_wise", tags=("deliveries",), period=lambda year, quarter: resolve_period(year, quarter=quarter))
 def get_route_wise_report(year: int, quarter: int):
     """
     Get route-wise delivery performance for a given year and quarter.
@@ -226,60 +446,54 @@ def get_route_wise_report(year: int, quarter: int):
         List[Dict]: Each dict contains route_id, area_name, total_deliveries,
                     delivered_count, delayed_count, avg_delivery_hours, and on_time_percentage.
     """
-    conn = get_db()
-    cur = conn.cursor()
-
-    cur.execute("""
+    return _run_report(route_wise_query(year, quarter))
+
+
+def _driver_hours_row(row):
+    employee_name, role_name, total_deliveries, total_hours = row
+    total_deliveries = int(total_deliveries or 0)
+    total_hours = total_hours or 0
+    is_driver = (role_name or "").lower() == "driver"
+    return {
+        "driver_name": employee_name if is_driver else "",
+        "assistant_name": "" if is_driver else employee_name,
+        "total_deliveries": total_deliveries,
+        "total_hours": total_hours,
+        "avg_hours_per_delivery": round(total_hours / total_deliveries, 2) if total_deliveries else 0,
+    }
+
+
+def driver_hours_query(year: int, quarter: int):
+    start, end = resolve_period(year, quarter=quarter)
+    return ReportQuery(
+        """
         SELECT 
-            tr.route_id,
-            tr.area_name,
-            COUNT(td.delivery_id) AS total_deliveries,
-            SUM(CASE WHEN td.status = 'Delivered' THEN 1 ELSE 0 END) AS delivered_count,
-            SUM(CASE WHEN td.status = 'Delayed' THEN 1 ELSE 0 END) AS delayed_count,
-            ROUND(AVG(TIMESTAMPDIFF(HOUR, td.actual_departure, td.actual_arrival)), 2) AS avg_delivery_hours,
-            ROUND(
-                SUM(CASE 
-                        WHEN TIMESTAMPDIFF(HOUR, td.actual_departure, td.actual_arrival) <= tr.max_delivery_time
-                             AND td.status = 'Delivered'
-                        THEN 1 ELSE 0 END
-                    ) / COUNT(td.delivery_id) * 100, 
-                2
-            ) AS on_time_percentage
-        FROM truckdelivery td
-        JOIN truckroute tr ON td.route_id = tr.route_id
-        WHERE YEAR(td.scheduled_departure) = %s
-          AND QUARTER(td.scheduled_departure) = %s
-        GROUP BY tr.route_id, tr.area_name
-        ORDER BY total_deliveries DESC;
-    """, (year, quarter))
-
-    results = cur.fetchall()
-    cur.close()
-    conn.close()
-
-    report = []
-    for row in results:
-        (route_id, area_name, total_deliveries, delivered_count, 
-         delayed_count, avg_delivery_hours, on_time_percentage) = row
-
-        report.append({
-            "route_id": route_id,
-            "area_name": area_name,
-            "total_deliveries": total_deliveries or 0,
-            "delivered_count": delivered_count or 0,
-            "delayed_count": delayed_count or 0,
-            "avg_delivery_hours": avg_delivery_hours or 0.0,
-            "on_time_percentage": on_time_percentage or 0.0
-        })
-
-    return report
-
-
-
+            e.employee_name,
+            r.role_name,
+            SUM(h.assignment_count) AS total_deliveries,
+            SUM(h.assigned_hours) AS total_hours
+        FROM rollup_employee_hours_daily h
+        JOIN employee e ON h.employee_id = e.employee_id
+        JOIN roles r ON e.role_id = r.role_id
+        WHERE h.day >= %s AND h.day < %s
+        GROUP BY e.employee_id, e.employee_name, r.role_name
+        ORDER BY total_hours DESC;
+        """,
+        (start, end),
+        ("driver_name", "assistant_name", "total_deliveries", "total_hours", "avg_hours_per_delivery"),
+        _driver_hours_row,
+        ("hours",),
+    )
+
+
+@cached_report("driver_hours", tags=("hours",), period=lambda year, quarter: resolve_period(year, quarter=quarter))
 def get_driver_hours_report(year: int, quarter: int):
     """
     Returns driver and assistant working hours for a given year and quarter.
 
+    One row per employee; driver_name is set for drivers and
+    assistant_name for everyone else.
+
     Returns a list of dicts with:
         - driver_name
         - assistant_name
@@ -287,45 +501,38 @@ def get_driver_hours_report(year: int, quarter: int):
         - total_hours
         - avg_hours_per_delivery
     """
-    conn = get_db()
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT 
-    e.employee_id,
-    e.employee_name,
-    e.role_id,
-    SUM(tea.assigned_hours) AS total_hours,
-    COUNT(td.delivery_id) AS total_deliveries
-FROM truckemployeeassignment tea
-JOIN employee e ON tea.employee_id = e.employee_id
-JOIN truckdelivery td ON tea.truck_delivery_id = td.delivery_id
-WHERE YEAR(td.scheduled_departure) = %s
-  AND QUARTER(td.scheduled_departure) = %s
-GROUP BY e.employee_id
-ORDER BY total_hours DESC;
-
-    """, (year, quarter))
-
-    results = cur.fetchall()
-    cur.close()
-    conn.close()
-
-    report = []
-    for row in results:
-        driver_name, assistant_name, total_deliveries, total_hours, avg_hours = row
-        report.append({
-            "driver_name": driver_name,
-            "assistant_name": assistant_name,
-            "total_deliveries": total_deliveries or 0,
-            "total_hours": total_hours or 0,
-            "avg_hours_per_delivery":avg_hours or 0,
-        })
-    
-    return report
-
+    return _run_report(driver_hours_query(year, quarter))
 
 
+def truck_usage_query(year: int, month: int):
+    start, end = resolve_period(year, month=month)
+    return ReportQuery(
+        """
+        SELECT 
+            r.truck_id,
+            SUM(r.total_deliveries) AS total_deliveries,
+            SUM(r.total_hours) AS total_hours,
+            SUM(r.delivered_count) AS delivered_count,
+            SUM(r.delayed_count) AS delayed_count
+        FROM rollup_deliveries_daily r
+        WHERE r.day >= %s AND r.day < %s
+        GROUP BY r.truck_id
+        ORDER BY total_deliveries DESC;
+        """,
+        (start, end),
+        ("truck_id", "total_deliveries", "total_hours", "delivered_count", "delayed_count"),
+        lambda row: {
+            "truck_id": row[0],
+            "total_deliveries": int(row[1] or 0),
+            "total_hours": int(row[2] or 0),
+            "delivered_count": int(row[3] or 0),
+            "delayed_count": int(row[4] or 0)
+        },
+        ("deliveries",),
+    )
+
+
+@cached_report("truck_usage", tags=("deliveries",), period=lambda year, month: resolve_period(year, month=month))
 def get_truck_usage_report(year: int, month: int):
     """
     Get truck usage analysis for a given year and month.
@@ -337,51 +544,18 @@ def get_truck_usage_report(year: int, month: int):
     Returns:
         List[Dict]: Each dict contains truck_id, total_deliveries, total_hours, delivered_count, delayed_count
     """
-    conn = get_db()
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT 
-            td.truck_id,
-            COUNT(*) AS total_deliveries,
-            SUM(TIMESTAMPDIFF(HOUR, td.actual_departure, td.actual_arrival)) AS total_hours,
-            SUM(CASE WHEN td.status = 'Delivered' THEN 1 ELSE 0 END) AS delivered_count,
-            SUM(CASE WHEN td.status = 'Delayed' THEN 1 ELSE 0 END) AS delayed_count
-        FROM truckdelivery td
-        WHERE YEAR(td.scheduled_departure) = %s
-          AND MONTH(td.scheduled_departure) = %s
-        GROUP BY td.truck_id
-        ORDER BY total_deliveries DESC;
-    """, (year, month))
-
-    results = cur.fetchall()
-    cur.close()
-    conn.close()
-
-    report = []
-    for row in results:
-        truck_id, total_deliveries, total_hours, delivered_count, delayed_count = row
-        report.append({
-            "truck_id": truck_id,
-            "total_deliveries": total_deliveries or 0,
-            "total_hours": total_hours or 0,
-            "delivered_count": delivered_count or 0,
-            "delayed_count": delayed_count or 0
-        })
-
-    return report
+    return _run_report(truck_usage_query(year, month))
 
 
+_ORDER_HISTORY_COLUMNS = (
+    "order_id", "order_date", "total_price", "truck_id", "route_id",
+    "scheduled_departure", "actual_departure", "actual_arrival", "delivery_status",
+)
 
 
-def get_customer_order_history(customer_id: int):
-    """
-    Get all orders of a customer along with delivery details.
-    """
-    conn = get_db()
-    cur = conn.cursor()
-
-    cur.execute("""
+def customer_order_history_query(customer_id: int):
+    return ReportQuery(
+        """
         SELECT 
             o.order_id,
             o.order_date,
@@ -396,25 +570,16 @@ def get_customer_order_history(customer_id: int):
         LEFT JOIN truckdelivery td ON o.order_id = td.order_id
         WHERE o.customer_id = %s
         ORDER BY o.order_date DESC;
-    """, (customer_id,))
+        """,
+        (customer_id,),
+        _ORDER_HISTORY_COLUMNS,
+        lambda row: dict(zip(_ORDER_HISTORY_COLUMNS, row)),
+    )
 
-    results = cur.fetchall()
-    cur.close()
-    conn.close()
-
-    history = []
-    for row in results:
-        order_id, order_date, total_price, truck_id, route_id, sched_dep, actual_dep, actual_arrival, status = row
-        history.append({
-            "order_id": order_id,
-            "order_date": order_date,
-            "total_price": total_price,
-            "truck_id": truck_id,
-            "route_id": route_id,
-            "scheduled_departure": sched_dep,
-            "actual_departure": actual_dep,
-            "actual_arrival": actual_arrival,
-            "delivery_status": status
-        })
-    return history
 
+@cached_report("customer_order_history", tags=("sales", "deliveries"))
+def get_customer_order_history(customer_id: int):
+    """
+    Get all orders of a customer along with delivery details.
+    """
+    return _run_report(customer_order_history_query(customer_id))
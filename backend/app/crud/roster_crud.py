@@ -0,0 +1,295 @@
+import asyncio
+import os
+import time
+from bisect import bisect_left, bisect_right, insort
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
+
+import aiomysql
+from fastapi import HTTPException
+from app.core.async_database import acquire, fetch_all, transaction
+from app.core.cache import report_cache
+
+# ----- ROSTER CONFIG -----
+# rebuild a store's cached roster (used for availability reads) at least this
+# often, to pick up assignments written elsewhere (seconds, <= 0 disables);
+# writes always rebuild it under the store's database lock
+ROSTER_MAX_AGE = float(os.getenv("ROSTER_MAX_AGE", "300"))
+ROSTER_LOCK_TIMEOUT = int(os.getenv("ROSTER_LOCK_TIMEOUT", "10"))  # seconds to wait for a store's lock
+MIN_REST = timedelta(hours=4)  # between two departures of the same driver (see the trigger)
+
+
+def week_start(value):
+    """Sunday starting the week of value, as employee_week_hours keys it."""
+    day = value.date() if isinstance(value, datetime) else value
+    return day - timedelta(days=(day.weekday() + 1) % 7)
+
+
+class Timeline:
+    """One employee's upcoming departures (sorted) and assigned hours per week."""
+
+    def __init__(self, employee_id, employee_name, role_name, max_hours_week):
+        self.employee_id = employee_id
+        self.employee_name = employee_name
+        self.role_name = role_name
+        self.max_hours_week = max_hours_week
+        self.is_driver = role_name.lower() == "driver"
+        self.departures = []
+        self.week_hours = {}
+
+    def check(self, departure, hours):
+        """Reason the employee cannot take this departure, or None."""
+        if self.is_driver:
+            i = bisect_right(self.departures, departure - MIN_REST)
+            if i < len(self.departures) and self.departures[i] < departure + MIN_REST:
+                return "Driver cannot be assigned to consecutive deliveries without rest period."
+        total = self.week_hours.get(week_start(departure), 0) + hours
+        if total > self.max_hours_week:
+            return (f"Weekly hour limit exceeded for {self.role_name}. Max allowed: "
+                    f"{self.max_hours_week} hours. Currently assigned: {total}")
+        return None
+
+    def add(self, departure, hours):
+        insort(self.departures, departure)
+        week = week_start(departure)
+        self.week_hours[week] = self.week_hours.get(week, 0) + hours
+
+    def remove(self, departure, hours):
+        i = bisect_left(self.departures, departure)
+        if i < len(self.departures) and self.departures[i] == departure:
+            del self.departures[i]
+        week = week_start(departure)
+        self.week_hours[week] = self.week_hours.get(week, 0) - hours
+
+
+class Roster:
+    """
+    Crew of one store from the start of the current week on: a Timeline per
+    active employee. Answers "can X take a departure" in O(log n) without
+    touching the database; mutate it only while holding store_lock(store_id),
+    and validate writes against one loaded under that lock.
+    """
+
+    def __init__(self, store_id, since, employees):
+        self.store_id = store_id
+        self.since = since  # departures before this are not tracked
+        self.loaded_at = time.monotonic()
+        self.employees = employees
+
+    def check(self, employee_id, departure, hours):
+        timeline = self.employees.get(employee_id)
+        if timeline is None:
+            return f"Employee {employee_id} is not active at store {self.store_id}."
+        if departure < self.since + MIN_REST:
+            return "Departure is before the current roster week."
+        return timeline.check(departure, hours)
+
+    def add(self, employee_id, departure, hours):
+        self.employees[employee_id].add(departure, hours)
+
+    def remove(self, employee_id, departure, hours):
+        self.employees[employee_id].remove(departure, hours)
+
+
+_rosters = {}  # store_id -> Roster
+_locks = {}  # store_id -> asyncio.Lock queuing this process's roster writers
+
+
+def _local_lock(store_id):
+    lock = _locks.get(store_id)
+    if lock is None:
+        lock = _locks[store_id] = asyncio.Lock()
+    return lock
+
+
+@asynccontextmanager
+async def store_lock(store_id):
+    """
+    Serialize roster writes of a store across every API worker: callers in
+    this process queue on an asyncio.Lock, other workers on the MySQL named
+    lock roster:<store_id> (GET_LOCK, held on a connection of its own).
+    Another worker may have written since this process cached the roster,
+    so writers rebuild it (load_roster) once they hold the lock.
+    Raises 503 if the lock is not free within ROSTER_LOCK_TIMEOUT.
+    """
+    name = f"roster:{store_id}"
+    async with _local_lock(store_id):
+        async with acquire() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT GET_LOCK(%s, %s)", (name, ROSTER_LOCK_TIMEOUT))
+                (locked,) = await cur.fetchone()
+            if locked != 1:
+                raise HTTPException(
+                    status_code=503, detail=f"Crew of store {store_id} is being assigned elsewhere; retry shortly"
+                )
+            try:
+                yield
+            finally:
+                try:
+                    async with conn.cursor() as cur:
+                        await cur.execute("SELECT RELEASE_LOCK(%s)", (name,))
+                except aiomysql.Error:
+                    conn.close()  # a closed session releases its named locks
+
+
+async def load_roster(store_id):
+    """Build a store's roster: its active crew and their assignments since this week's start."""
+    since = datetime.combine(week_start(date.today()), datetime.min.time()) - MIN_REST
+    staff = await fetch_all(
+        """
+        SELECT e.employee_id, e.employee_name, r.role_name, r.max_hours_week
+        FROM employee e
+        JOIN roles r ON r.role_id = e.role_id
+        WHERE e.store_id = %s AND e.employee_status = 'Active'
+        """,
+        (store_id,),
+    )
+    employees = {
+        row["employee_id"]: Timeline(
+            row["employee_id"], row["employee_name"], row["role_name"], row["max_hours_week"]
+        )
+        for row in staff
+    }
+    # (employee_id, scheduled_departure) index range scan per employee
+    departures = await fetch_all(
+        """
+        SELECT tea.employee_id, tea.scheduled_departure
+        FROM truckemployeeassignment tea
+        JOIN employee e ON e.employee_id = tea.employee_id
+        WHERE e.store_id = %s AND tea.scheduled_departure >= %s
+        ORDER BY tea.employee_id, tea.scheduled_departure
+        """,
+        (store_id, since),
+    )
+    for row in departures:
+        timeline = employees.get(row["employee_id"])
+        if timeline is not None:
+            timeline.departures.append(row["scheduled_departure"])
+    weeks = await fetch_all(
+        """
+        SELECT w.employee_id, w.week_start, w.assigned_hours
+        FROM employee_week_hours w
+        JOIN employee e ON e.employee_id = w.employee_id
+        WHERE e.store_id = %s AND w.week_start >= %s
+        """,
+        (store_id, week_start(since)),
+    )
+    for row in weeks:
+        timeline = employees.get(row["employee_id"])
+        if timeline is not None:
+            timeline.week_hours[row["week_start"]] = row["assigned_hours"]
+    roster = Roster(store_id, since, employees)
+    _rosters[store_id] = roster
+    return roster
+
+
+async def get_roster(store_id):
+    """Cached roster of a store, rebuilt when dropped or older than ROSTER_MAX_AGE."""
+    roster = _rosters.get(store_id)
+    if roster is not None and (
+        ROSTER_MAX_AGE <= 0 or time.monotonic() - roster.loaded_at < ROSTER_MAX_AGE
+    ):
+        return roster
+    return await load_roster(store_id)
+
+
+def drop_roster(store_id):
+    """Forget a store's roster (e.g. after a failed write); the next use reloads it."""
+    _rosters.pop(store_id, None)
+
+
+async def insert_assignments(cursor, rows):
+    """
+    Write crew assignments with a single multi-row INSERT.
+    rows: dicts with employee_id, delivery_id, hours, scheduled_departure.
+    """
+    if not rows:
+        return
+    values = ", ".join(["(%s, %s, %s, %s)"] * len(rows))
+    params = []
+    for r in rows:
+        params.extend((r["employee_id"], r["delivery_id"], r["hours"], r["scheduled_departure"]))
+    await cursor.execute(
+        f"""
+        INSERT INTO truckemployeeassignment
+            (employee_id, truck_delivery_id, assigned_hours, scheduled_departure)
+        VALUES {values}
+        """,
+        params,
+    )
+
+
+async def get_availability(store_id, departure, hours):
+    """Every active employee of the store, with whether (and why not) they can take this departure."""
+    roster = await get_roster(store_id)
+    week = week_start(departure)
+    result = []
+    for t in roster.employees.values():
+        reason = roster.check(t.employee_id, departure, hours)
+        result.append({
+            "employee_id": t.employee_id,
+            "employee_name": t.employee_name,
+            "role": t.role_name,
+            "week_hours": t.week_hours.get(week, 0),
+            "max_hours_week": t.max_hours_week,
+            "available": reason is None,
+            "reason": reason,
+        })
+    return result
+
+
+async def assign_crew(store_id, assignments):
+    """
+    Validate crew assignments (dicts with employee_id, delivery_id, hours)
+    against the store's roster and write them all in one INSERT, or none:
+    any rejected row raises 409 with the reasons per row.
+    """
+    if not assignments:
+        return {"assigned": 0, "assignments": []}
+    delivery_ids = sorted({a["delivery_id"] for a in assignments})
+    placeholders = ", ".join(["%s"] * len(delivery_ids))
+    deliveries = {
+        row["delivery_id"]: row
+        for row in await fetch_all(
+            f"""
+            SELECT delivery_id, store_id, scheduled_departure
+            FROM truckdelivery WHERE delivery_id IN ({placeholders})
+            """,
+            delivery_ids,
+        )
+    }
+
+    async with store_lock(store_id):
+        roster = await load_roster(store_id)
+        rows, rejected = [], []
+        for a in assignments:
+            delivery = deliveries.get(a["delivery_id"])
+            if delivery is None or delivery["store_id"] != store_id:
+                reason = f"Delivery {a['delivery_id']} not found at store {store_id}."
+            else:
+                reason = roster.check(a["employee_id"], delivery["scheduled_departure"], a["hours"])
+            if reason is not None:
+                rejected.append({**a, "reason": reason})
+                continue
+            row = {**a, "scheduled_departure": delivery["scheduled_departure"]}
+            # tentatively on the roster, so later rows of the batch see it
+            roster.add(row["employee_id"], row["scheduled_departure"], row["hours"])
+            rows.append(row)
+
+        if rejected:
+            for row in rows:
+                roster.remove(row["employee_id"], row["scheduled_departure"], row["hours"])
+            raise HTTPException(status_code=409, detail={"rejected": rejected})
+
+        try:
+            async with transaction() as conn:
+                async with conn.cursor() as cursor:
+                    await insert_assignments(cursor, rows)
+        except aiomysql.Error as e:
+            # the roster now disagrees with the database (or a trigger saw
+            # something it did not): rebuild it on next use
+            drop_roster(store_id)
+            raise HTTPException(status_code=400, detail=f"MySQL Error: {str(e)}")
+
+    report_cache.invalidate("hours")
+    return {"assigned": len(rows), "assignments": rows}
@@ -0,0 +1,416 @@
+import os
+from datetime import date, datetime, time, timedelta
+
+import aiomysql
+from fastapi import HTTPException
+from app.core.async_database import transaction
+from app.core.cache import report_cache
+from app.core.catalog import get_catalog_async
+from app.core.events import delivery_events
+from app.crud.dashboard_crud import FINISHED_DELIVERY_STATUSES
+from app.crud.roster_crud import get_roster, load_roster, drop_roster, insert_assignments, store_lock, week_start
+
+# ----- SCHEDULER CONFIG -----
+SCHEDULE_DAY_START = int(os.getenv("SCHEDULE_DAY_START", "8"))  # first departure (hour)
+SCHEDULE_DAY_END = int(os.getenv("SCHEDULE_DAY_END", "20"))  # trucks back by (hour)
+SCHEDULE_SLOT_MINUTES = int(os.getenv("SCHEDULE_SLOT_MINUTES", "30"))  # departure granularity
+TRUCK_CAPACITY = float(os.getenv("TRUCK_CAPACITY", "100"))  # space units per trip; trucks have no capacity column
+LOCAL_SEARCH_ROUNDS = int(os.getenv("SCHEDULE_LOCAL_SEARCH_ROUNDS", "3"))
+
+
+# orders at the store: fully allocated, every allocation reached the store
+# before the end of the day, and no truck delivery yet
+READY_ORDERS_QUERY = """
+    SELECT o.order_id, o.required_date, o.total_space, ca.city_id,
+           MAX(ta.reached_date_time) AS ready_at
+    FROM `order` o
+    JOIN customeraddress ca ON ca.address_id = o.address_id
+    JOIN trainallocation ta
+      ON ta.order_id = o.order_id AND ta.status IN ('Allocated','Shipped','Delivered')
+    WHERE o.status <> 'Delivered'
+      AND NOT EXISTS (SELECT 1 FROM truckdelivery td WHERE td.order_id = o.order_id)
+    GROUP BY o.order_id, o.required_date, o.total_space, o.total_quantity, ca.city_id
+    HAVING MIN(ta.store_id) = %(store_id)s AND MAX(ta.store_id) = %(store_id)s
+       AND SUM(ta.reached_date_time IS NULL) = 0
+       AND MAX(ta.reached_date_time) < %(day_end)s
+       AND SUM(ta.allocated_qty) >= o.total_quantity
+"""
+
+
+def _day_bounds(day):
+    return (datetime.combine(day, time(SCHEDULE_DAY_START)),
+            datetime.combine(day, time(SCHEDULE_DAY_END)))
+
+
+def _overlaps(intervals, start, end):
+    return any(s < end and start < e for s, e in intervals)
+
+
+def build_trips(orders, stops, routes):
+    """
+    Group ready orders into truck trips.
+
+    Each order goes to one of the routes stopping at its city - the one
+    serving the most ready orders, so trips are shared - and each route's
+    orders are packed first-fit decreasing (earliest required_date, then
+    largest) into trips of at most TRUCK_CAPACITY space. Orders of a trip
+    are listed in stop_sequence order.
+
+    Returns (trips, unscheduled).
+    """
+    routes_by_city = {}
+    for s in stops:
+        if s["route_id"] in routes:
+            routes_by_city.setdefault(s["city_id"], []).append(s)
+    demand = {}
+    for o in orders:
+        for s in routes_by_city.get(o["city_id"], ()):
+            demand[s["route_id"]] = demand.get(s["route_id"], 0) + 1
+
+    by_route, unscheduled = {}, []
+    for o in orders:
+        candidates = routes_by_city.get(o["city_id"])
+        if not candidates:
+            unscheduled.append({"order_id": o["order_id"], "reason": "No truck route stops at the order's city"})
+            continue
+        if float(o["total_space"] or 0) > TRUCK_CAPACITY:
+            unscheduled.append({"order_id": o["order_id"], "reason": "Order does not fit on one truck"})
+            continue
+        stop = min(candidates, key=lambda s: (-demand[s["route_id"]], s["route_id"]))
+        by_route.setdefault(stop["route_id"], []).append({**o, "stop_sequence": stop["stop_sequence"]})
+
+    trips = []
+    for route_id in sorted(by_route):
+        route = routes[route_id]
+        route_trips = []
+        for o in sorted(by_route[route_id], key=lambda o: (o["required_date"], -float(o["total_space"] or 0), o["order_id"])):
+            space = float(o["total_space"] or 0)
+            trip = next((t for t in route_trips if t["space"] + space <= TRUCK_CAPACITY), None)
+            if trip is None:
+                trip = {"route_id": route_id, "hours": float(route["max_delivery_time"]),
+                        "orders": [], "space": 0.0, "ready_at": None, "due": o["required_date"]}
+                route_trips.append(trip)
+            trip["orders"].append(o)
+            trip["space"] += space
+            trip["due"] = min(trip["due"], o["required_date"])
+            if trip["ready_at"] is None or o["ready_at"] > trip["ready_at"]:
+                trip["ready_at"] = o["ready_at"]
+        for trip in route_trips:
+            trip["orders"].sort(key=lambda o: (o["stop_sequence"], o["order_id"]))
+        trips.extend(route_trips)
+    return trips, unscheduled
+
+
+def _slots(trip, day_start, day_end):
+    step = timedelta(minutes=SCHEDULE_SLOT_MINUTES)
+    duration = timedelta(hours=trip["hours"])
+    start = day_start
+    if trip["ready_at"] is not None and trip["ready_at"] > start:
+        start += -((day_start - trip["ready_at"]) // step) * step  # first slot after the goods arrive
+    while start + duration <= day_end:
+        yield start, start + duration
+        start += step
+
+
+def _pick_crew(candidates, roster, busy, departure, end, hours):
+    """Least loaded (this week) candidate the roster accepts and who is free for the trip."""
+    week = week_start(departure)
+    best = None
+    for employee_id in candidates:
+        if _overlaps(busy.get(employee_id, ()), departure, end):
+            continue
+        if roster.check(employee_id, departure, hours) is not None:
+            continue
+        load = roster.employees[employee_id].week_hours.get(week, 0)
+        if best is None or load < best[0]:
+            best = (load, employee_id)
+    return best and best[1]
+
+
+def assign_trips(trips, resources, roster, day):
+    """
+    Greedy pass: give each trip, in the given order, the earliest departure
+    slot with a free truck, driver and assistant. Crew are added to the
+    roster as they are assigned; the caller undoes them with remove_trips()
+    unless the plan is kept.
+
+    Returns (scheduled, unplaced).
+    """
+    day_start, day_end = _day_bounds(day)
+    truck_busy = {t: list(iv) for t, iv in resources["truck_busy"].items()}
+    crew_busy = {e: list(iv) for e, iv in resources["crew_busy"].items()}
+    scheduled, unplaced = [], []
+    for trip in trips:
+        placed = None
+        for departure, end in _slots(trip, day_start, day_end):
+            truck = next((t for t in resources["trucks"]
+                          if not _overlaps(truck_busy.get(t, ()), departure, end)), None)
+            if truck is None:
+                continue
+            driver = _pick_crew(resources["drivers"], roster, crew_busy, departure, end, trip["hours"])
+            if driver is None:
+                continue
+            assistant = _pick_crew(resources["assistants"], roster, crew_busy, departure, end, trip["hours"])
+            if assistant is None:
+                continue
+            placed = {**trip, "truck_id": truck, "driver_id": driver, "assistant_id": assistant,
+                      "scheduled_departure": departure, "expected_return": end}
+            truck_busy.setdefault(truck, []).append((departure, end))
+            for employee_id in (driver, assistant):
+                crew_busy.setdefault(employee_id, []).append((departure, end))
+                roster.add(employee_id, departure, trip["hours"])
+            break
+        if placed is None:
+            unplaced.append(trip)
+        else:
+            scheduled.append(placed)
+    return scheduled, unplaced
+
+
+def remove_trips(roster, scheduled):
+    for trip in scheduled:
+        for employee_id in (trip["driver_id"], trip["assistant_id"]):
+            roster.remove(employee_id, trip["scheduled_departure"], trip["hours"])
+
+
+def _score(scheduled, unplaced):
+    # fewest orders left behind, then fewest late orders, then earliest departures
+    missed = sum(len(t["orders"]) for t in unplaced)
+    late = sum(1 for t in scheduled for o in t["orders"]
+               if t["scheduled_departure"].date() > o["required_date"])
+    minutes = sum(t["scheduled_departure"].timestamp() for t in scheduled) / 60
+    return (missed, late, minutes)
+
+
+def plan_day(trips, resources, roster, day):
+    """
+    Schedule a whole day at once: a greedy pass in deadline order, then
+    local search over the trip order (move a left-out trip to the front,
+    swap neighbours), keeping any order the greedy pass scores better on.
+    The best plan's crew stay added to the roster.
+
+    Returns (scheduled, unplaced).
+    """
+    def evaluate(order):
+        scheduled, unplaced = assign_trips(order, resources, roster, day)
+        remove_trips(roster, scheduled)
+        return _score(scheduled, unplaced), unplaced
+
+    best = sorted(trips, key=lambda t: (t["due"], -t["hours"], t["route_id"]))
+    best_score, unplaced = evaluate(best)
+    for _ in range(LOCAL_SEARCH_ROUNDS):
+        improved = False
+        moves = [("front", t) for t in unplaced] + [("swap", i) for i in range(len(best) - 1)]
+        for kind, arg in moves:
+            if best_score[:2] == (0, 0):
+                break
+            if kind == "front":
+                candidate = [arg] + [t for t in best if t is not arg]
+            else:
+                candidate = list(best)
+                candidate[arg], candidate[arg + 1] = candidate[arg + 1], candidate[arg]
+            score, candidate_unplaced = evaluate(candidate)
+            if score < best_score:
+                best, best_score, unplaced = candidate, score, candidate_unplaced
+                improved = True
+        if not improved:
+            break
+    return assign_trips(best, resources, roster, day)
+
+
+async def _load_day(cursor, store_id, day, routes, lock):
+    """Ready orders, truck stops, trucks, crew and the trips already running that day."""
+    day_start, day_end = _day_bounds(day)
+    await cursor.execute(READY_ORDERS_QUERY, {"store_id": store_id, "day_end": day_end})
+    orders = await cursor.fetchall()
+    if lock and orders:
+        # serialize with other schedulers, then drop orders scheduled meanwhile;
+        # the re-check is a locking read, so it sees deliveries committed after
+        # this transaction's snapshot (READY_ORDERS_QUERY) was taken
+        ids = [o["order_id"] for o in orders]
+        placeholders = ", ".join(["%s"] * len(ids))
+        await cursor.execute(f"SELECT order_id FROM `order` WHERE order_id IN ({placeholders}) FOR UPDATE", ids)
+        await cursor.execute(f"SELECT order_id FROM truckdelivery WHERE order_id IN ({placeholders}) FOR SHARE", ids)
+        taken = {r["order_id"] for r in await cursor.fetchall()}
+        orders = [o for o in orders if o["order_id"] not in taken]
+
+    stops = []
+    cities = sorted({o["city_id"] for o in orders})
+    if cities:
+        placeholders = ", ".join(["%s"] * len(cities))
+        await cursor.execute(
+            f"SELECT route_id, city_id, stop_sequence FROM truckstopsat WHERE city_id IN ({placeholders})",
+            cities,
+        )
+        stops = await cursor.fetchall()
+
+    await cursor.execute(
+        "SELECT truck_id FROM truck WHERE store_id = %s AND is_available = 1 ORDER BY truck_id",
+        (store_id,),
+    )
+    trucks = [r["truck_id"] for r in await cursor.fetchall()]
+    await cursor.execute(
+        """
+        SELECT d.employee_id, 'driver' AS crew_role
+        FROM driver d JOIN employee e ON e.employee_id = d.employee_id
+        WHERE e.store_id = %s AND d.status <> 'On Leave'
+        UNION ALL
+        SELECT a.employee_id, 'assistant' AS crew_role
+        FROM assistant a JOIN employee e ON e.employee_id = a.employee_id
+        WHERE e.store_id = %s AND a.status <> 'On Leave'
+        ORDER BY employee_id
+        """,
+        (store_id, store_id),
+    )
+    crew = await cursor.fetchall()
+
+    longest = max((float(r["max_delivery_time"]) for r in routes.values()), default=0)
+    await cursor.execute(
+        """
+        SELECT td.truck_id, td.route_id, td.scheduled_departure, tea.employee_id
+        FROM truckdelivery td
+        LEFT JOIN truckemployeeassignment tea ON tea.truck_delivery_id = td.delivery_id
+        WHERE td.store_id = %s AND td.status NOT IN %s
+          AND td.scheduled_departure >= %s AND td.scheduled_departure < %s
+        """,
+        (store_id, FINISHED_DELIVERY_STATUSES, day_start - timedelta(hours=longest), day_end),
+    )
+    truck_busy, crew_busy = {}, {}
+    for r in await cursor.fetchall():
+        route = routes.get(r["route_id"])
+        interval = (r["scheduled_departure"],
+                    r["scheduled_departure"] + timedelta(hours=float(route["max_delivery_time"]) if route else 0))
+        truck_busy.setdefault(r["truck_id"], set()).add(interval)
+        if r["employee_id"] is not None:
+            crew_busy.setdefault(r["employee_id"], set()).add(interval)
+
+    resources = {
+        "trucks": trucks,
+        "drivers": [c["employee_id"] for c in crew if c["crew_role"] == "driver"],
+        "assistants": [c["employee_id"] for c in crew if c["crew_role"] == "assistant"],
+        "truck_busy": truck_busy,
+        "crew_busy": crew_busy,
+    }
+    return orders, stops, resources
+
+
+async def _insert_deliveries(cursor, store_id, scheduled):
+    """One truckdelivery row per order (multi-row INSERT); returns order_id -> delivery_id."""
+    rows = [(store_id, o["order_id"], t["route_id"], t["truck_id"], t["scheduled_departure"])
+            for t in scheduled for o in t["orders"]]
+    values = ", ".join(["(%s, %s, %s, %s, %s, 'Scheduled')"] * len(rows))
+    await cursor.execute(
+        f"""
+        INSERT INTO truckdelivery (store_id, order_id, route_id, truck_id, scheduled_departure, status)
+        VALUES {values}
+        """,
+        [v for row in rows for v in row],
+    )
+    order_ids = [row[1] for row in rows]
+    placeholders = ", ".join(["%s"] * len(order_ids))
+    await cursor.execute(
+        f"SELECT delivery_id, order_id FROM truckdelivery WHERE order_id IN ({placeholders})",
+        order_ids,
+    )
+    return {r["order_id"]: r["delivery_id"] for r in await cursor.fetchall()}
+
+
+def _trip_summary(trip, catalog, delivery_ids=None):
+    route = catalog.routes.get(trip["route_id"]) or {}
+    summary = {
+        "route_id": trip["route_id"],
+        "area_name": route.get("area_name"),
+        "hours": trip["hours"],
+        "space": trip["space"],
+        "order_ids": [o["order_id"] for o in trip["orders"]],
+        "stops": [catalog.city_name(o["city_id"]) for o in trip["orders"]],
+    }
+    if "truck_id" in trip:
+        summary.update({
+            "truck_id": trip["truck_id"],
+            "driver_id": trip["driver_id"],
+            "assistant_id": trip["assistant_id"],
+            "scheduled_departure": trip["scheduled_departure"],
+            "expected_return": trip["expected_return"],
+        })
+    if delivery_ids is not None:
+        summary["delivery_ids"] = [delivery_ids[o["order_id"]] for o in trip["orders"]]
+    return summary
+
+
+async def schedule_deliveries(store_id: int, day: date = None, dry_run: bool = True):
+    """
+    Plan (and unless dry_run, write) the truck deliveries of one store for
+    one day: ready orders are grouped into route trips and every trip gets
+    a departure, a truck, a driver and an assistant within the roster rules.
+
+    In commit mode one truckdelivery row is written per order, and the crew
+    is recorded on the first delivery of each trip (the trip shares its
+    truck and departure, and the rest-period trigger allows a driver one
+    assignment per departure).
+    """
+    day = day or date.today() + timedelta(days=1)
+    if day < date.today():
+        raise HTTPException(status_code=400, detail="Cannot schedule a day in the past")
+
+    catalog = await get_catalog_async()
+    async with store_lock(store_id):
+        # a plan that is written is checked against the crew as stored now
+        roster = await (get_roster(store_id) if dry_run else load_roster(store_id))
+        delivery_ids = None
+        try:
+            async with transaction() as conn:
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    orders, stops, resources = await _load_day(
+                        cursor, store_id, day, catalog.routes, lock=not dry_run
+                    )
+                    trips, unscheduled = build_trips(orders, stops, catalog.routes)
+                    scheduled, unplaced = plan_day(trips, resources, roster, day)
+                    if dry_run:
+                        remove_trips(roster, scheduled)
+                    elif scheduled:
+                        delivery_ids = await _insert_deliveries(cursor, store_id, scheduled)
+                        await insert_assignments(cursor, [
+                            {"employee_id": employee_id,
+                             "delivery_id": delivery_ids[t["orders"][0]["order_id"]],
+                             "hours": t["hours"],
+                             "scheduled_departure": t["scheduled_departure"]}
+                            for t in scheduled
+                            for employee_id in (t["driver_id"], t["assistant_id"])
+                        ])
+        except aiomysql.IntegrityError as e:
+            # uq_delivery_order: another scheduler wrote one of these orders first
+            drop_roster(store_id)
+            raise HTTPException(status_code=409, detail=f"Orders were scheduled concurrently: {e}")
+        except aiomysql.Error as e:
+            drop_roster(store_id)  # holds the crew of a plan that was not written
+            raise HTTPException(status_code=500, detail=str(e))
+
+    for trip in unplaced:
+        unscheduled.extend({"order_id": o["order_id"], "reason": "No truck or crew free for the route that day"}
+                           for o in trip["orders"])
+
+    if delivery_ids:
+        report_cache.invalidate("deliveries", "hours")
+        for trip in scheduled:
+            for o in trip["orders"]:
+                delivery_events.publish({
+                    "change": "scheduled",
+                    "delivery_id": delivery_ids[o["order_id"]],
+                    "store_id": store_id,
+                    "order_id": o["order_id"],
+                    "route_id": trip["route_id"],
+                    "truck_id": trip["truck_id"],
+                    "scheduled_departure": trip["scheduled_departure"],
+                    "actual_departure": None,
+                    "actual_arrival": None,
+                    "status": "Scheduled",
+                })
+
+    return {
+        "dry_run": dry_run,
+        "date": day,
+        "trips": [_trip_summary(t, catalog, delivery_ids) for t in scheduled],
+        "unscheduled": unscheduled,
+        "scheduled_orders": sum(len(t["orders"]) for t in scheduled),
+    }
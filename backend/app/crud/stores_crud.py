@@ -1,12 +1,10 @@
 from fastapi import HTTPException
+from app.core.catalog import invalidate_catalog
 from app.core.database import get_db
 from app.models.store_models import StoreCreate
 
 
 def create_store(store: StoreCreate, user_role: str):
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-    
     # Validate user role (only admins can create stores)
     if user_role != "admin":
         raise HTTPException(status_code=403, detail="Only admins can create stores")
@@ -22,7 +20,10 @@ def create_store(store: StoreCreate, user_role: str):
     # Validate city_id is positive
     if store.city_id <= 0:
         raise HTTPException(status_code=400, detail="City ID must be a positive integer")
-    
+
+    conn = get_db()
+    cursor = conn.cursor(dictionary=True)
+
     try:
         # Insert new store
         query = """
@@ -31,6 +32,7 @@ def create_store(store: StoreCreate, user_role: str):
         """
         cursor.execute(query, (store.store_name, store.contact_number, store.city_id))
         conn.commit()
+        invalidate_catalog()
         
         # Fetch the inserted store
         store_id = cursor.lastrowid
@@ -49,13 +51,13 @@ def create_store(store: StoreCreate, user_role: str):
 
 
 def get_all_stores(user_role: str):
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-    
     # Validate user role (only admins can retrieve stores)
     if user_role != "admin":
         raise HTTPException(status_code=403, detail="Only admins can view stores")
-    
+
+    conn = get_db()
+    cursor = conn.cursor(dictionary=True)
+
     try:
         # Fetch all stores
         query = """
@@ -1,25 +1,14 @@
-import mysql.connector
-from dotenv import load_dotenv
-from datetime import datetime
-import os
-
-load_dotenv()
-
-def get_db():
-    return mysql.connector.connect(
-        host=os.getenv("DB_HOST", "localhost"),
-        user=os.getenv("DB_USER", "root"),
-        password=os.getenv("DB_PASS", ""),
-        database=os.getenv("DB_NAME", "kandypacklogistics"),
-    )
-
-def get_train_schedules():
+from datetime import date, datetime, timedelta
+from app.core.database import get_db
+from app.core.async_database import fetch_all
+
+async def get_train_schedules():
     """
     Return trains from today up to 14 days ahead.
     Includes is_cancelled flag and utilization as before.
+    Utilization comes from the maintained Train.utilized_space ledger, so this
+    is a plain range scan on idx_train_departure.
     """
-    db = get_db()
-    cursor = db.cursor(dictionary=True)
     query = """
 SELECT 
     t.train_id,
@@ -28,23 +17,16 @@ SELECT
     TIME_FORMAT(t.departure_date_time, '%H:%i:%s') AS departure,
     TIME_FORMAT(t.arrival_date_time,   '%H:%i:%s') AS arrival,
     t.capacity_space AS capacity,
-    COALESCE(SUM(ta.allocated_qty * p.unit_space), 0) AS utilized,
+    t.utilized_space AS utilized,
     t.status,
     CASE WHEN t.status = 'cancelled' THEN TRUE ELSE FALSE END AS is_cancelled,
     DATE_FORMAT(t.departure_date_time, '%Y-%m-%d') AS nextDeparture
 FROM Train t
-LEFT JOIN TrainAllocation ta ON t.train_id = ta.train_id
-LEFT JOIN Product p          ON ta.product_id = p.product_id
 WHERE t.departure_date_time >= CURDATE()
   AND t.departure_date_time < DATE_ADD(CURDATE(), INTERVAL 14 DAY)
-GROUP BY t.train_id, t.start_station, t.destination_station, t.departure_date_time, t.arrival_date_time, t.capacity_space, t.status
 ORDER BY t.departure_date_time;
 """
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    cursor.close()
-    db.close()
-    return rows
+    return await fetch_all(query)
 
 def create_train(train: dict) -> int:
     db = get_db()
@@ -185,24 +167,144 @@ def get_train_allocations(train_id: int):
         cursor.close()
         db.close()
 
-def generate_horizon(days_ahead: int = 14) -> int:
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+
+def parse_frequency_days(frequency_days) -> int:
+    """
+    Weekday bitmask of a TrainTemplate.frequency_days value such as
+    'Monday,Wednesday' (bit 0 = Monday, as date.weekday()).
+    Unknown names are ignored, like FIND_IN_SET in the old procedure.
+    """
+    mask = 0
+    for name in (frequency_days or "").split(","):
+        name = name.strip().lower()
+        if name in WEEKDAYS:
+            mask |= 1 << WEEKDAYS.index(name)
+    return mask
+
+
+def plan_horizon(templates, existing, start: date, days_ahead: int):
+    """
+    Expand templates over [start, start + days_ahead) and return the Train
+    rows (as INSERT tuples) whose (template_id, date) is not in existing.
+    """
+    days = [start + timedelta(days=d) for d in range(days_ahead)]
+    rows = []
+    for t in templates:
+        mask = parse_frequency_days(t["frequency_days"])
+        for day in days:
+            if not mask >> day.weekday() & 1 or (t["template_id"], day) in existing:
+                continue
+            rows.append((
+                t["train_name"],
+                t["start_station"],
+                t["destination_station"],
+                datetime.combine(day, datetime.min.time()) + t["departure_time"],
+                datetime.combine(day, datetime.min.time()) + t["arrival_time"],
+                t["capacity_space"],
+                t["status"],
+                t["template_id"],
+            ))
+    return rows
+
+
+def generate_horizon(days_ahead: int = 14) -> dict:
     """
-    Call the stored procedure to populate Train from TrainTemplate.
-    Returns number of rows in Train for the horizon (optional sanity).
+    Populate Train from TrainTemplate for today and the next days_ahead - 1
+    days: templates are expanded in memory, diffed against the trains
+    already in the window (one range scan on idx_train_departure) and only
+    the missing trains are written, in one multi-row INSERT.
+    Returns the number of trains inserted and the trains now in the window.
     """
     db = get_db()
-    cursor = db.cursor()
+    cursor = db.cursor(dictionary=True)
     try:
-        cursor.callproc('sp_populate_trains_for_next_n_days', (days_ahead,))
+        start = date.today()
+        end = start + timedelta(days=days_ahead)
+        cursor.execute("""
+            SELECT template_id, train_name, start_station, destination_station,
+                   departure_time, arrival_time, capacity_space, status, frequency_days
+            FROM TrainTemplate
+        """)
+        templates = cursor.fetchall()
+        cursor.execute("""
+            SELECT template_id, departure_date_time
+            FROM Train
+            WHERE departure_date_time >= %s AND departure_date_time < %s
+        """, (start, end))
+        window = cursor.fetchall()
+        existing = {(r["template_id"], r["departure_date_time"].date())
+                    for r in window if r["template_id"] is not None}
+
+        rows = plan_horizon(templates, existing, start, days_ahead)
+        if rows:
+            values = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s)"] * len(rows))
+            cursor.execute(f"""
+                INSERT INTO Train (train_name, start_station, destination_station,
+                                   departure_date_time, arrival_date_time,
+                                   capacity_space, status, template_id)
+                VALUES {values}
+            """, [v for row in rows for v in row])
         db.commit()
-        # optional sanity count
+        return {"inserted": len(rows), "window_rows": len(window) + len(rows)}
+    finally:
+        cursor.close()
+        db.close()
+
+
+UTILIZATION_DRIFT_QUERY = """
+    SELECT
+        t.train_id,
+        t.utilized_space AS recorded,
+        COALESCE(a.utilized, 0) AS actual
+    FROM Train t
+    LEFT JOIN (
+        SELECT train_id, SUM(allocated_qty * unit_space) AS utilized
+        FROM TrainAllocation
+        WHERE status <> 'Cancelled'
+        GROUP BY train_id
+    ) a ON a.train_id = t.train_id
+    WHERE ABS(t.utilized_space - COALESCE(a.utilized, 0)) > 1e-6
+"""
+
+
+def verify_utilization():
+    """
+    Compare the maintained Train.utilized_space ledger with TrainAllocation.
+    Returns the trains whose recorded figure has drifted.
+    """
+    db = get_db()
+    cursor = db.cursor(dictionary=True)
+    try:
+        cursor.execute(UTILIZATION_DRIFT_QUERY)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        db.close()
+
+
+def rebuild_utilization() -> int:
+    """
+    Recompute Train.utilized_space from TrainAllocation.
+    Returns the number of trains that were corrected.
+    """
+    db = get_db()
+    cursor = db.cursor()
+    try:
         cursor.execute("""
-          SELECT COUNT(*) FROM Train
-          WHERE departure_date_time >= CURDATE()
-            AND departure_date_time < DATE_ADD(CURDATE(), INTERVAL %s DAY)
-        """, (days_ahead,))
-        cnt = cursor.fetchone()[0]
-        return cnt
+            UPDATE Train t
+            LEFT JOIN (
+                SELECT train_id, SUM(allocated_qty * unit_space) AS utilized
+                FROM TrainAllocation
+                WHERE status <> 'Cancelled'
+                GROUP BY train_id
+            ) a ON a.train_id = t.train_id
+            SET t.utilized_space = COALESCE(a.utilized, 0)
+            WHERE ABS(t.utilized_space - COALESCE(a.utilized, 0)) > 1e-6
+        """)
+        db.commit()
+        return cursor.rowcount
     finally:
         cursor.close()
         db.close()
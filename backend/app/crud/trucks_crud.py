@@ -6,9 +6,6 @@ from app.models.truck_models import TruckCreate
 
 
 def create_truck(truck: TruckCreate, user_store_id: int, role: str):
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-    
     # Validate store_id matches user's store_id
     if  role != "admin" and truck.store_id != user_store_id:
         raise HTTPException(status_code=403, detail="Cannot create truck for a different store")
@@ -16,7 +13,10 @@ def create_truck(truck: TruckCreate, user_store_id: int, role: str):
     # Validate plate number length
     if len(truck.plate_number) > 10:
         raise HTTPException(status_code=400, detail="Plate number must be 10 characters or less")
-    
+
+    conn = get_db()
+    cursor = conn.cursor(dictionary=True)
+
     try:
         # Insert new truck
         query = """
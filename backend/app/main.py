@@ -1,11 +1,40 @@
-from fastapi import FastAPI
-from app.routers import orders, trains, reports,products, employees, auth, drivers, trucks, stores, cities, customers1, customers, customertypes, dashbord, truck_delivery
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends
+from app.routers import orders, trains, reports,products, employees, auth, drivers, trucks, stores, cities, customers1, customers, customertypes, dashbord, truck_delivery, allocations, roster, complete_deliveries
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
+from app.core.database import db_session, get_pool_stats
+from app.core.async_database import close_async_pool, get_async_pool_stats
+from app.core.catalog import load_catalog
+from app.core.events import delivery_events
+from app.core.security import shutdown_hash_executor
+from app.reports.jobs import shutdown_pdf_executor
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    delivery_events.bind_loop(asyncio.get_running_loop())
+    try:
+        await run_in_threadpool(load_catalog)
+    except Exception as e:
+        # not fatal: the catalog is loaded on first use instead
+        logger.warning("Reference catalog not loaded at startup: %s", e)
+    yield
+    shutdown_pdf_executor()
+    shutdown_hash_executor()
+    await close_async_pool()
+
 
 app = FastAPI (
     title="Kandypack Logistics Backend",
     description="Rail and road supply chain distribution system",
-    version='1.0.0' 
+    version='1.0.0',
+    dependencies=[Depends(db_session)],  # one pooled connection per request
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -14,6 +43,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allow all HTTP methods (GET, POST, etc.)
     allow_headers=["*"],  # Allow all headers
+    expose_headers=["X-Next-Cursor"],  # order list pagination
 )
 
 #register routers
@@ -32,6 +62,9 @@ app.include_router(products.router, tags=["products"])
 app.include_router(customertypes.router, tags=["customertypes"])
 app.include_router(dashbord.router,tags=["dashboard"])
 app.include_router(truck_delivery.router, tags=["truck_delivery"])
+app.include_router(allocations.router, tags=["allocations"])
+app.include_router(roster.router, tags=["roster"])
+app.include_router(complete_deliveries.router, tags=["truck_delivery"])
 
 app.add_middleware(
     CORSMiddleware,
@@ -39,6 +72,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
@@ -49,3 +83,9 @@ def root():
     }
 
 
+@app.get("/health/db")
+def db_pool_stats():
+    """
+    Connection pool counters for monitoring.
+    """
+    return {**get_pool_stats(), "async": get_async_pool_stats()}
@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+from typing import Optional
+
+
+class AutoAllocationRequest(BaseModel):
+    dry_run: bool = True  # return the plan without writing it
+    horizon_days: int = 14  # same window as GET /trains/
+    order_id: Optional[int] = None  # limit planning to one order
@@ -1,8 +1,25 @@
 
-from pydantic import BaseModel
-from datetime import datetime
+from pydantic import BaseModel, Field
+from datetime import date, datetime
+from typing import List, Literal, Optional
 
 class DeliveryCompletionRequest(BaseModel):
     delivery_id: int
     actual_arrival_datetime: datetime
-    status: str = "Delivered"
\ No newline at end of file
+    status: str = "Delivered"
+
+
+class DeliveryScheduleRequest(BaseModel):
+    store_id: int
+    delivery_date: Optional[date] = None  # day to schedule; tomorrow when omitted
+    dry_run: bool = True  # return the plan without writing it
+
+
+class DeliveryFinishItem(BaseModel):
+    delivery_id: int
+    actual_arrival: Optional[datetime] = None  # now when omitted
+    status: Literal["Delivered", "Delayed"] = "Delivered"
+
+
+class DeliveryFinishRequest(BaseModel):
+    deliveries: List[DeliveryFinishItem] = Field(min_length=1)
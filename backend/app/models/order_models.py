@@ -39,3 +39,17 @@ class TrainAllocationRequest(BaseModel):
     allocated_qty: int
     store_id: int
     unit_space: Optional[float] = None
+
+class BulkOrderItem(BaseModel):
+    product_id: int
+    quantity: int
+
+class BulkOrderCreate(BaseModel):
+    # prices, quantities and space are computed server-side from Product
+    order_ref: Optional[str] = None  # caller's reference, echoed back in the result
+    customer_id: int
+    address_id: Optional[int] = None
+    order_date: str
+    required_date: str
+    status: str = "Pending"
+    items: List[BulkOrderItem]
@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+
+class CrewAssignment(BaseModel):
+    employee_id: int
+    delivery_id: int
+    hours: float = Field(gt=0)
+
+
+class CrewAssignmentRequest(BaseModel):
+    store_id: int
+    assignments: List[CrewAssignment]
@@ -0,0 +1,230 @@
+# app/reports/engine.py
+"""
+Declarative PDF report engine.
+
+A report is a ReportSpec: a title, a few meta lines and a list of blocks
+(Cards, TableBlock, BarChartBlock). Stylesheets, table styles and the page
+template callback are built once at import, so rendering a report only
+costs laying out its data.
+"""
+from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
+from typing import Any, Callable, NamedTuple, Optional, Sequence, Tuple, Union
+
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.shapes import Drawing, String
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_LEFT
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.platypus import (
+    Flowable, Frame, PageTemplate, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+)
+
+# ----- shared look, built once -----
+GREEN = "#4CAF50"
+BLUE = "#1976D2"
+PAGE_WIDTH, PAGE_HEIGHT = A4
+MARGINS = {"rightMargin": 50, "leftMargin": 60, "topMargin": 60, "bottomMargin": 50}
+
+STYLES = getSampleStyleSheet()
+STYLES["Title"].alignment = TA_LEFT
+STYLES["Normal"].alignment = TA_LEFT
+SUBHEADING = ParagraphStyle(
+    name="SubHeading",
+    fontName="Helvetica-Bold",
+    fontSize=13,
+    leading=16,
+    textColor=colors.HexColor("#2E4053"),
+    alignment=TA_LEFT,
+    spaceAfter=6,
+)
+ROW_BACKGROUNDS = [colors.whitesmoke, colors.HexColor("#f2f2f2")]
+CARDS_STYLE = TableStyle([
+    ("LEFTPADDING", (0, 0), (-1, -1), 0),
+    ("RIGHTPADDING", (0, 0), (-1, -1), 0),
+    ("VALIGN", (0, 0), (-1, -1), "TOP"),
+])
+
+
+def _page_background(canvas, doc):
+    """Light background with a grey border on every page."""
+    canvas.saveState()
+    canvas.setFillColor(colors.HexColor("#f7f9fc"))
+    canvas.rect(0, 0, PAGE_WIDTH, PAGE_HEIGHT, fill=1, stroke=0)
+    canvas.setStrokeColor(colors.HexColor("#b0b0b0"))
+    canvas.setLineWidth(2)
+    margin = 25
+    canvas.rect(margin, margin, PAGE_WIDTH - 2 * margin, PAGE_HEIGHT - 2 * margin, fill=0, stroke=1)
+    canvas.restoreState()
+
+
+@lru_cache(maxsize=None)
+def _table_style(header_color, font_size, align):
+    return TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor(header_color)),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("ALIGN", (0, 0), (-1, -1), align),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("FONTNAME", (0, 1), (-1, -1), "Helvetica"),
+        ("FONTSIZE", (0, 0), (-1, -1), font_size),
+        ("BOTTOMPADDING", (0, 0), (-1, 0), 8),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), ROW_BACKGROUNDS),
+    ])
+
+
+class Card(Flowable):
+    """Rounded, coloured box with one line of bold text."""
+
+    def __init__(self, text, width=8*cm, height=3*cm, bg_color=colors.lightblue):
+        super().__init__()
+        self.text = text
+        self.width = width
+        self.height = height
+        self.bg_color = bg_color
+
+    def draw(self):
+        self.canv.setFillColor(self.bg_color)
+        self.canv.roundRect(0, 0, self.width, self.height, radius=10, fill=1, stroke=0)
+        self.canv.setFillColor(colors.black)
+        self.canv.setFont("Helvetica-Bold", 12)
+        self.canv.drawString(10, self.height / 2, self.text)
+
+
+# ----- spec -----
+class Cards(NamedTuple):
+    title: Optional[str]
+    cards: Sequence[Tuple[str, str]]  # (text, background hex colour)
+    width: float = 8*cm
+    gap: float = 0.5*cm
+
+
+class Column(NamedTuple):
+    header: str
+    value: Union[str, int, Callable[[Any], Any]]  # row key/index or function of the row
+    width: float  # points, or a fraction (<= 1) of the frame width
+
+
+class TableBlock(NamedTuple):
+    title: Optional[str]
+    columns: Sequence[Column]
+    rows: Sequence[Any]
+    header_color: str = GREEN
+    font_size: int = 10
+    align: str = "LEFT"
+    empty_text: Optional[str] = None  # shown instead of an empty table
+
+
+class BarChartBlock(NamedTuple):
+    title: Optional[str]
+    categories: Sequence[str]
+    series: Sequence[Sequence[float]]
+    colors: Sequence[str]
+    legend: Sequence[str] = ()
+    value_max: Optional[float] = None  # default: 1.2 x the largest value
+    value_step: Optional[float] = None
+    width: float = 300
+    bar_width: float = 15
+
+
+class ReportSpec(NamedTuple):
+    title: str
+    meta: Sequence[str]  # lines under the title, after "Generated on"
+    blocks: Sequence[Any]
+
+
+# ----- rendering -----
+def _title(text):
+    return [Paragraph(text, SUBHEADING), Spacer(1, 0.2*cm)] if text else []
+
+
+def _cell(column, row):
+    if callable(column.value):
+        value = column.value(row)
+    elif isinstance(column.value, int):
+        value = row[column.value]
+    else:
+        value = row.get(column.value)
+    return "" if value is None else str(value)
+
+
+def _cards(block, frame_width):
+    row, widths = [], []
+    for i, (text, color) in enumerate(block.cards):
+        if i:
+            row.append(None)
+            widths.append(block.gap)
+        row.append(Card(text, width=block.width, bg_color=colors.HexColor(color)))
+        widths.append(block.width)
+    table = Table([row], colWidths=widths, hAlign="LEFT")
+    table.setStyle(CARDS_STYLE)
+    return _title(block.title) + [table, Spacer(1, 0.5*cm)]
+
+
+def _table(block, frame_width):
+    flowables = _title(block.title)
+    if not block.rows and block.empty_text:
+        return flowables + [Paragraph(block.empty_text, STYLES["Normal"]), Spacer(1, 0.5*cm)]
+    data = [[c.header for c in block.columns]]
+    data += [[_cell(c, row) for c in block.columns] for row in block.rows]
+    widths = [c.width * frame_width if c.width <= 1 else c.width for c in block.columns]
+    table = Table(data, colWidths=widths, hAlign="LEFT", repeatRows=1)
+    table.setStyle(_table_style(block.header_color, block.font_size, block.align))
+    return flowables + [table, Spacer(1, 0.5*cm)]
+
+
+def _bar_chart(block, frame_width):
+    if not block.categories:
+        return []
+    drawing = Drawing(400, 200)
+    chart = VerticalBarChart()
+    chart.x = 0
+    chart.y = 20
+    chart.height = 150
+    chart.width = block.width
+    chart.data = [[float(v or 0) for v in series] for series in block.series]
+    chart.categoryAxis.categoryNames = [str(c) for c in block.categories]
+    chart.categoryAxis.labels.fontSize = 8
+    chart.valueAxis.labels.fontSize = 8
+    chart.barWidth = block.bar_width
+    chart.groupSpacing = 10
+    chart.barSpacing = 5
+    chart.valueAxis.valueMin = 0
+    largest = max((v for series in chart.data for v in series), default=0)
+    chart.valueAxis.valueMax = block.value_max or (largest * 1.2 or 1)
+    if block.value_step:
+        chart.valueAxis.valueStep = block.value_step
+    for i, color in enumerate(block.colors):
+        chart.bars[i].fillColor = colors.HexColor(color)
+    for i, label in enumerate(block.legend):
+        drawing.add(String(150 * i, 180, label, fontSize=10))
+    drawing.add(chart)
+    return _title(block.title) + [drawing, Spacer(1, 0.5*cm)]
+
+
+_BLOCK_RENDERERS = {Cards: _cards, TableBlock: _table, BarChartBlock: _bar_chart}
+
+
+def build_pdf(spec: ReportSpec) -> bytes:
+    """Lay out a ReportSpec on A4 pages and return the PDF bytes."""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, **MARGINS)
+    frame = Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height, id="normal")
+    doc.addPageTemplates([PageTemplate(id="bordered", frames=[frame], onPage=_page_background)])
+
+    elements = [
+        Paragraph(f"<b>{spec.title}</b>", STYLES["Title"]),
+        Spacer(1, 0.2*cm),
+        Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M')}", STYLES["Normal"]),
+    ]
+    elements += [Paragraph(line, STYLES["Normal"]) for line in spec.meta]
+    elements.append(Spacer(1, 0.5*cm))
+    for block in spec.blocks:
+        elements += _BLOCK_RENDERERS[type(block)](block, doc.width)
+
+    doc.build(elements)
+    return buffer.getvalue()
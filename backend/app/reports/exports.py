@@ -0,0 +1,76 @@
+# app/reports/exports.py
+"""
+CSV / NDJSON exports of the /reports endpoints.
+Rows come from reports_crud.stream_report and are written out as they are
+fetched, so an export of any size is sent with flat memory.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.crud.reports_crud import stream_report
+
+EXPORT_FORMATS = ("csv", "ndjson")
+CHUNK_SIZE = 64 * 1024  # bytes buffered before a chunk is sent
+
+_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def _json_default(value):
+    # same representation as the JSON endpoints
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    return str(value)
+
+
+def _csv_chunks(query):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(query.columns)
+    for row in stream_report(query):
+        writer.writerow([row[c] for c in query.columns])
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _ndjson_chunks(query):
+    lines = []
+    size = 0
+    for row in stream_report(query):
+        line = json.dumps(row, default=_json_default) + "\n"
+        lines.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield "".join(lines)
+            lines, size = [], 0
+    if lines:
+        yield "".join(lines)
+
+
+def export_response(name, fmt, query_builder, *args):
+    """
+    Stream the report built by query_builder(*args) as a csv or ndjson
+    download named `name`.
+    """
+    try:
+        query = query_builder(*args)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    chunks = _csv_chunks(query) if fmt == "csv" else _ndjson_chunks(query)
+    return StreamingResponse(
+        chunks,
+        media_type=_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'},
+    )
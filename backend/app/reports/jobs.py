@@ -0,0 +1,259 @@
+# app/reports/jobs.py
+"""
+Background PDF rendering.
+
+ReportLab rendering is CPU-bound, so PDFs are built in a process pool and
+written to a disk cache keyed by (report, parameters, data). A repeat
+request for unchanged data is served straight from the cached file.
+"""
+import asyncio
+import functools
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from app.core.database import unbind_request_session
+from app.core.periods import current_quarter
+from app.crud import reports_crud
+from app.reports import renderers
+
+# ----- CONFIG -----
+PDF_WORKERS = int(os.getenv("REPORT_PDF_WORKERS", "2"))
+PDF_CACHE_DIR = os.getenv("REPORT_PDF_CACHE_DIR", os.path.join(tempfile.gettempdir(), "kandypack_reports"))
+JOB_TTL = float(os.getenv("REPORT_JOB_TTL", "3600"))  # seconds a finished job is kept
+# the disk cache is trimmed after each write: files unused for PDF_CACHE_MAX_AGE
+# seconds go first, then the least recently used until it fits PDF_CACHE_MAX_BYTES
+PDF_CACHE_MAX_AGE = float(os.getenv("REPORT_PDF_CACHE_MAX_AGE", "604800"))
+PDF_CACHE_MAX_BYTES = int(os.getenv("REPORT_PDF_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+class ReportDef(NamedTuple):
+    fetch: Callable  # reports_crud function, called with the report parameters
+    render: Callable  # renderers function, called with (data, **parameters, **context)
+    params: Tuple[str, ...]  # integer query parameters of the report
+    filename: str  # download name, formatted with parameters and context
+    context: Optional[Callable] = None  # extra render arguments not passed to fetch
+
+
+def _current_quarter_context():
+    start = current_quarter().start
+    return {"year": start.year, "quarter": (start.month - 1) // 3 + 1}
+
+
+REPORTS = {
+    "most_ordered_items": ReportDef(
+        reports_crud.get_most_ordered_items, renderers.render_most_ordered_items,
+        ("year", "quarter"), "most_ordered_items_q{quarter}_{year}.pdf"),
+    "quarterly_sales": ReportDef(
+        reports_crud.get_quarterly_sales_report, renderers.render_quarterly_sales,
+        (), "quarterly_sales_report.pdf", _current_quarter_context),
+    "city_wise_sales": ReportDef(
+        reports_crud.get_city_wise_sales, renderers.render_city_wise_sales,
+        ("year", "quarter"), "city_wise_sales_q{quarter}_{year}.pdf"),
+    "route_wise_report": ReportDef(
+        reports_crud.get_route_wise_report, renderers.render_route_wise_report,
+        ("year", "quarter"), "route_wise_report_q{quarter}_{year}.pdf"),
+    "driver_hours": ReportDef(
+        reports_crud.get_driver_hours_report, renderers.render_driver_hours,
+        ("year", "quarter"), "driver_hours_q{quarter}_{year}.pdf"),
+    "truck_usage": ReportDef(
+        reports_crud.get_truck_usage_report, renderers.render_truck_usage,
+        ("year", "month"), "truck_usage_{year}_{month}.pdf"),
+    "customer_order_history": ReportDef(
+        reports_crud.get_customer_order_history, renderers.render_customer_order_history,
+        ("customer_id",), "customer_{customer_id}_order_history.pdf"),
+}
+
+
+# ----- process pool -----
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # spawn: the API process runs threads (DB pools), which fork does not copy safely
+        _executor = ProcessPoolExecutor(max_workers=PDF_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+def shutdown_pdf_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _cache_path(report, params, data):
+    payload = json.dumps([report, params, data], sort_keys=True, default=str)
+    digest = hashlib.sha256(payload.encode()).hexdigest()[:32]
+    return os.path.join(PDF_CACHE_DIR, f"{report}-{digest}.pdf")
+
+
+def _write_atomic(path, content):
+    os.makedirs(PDF_CACHE_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=PDF_CACHE_DIR, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+def _touch(path):
+    """Mark a cached file as used (its mtime orders eviction); False if it is gone."""
+    try:
+        os.utime(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def evict_cache(keep=None):
+    """
+    Delete cached PDFs (and stray temp files) unused for PDF_CACHE_MAX_AGE,
+    then the least recently used ones until the cache fits PDF_CACHE_MAX_BYTES.
+    The file at `keep` (just written, about to be sent) is never deleted. Safe to run from several threads or processes at once.
+    """
+    try:
+        entries = list(os.scandir(PDF_CACHE_DIR))
+    except FileNotFoundError:
+        return
+    now = time.time()
+    files = []
+    for entry in entries:
+        if not entry.name.endswith((".pdf", ".tmp")):
+            continue
+        try:
+            st = entry.stat()
+        except FileNotFoundError:
+            continue
+        files.append((st.st_mtime, st.st_size, entry.path))
+    files.sort()  # least recently used first
+
+    total = sum(size for _, size, _ in files)
+    for mtime, size, path in files:
+        if now - mtime <= PDF_CACHE_MAX_AGE and total <= PDF_CACHE_MAX_BYTES:
+            break
+        if path == keep or (path.endswith(".tmp") and now - mtime <= PDF_CACHE_MAX_AGE):
+            continue  # about to be served, or still being written
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def _store(path, content):
+    _write_atomic(path, content)
+    evict_cache(keep=path)
+
+
+def resolve_params(report, params):
+    """
+    Validate report parameters; returns (definition, fetch params, render params).
+    """
+    definition = REPORTS.get(report)
+    if definition is None:
+        raise HTTPException(status_code=404, detail=f"Unknown report '{report}'")
+    unknown = set(params) - set(definition.params)
+    missing = [p for p in definition.params if params.get(p) is None]
+    if unknown or missing:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Report '{report}' takes parameters: {', '.join(definition.params) or 'none'}",
+        )
+    try:
+        fetch_params = {p: int(params[p]) for p in definition.params}
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=422, detail="Report parameters must be integers")
+    render_params = {**fetch_params, **(definition.context() if definition.context else {})}
+    return definition, fetch_params, render_params
+
+
+async def render_pdf(report, render_params, data):
+    """
+    Return (path, filename) of the PDF for these rows, rendering it in the
+    process pool unless an identical one is already cached on disk.
+    """
+    definition = REPORTS[report]
+    path = _cache_path(report, render_params, data)
+    if not await run_in_threadpool(_touch, path):
+        loop = asyncio.get_running_loop()
+        content = await loop.run_in_executor(
+            _get_executor(), functools.partial(definition.render, data, **render_params)
+        )
+        await run_in_threadpool(_store, path, content)
+    return path, definition.filename.format(**render_params)
+
+
+async def fetch_and_render(report, params):
+    definition, fetch_params, render_params = resolve_params(report, params)
+    try:
+        # positional, so the report cache entry is shared with the JSON endpoints
+        data = await run_in_threadpool(definition.fetch, *fetch_params.values())
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return await render_pdf(report, render_params, data)
+
+
+# ----- jobs -----
+_jobs = {}
+
+
+def _prune_jobs():
+    now = time.time()
+    for job_id in [j for j, job in _jobs.items()
+                   if job["finished_at"] and now - job["finished_at"] > JOB_TTL]:
+        del _jobs[job_id]
+
+
+async def _run_job(job):
+    # the job outlives the request - never use the request's DB connection
+    unbind_request_session()
+    job["status"] = "running"
+    try:
+        job["path"], job["filename"] = await fetch_and_render(job["report"], job["params"])
+        job["status"] = "done"
+    except HTTPException as e:
+        job["status"], job["error"] = "failed", e.detail
+    except Exception as e:
+        job["status"], job["error"] = "failed", str(e)
+    finally:
+        job["finished_at"] = time.time()
+
+
+def submit_job(report, params):
+    """Queue a PDF job and return it; validation errors are raised right away."""
+    _prune_jobs()
+    resolve_params(report, params)
+    job = {
+        "job_id": uuid.uuid4().hex,
+        "report": report,
+        "params": params,
+        "status": "queued",
+        "error": None,
+        "path": None,
+        "filename": None,
+        "created_at": time.time(),
+        "finished_at": None,
+    }
+    _jobs[job["job_id"]] = job
+    job["task"] = asyncio.create_task(_run_job(job))
+    return job
+
+
+def get_job(job_id):
+    _prune_jobs()
+    job = _jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
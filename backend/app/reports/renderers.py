@@ -0,0 +1,238 @@
+# app/reports/renderers.py
+"""
+PDF renderers for the /reports endpoints.
+Each takes the report rows plus the report parameters and returns the PDF
+bytes, by describing the report as a spec for app/reports/engine.py. They
+only depend on ReportLab so they can run in worker processes (see
+app/reports/jobs.py).
+"""
+from datetime import datetime
+
+from reportlab.lib.units import cm
+
+from app.reports.engine import (
+    BLUE, GREEN, BarChartBlock, Cards, Column, ReportSpec, TableBlock, build_pdf
+)
+
+
+# ----- formatting helpers -----
+def _num(value, suffix=""):
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.2f}{suffix}"
+    return f"{value}{suffix}"
+
+
+def _money(value):
+    try:
+        return f"{float(value or 0):,.2f}"
+    except (TypeError, ValueError):
+        return "0.00"
+
+
+def _datetime(value):
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).strftime("%Y-%m-%d %H:%M")
+        except ValueError:
+            return value
+    if hasattr(value, "strftime"):
+        return value.strftime("%Y-%m-%d %H:%M")
+    return str(value)
+
+
+def _truncate(value, max_len=25):
+    s = "" if value is None else str(value)
+    return s[:max_len] + "..." if len(s) > max_len else s
+
+
+def _period_meta(year, quarter=None, month=None):
+    return [f"Quarter: Q{quarter}" if quarter else f"Month: {month}", f"Year: {year}"]
+
+
+# ----- reports -----
+def render_most_ordered_items(data, year: int, quarter: int) -> bytes:
+    top_items = data[:10]
+    return build_pdf(ReportSpec(
+        title="Kandypack - Most Ordered Items Report",
+        meta=_period_meta(year, quarter),
+        blocks=[
+            Cards("Summary", [(f"Total Orders: {sum(i['order_count'] for i in data)}", "#E3F2FD")]),
+            TableBlock("Most Ordered Items", [
+                Column("Product Name", "product_name", 10*cm),
+                Column("Order Count", "order_count", 6*cm),
+            ], data),
+            BarChartBlock(
+                "Top 10 Most Ordered Items",
+                categories=[i["product_name"] for i in top_items],
+                series=[[i["order_count"] for i in top_items]],
+                colors=[GREEN],
+                legend=["Green = Order Count"],
+                value_step=max((i["order_count"] for i in top_items), default=0) // 5 or 1,
+            ),
+        ],
+    ))
+
+
+def render_quarterly_sales(data, year: int, quarter: int) -> bytes:
+    total_sales = sum(float(i["total_sales"]) for i in data)
+    total_orders = sum(i["order_count"] for i in data)
+    return build_pdf(ReportSpec(
+        title="Kandypack - Quarterly Sales Report",
+        meta=_period_meta(year, quarter),
+        blocks=[
+            Cards("Quarterly Sales Summary", [
+                (f"Total Sales: Rs. {total_sales:,.2f}", "#E8F5E9"),
+                (f"Total Orders: {total_orders}", "#E3F2FD"),
+            ]),
+            TableBlock("Quarterly Sales Monthly Breakdown", [
+                Column("Month", "month", 5*cm),
+                Column("Total Sales (Rs.)", lambda i: _money(i["total_sales"]), 5*cm),
+                Column("Orders (Volume)", "order_count", 5*cm),
+            ], data),
+            BarChartBlock(
+                "Sales vs Order Volume",
+                categories=[i["month"] for i in data],
+                series=[[i["total_sales"] for i in data], [i["order_count"] * 1000 for i in data]],
+                colors=[GREEN, BLUE],
+                legend=["Green = Total Sales", "Blue = Orders (scaled)"],
+                value_step=50000,
+            ),
+        ],
+    ))
+
+
+def render_city_wise_sales(data, year: int, quarter: int) -> bytes:
+    top_cities = data[:10]  # rows come sorted by sales
+    total_sales = sum(float(i["total_sales"]) for i in data)
+    total_orders = sum(int(i["order_count"]) for i in data)
+    return build_pdf(ReportSpec(
+        title="Kandypack - City-wise Sales Report",
+        meta=_period_meta(year, quarter),
+        blocks=[
+            Cards("Summary", [
+                (f"Total Sales: Rs. {total_sales:,.2f}", "#E8F5E9"),
+                (f"Total Orders: {total_orders}", "#E3F2FD"),
+            ]),
+            TableBlock("City-wise Sales Details", [
+                Column("City", "city", 8*cm),
+                Column("Total Sales (Rs.)", lambda i: _money(i["total_sales"]), 4*cm),
+                Column("Orders", "order_count", 4*cm),
+            ], data),
+            BarChartBlock(
+                "Top Cities by Sales",
+                categories=[i["city"] for i in top_cities],
+                series=[[i["total_sales"] for i in top_cities]],
+                colors=[GREEN],
+            ),
+        ],
+    ))
+
+
+def render_route_wise_report(data, year: int, quarter: int) -> bytes:
+    total_deliveries = sum(i.get("total_deliveries") or 0 for i in data)
+    delivered_count = sum(i.get("delivered_count") or 0 for i in data)
+    delayed_count = sum(i.get("delayed_count") or 0 for i in data)
+    avg_on_time = round(
+        sum(float(i.get("on_time_percentage") or 0) for i in data) / len(data), 2
+    ) if data else 0
+    top_routes = sorted(data, key=lambda i: i.get("on_time_percentage") or 0, reverse=True)[:8]
+    return build_pdf(ReportSpec(
+        title="Kandypack - Route-wise Delivery Report",
+        meta=_period_meta(year, quarter),
+        blocks=[
+            TableBlock("Summary", [
+                Column("Metric", 0, 4 * 72),
+                Column("Value", 1, 2.5 * 72),
+            ], [
+                ("Total Deliveries", _num(total_deliveries)),
+                ("Delivered", _num(delivered_count)),
+                ("Delayed", _num(delayed_count)),
+                ("Average On-time %", _num(avg_on_time, "%")),
+            ], header_color=BLUE, align="CENTER"),
+            TableBlock("Route-wise Delivery Performance", [
+                Column("Route ID", "route_id", 70),
+                Column("Area Name", "area_name", 120),
+                Column("Total", "total_deliveries", 60),
+                Column("Delivered", "delivered_count", 60),
+                Column("Delayed", "delayed_count", 60),
+                Column("Avg Hrs", lambda i: _num(i.get("avg_delivery_hours")), 60),
+                Column("On-time %", lambda i: _num(i.get("on_time_percentage"), "%"), 70),
+            ], data, header_color=BLUE, font_size=9, align="CENTER"),
+            BarChartBlock(
+                "Top Routes by On-time Delivery %",
+                categories=[i.get("route_id", "") for i in top_routes],
+                series=[[i.get("on_time_percentage") for i in top_routes]],
+                colors=[BLUE],
+                value_max=100,
+                width=320,
+                bar_width=20,
+            ),
+        ],
+    ))
+
+
+def render_driver_hours(data, year: int, quarter: int) -> bytes:
+    return build_pdf(ReportSpec(
+        title="Kandypack - Driver & Assistant Hours Report",
+        meta=_period_meta(year, quarter),
+        blocks=[
+            TableBlock(None, [
+                Column("Driver", "driver_name", 4*cm),
+                Column("Assistant", "assistant_name", 4*cm),
+                Column("Total Deliveries", "total_deliveries", 3*cm),
+                Column("Total Hours", "total_hours", 3*cm),
+                Column("Avg Hours/Delivery", "avg_hours_per_delivery", 3*cm),
+            ], data, header_color=BLUE, align="CENTER"),
+        ],
+    ))
+
+
+def render_truck_usage(data, year: int, month: int) -> bytes:
+    return build_pdf(ReportSpec(
+        title="Kandypack - Truck Usage Report",
+        meta=_period_meta(year, month=month),
+        blocks=[
+            TableBlock("Truck Usage Details", [
+                Column("Truck ID", "truck_id", 3*cm),
+                Column("Total Deliveries", "total_deliveries", 3*cm),
+                Column("Total Hours", lambda i: f"{float(i['total_hours']):.2f}", 3*cm),
+                Column("Delivered", "delivered_count", 3*cm),
+                Column("Delayed", "delayed_count", 3*cm),
+            ], data, header_color=BLUE, font_size=9, align="CENTER"),
+        ],
+    ))
+
+
+def render_customer_order_history(data, customer_id: int) -> bytes:
+    def count(status):
+        return sum(1 for d in data if d["delivery_status"] == status)
+
+    return build_pdf(ReportSpec(
+        title="Kandypack - Customer Order History",
+        meta=[f"Customer ID: {customer_id}"],
+        blocks=[
+            TableBlock("Summary", [
+                Column("Total Orders", 0, 0.25),
+                Column("Delivered", 1, 0.25),
+                Column("Delayed", 2, 0.25),
+                Column("Pending", 3, 0.25),
+            ], [(len(data), count("Delivered"), count("Delayed"), count("Pending"))],
+                header_color=BLUE, font_size=11, align="CENTER"),
+            TableBlock("Order Details", [
+                Column("Order ID", lambda d: _truncate(d.get("order_id")), 0.08),
+                Column("Order Date", lambda d: _datetime(d.get("order_date")), 0.10),
+                Column("Total Price (Rs.)", lambda d: _money(d.get("total_price")), 0.10),
+                Column("Truck ID", lambda d: _truncate(d.get("truck_id")), 0.07),
+                Column("Route", lambda d: _truncate(d.get("route_id")), 0.07),
+                Column("Scheduled Departure", lambda d: _datetime(d.get("scheduled_departure")), 0.14),
+                Column("Actual Departure", lambda d: _datetime(d.get("actual_departure")), 0.14),
+                Column("Actual Arrival", lambda d: _datetime(d.get("actual_arrival")), 0.14),
+                Column("Status", lambda d: _truncate(d.get("delivery_status")), 0.16),
+            ], data, header_color=BLUE, font_size=8, align="CENTER",
+                empty_text="No order history found for this customer."),
+        ],
+    ))
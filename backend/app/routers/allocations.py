@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+from app.models.allocation_models import AutoAllocationRequest
+from app.crud import allocations_crud
+
+router = APIRouter(prefix="/allocations", tags=["allocations"])
+
+
+@router.post("/auto")
+async def auto_allocate(request: AutoAllocationRequest):
+    """
+    Pack pending order lines onto upcoming trains.
+    With dry_run (the default) only the plan is returned; otherwise every
+    TrainAllocation row is written in one transaction.
+    """
+    return await allocations_crud.auto_allocate(
+        dry_run=request.dry_run,
+        horizon_days=request.horizon_days,
+        order_id=request.order_id,
+    )
@@ -10,17 +10,21 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
 
 @router.post("/login/", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends()):
+async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     """
     Log in a user using username and password, return JWT token.
     """
-    user = auth_crud.get_user_by_username(form_data.username)
+    user = await auth_crud.get_login_user(form_data.username)
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect username or password")
 
-    # Access password hash as a dictionary
-    if not security.verify_password(form_data.password, user["password_hash"]):
+    # bcrypt runs in the hash worker pool, not on the event loop
+    valid, new_hash = await security.verify_and_update_password(form_data.password, user["password_hash"])
+    if not valid:
         raise HTTPException(status_code=400, detail="Incorrect username or password")
+    if new_hash:
+        # stored with an outdated cost factor - upgrade it transparently
+        await auth_crud.update_password_hash(user["employee_id"], new_hash)
     
     role = ""
     if (user["role_id"]) == 3:
@@ -47,8 +51,7 @@ def login(form_data: OAuth2PasswordRequestForm = Depends()):
 @router.post("/logout/")
 def logout(token: str = Depends(oauth2_scheme)):
     """
-    "Log out" a user. Currently just returns a success message.
-    You can implement token blacklisting here if needed.
+    Log out a user: the token is rejected from now on.
     """
-    # If you implement a blacklist, add the token here.
+    security.revoke_token(token)
     return {"message": "Logged out successfully"}
\ No newline at end of file
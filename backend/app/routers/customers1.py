@@ -1,22 +1,14 @@
 from fastapi import APIRouter, Depends
 from app.crud.customers1_crud import  create_customer_type, get_customers, create_customer, delete_customer
 from app.core.security import get_current_user
+from app.core.database import get_db
 from app.models.customer_type_models import CustomerTypeCreate
 from app.models.customers1_models import CustomerCreate
-import os,mysql.connector
 
 router = APIRouter()
 router = APIRouter(prefix="/customers", tags=["Customers"])
 
 
-def get_connection():
-    return mysql.connector.connect(
-        host=os.getenv("DB_HOST", "localhost"),
-        user=os.getenv("DB_USER", "root"),
-        password=os.getenv("DB_PASS", ""),
-        database=os.getenv("DB_NAME", "kandypacklogistics"),
-    )
-
 @router.post("/customer-types")
 def create_customer_type_endpoint(customer_type: CustomerTypeCreate, current_user=Depends(get_current_user)):
     """
@@ -42,7 +34,7 @@ def create_customer_endpoint(customer: CustomerCreate, current_user=Depends(get_
 
 @router.get("/")
 def get_customers():
-    conn = get_connection()
+    conn = get_db()
     cursor = conn.cursor(dictionary=True)
     cursor.execute("SELECT customer_id, customer_name FROM customer")
     rows = cursor.fetchall()
@@ -52,7 +44,7 @@ def get_customers():
 
 @router.get("/{customer_id}")
 def get_customer_details(customer_id: int):
-    conn = get_connection()
+    conn = get_db()
     cursor = conn.cursor(dictionary=True)
     cursor.execute("""
         SELECT 
@@ -1,6 +1,10 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
 from typing import Optional
-from app.crud.dashboard_crud import get_active_deliveries
+from app.core.events import delivery_event_stream
+from app.crud.dashboard_crud import (
+    delivery_scope, get_active_deliveries, get_active_delivery_snapshot, get_overview
+)
 from app.core.security import get_current_user
 
 
@@ -10,8 +14,31 @@ router = APIRouter()
 
 
 @router.get("/active-deliveries/")
-def get_active_deliveries_endpoint(current_user=Depends(get_current_user)):
+async def get_active_deliveries_endpoint(current_user=Depends(get_current_user)):
     """
     Returns a list of active deliveries filtered by the current user's role and store.
     """
-    return get_active_deliveries(role=current_user.role, store_id=current_user.store_id)
\ No newline at end of file
+    return await get_active_deliveries(role=current_user.role, store_id=current_user.store_id)
+
+
+@router.get("/active-deliveries/stream")
+async def stream_active_deliveries(request: Request, current_user=Depends(get_current_user)):
+    """
+    Server-Sent Events feed of the current user's deliveries: a `snapshot`
+    event with the active deliveries, then a `delivery` event per change.
+    """
+    scope = delivery_scope(current_user.role, current_user.store_id)
+    return StreamingResponse(
+        delivery_event_stream(request, scope, lambda: get_active_delivery_snapshot(scope)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/dashboard/overview")
+async def get_overview_endpoint(current_user=Depends(get_current_user)):
+    """
+    Landing page KPIs for the current user's role and store in one call:
+    quarter revenue, delivered orders, active deliveries and staff availability.
+    """
+    return await get_overview(role=current_user.role, store_id=current_user.store_id)
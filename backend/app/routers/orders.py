@@ -1,11 +1,10 @@
-from fastapi import APIRouter
-from typing import List
-from app.models.order_models import OrderCreate, OrderResponse, TrainAllocationRequest
+from datetime import date
+from fastapi import APIRouter, File, Query, Response, UploadFile
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+from app.models.order_models import BulkOrderCreate, OrderCreate, OrderResponse, TrainAllocationRequest
 from app.crud import orders_crud
-import mysql.connector
-import os
-from fastapi import HTTPException
-from fastapi import Request
+from app.core.database import get_db
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
@@ -14,21 +13,50 @@ def create_order(order: OrderCreate):
     return orders_crud.create_order(order)
 
 
+@router.post("/bulk", response_model=dict)
+def create_orders_bulk(orders: List[BulkOrderCreate]):
+    """
+    Create many orders in one call. Totals are computed server-side and
+    invalid orders are reported per index without aborting the batch.
+    """
+    return orders_crud.bulk_create_orders(orders)
+
+
+@router.post("/bulk/csv", response_model=dict)
+async def create_orders_bulk_csv(file: UploadFile = File(...)):
+    """
+    Create orders from a CSV upload (one order item per line, grouped by order_ref).
+    """
+    orders, errors = orders_crud.parse_orders_csv(await file.read())
+    return await run_in_threadpool(orders_crud.bulk_create_orders, orders, errors)
+
 @router.get("/", response_model=List[dict])
-def list_orders():
-    return orders_crud.get_orders()
-
-def get_connection():
-    return mysql.connector.connect(
-        host=os.getenv("DB_HOST", "localhost"),
-        user=os.getenv("DB_USER", "root"),
-        password=os.getenv("DB_PASS", ""),
-        database=os.getenv("DB_NAME", "kandypacklogistics"),
+async def list_orders(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=orders_crud.ORDER_PAGE_MAX),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    customer_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    store_id: Optional[int] = None,
+):
+    """
+    Orders newest first. Pass limit (and then cursor) to page; the cursor
+    for the next page is returned in the X-Next-Cursor header. Without
+    limit or cursor every order is returned.
+    """
+    rows, next_cursor = await orders_crud.get_orders(
+        limit=limit, cursor=cursor, status=status, customer_id=customer_id,
+        date_from=date_from, date_to=date_to, store_id=store_id,
     )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
 
 @router.get("/")
 def get_orders():
-    conn = get_connection()
+    conn = get_db()
     cursor = conn.cursor(dictionary=True)
     cursor.execute("""
         SELECT 
@@ -54,7 +82,7 @@ def get_orders():
 
 @router.get("/{order_id}/items")
 def get_order_items(order_id: int):
-    conn = get_connection()
+    conn = get_db()
     cursor = conn.cursor(dictionary=True)
 
     query = """
@@ -95,85 +123,18 @@ def get_order_items(order_id: int):
 
 
 @router.post("/{order_id}/allocate")
-async def allocate_order_to_train(order_id: int, allocation: TrainAllocationRequest, request: Request):
+async def allocate_order_to_train(order_id: int, allocation: TrainAllocationRequest):
     """
     Insert a row into TrainAllocation for the given order.
     Validates available capacity on the train.
     """
-    try:
-        raw = await request.body()
-        print(f"/orders/{order_id}/allocate headers: {dict(request.headers)}")
-        print(f"/orders/{order_id}/allocate raw body: {raw.decode('utf-8', errors='ignore')}")
-    except Exception:
-        pass
-
-    print(f"Received allocation request: {allocation}")  # Debug log
-    
-    train_id = allocation.train_id
-    product_id = allocation.product_id
-    allocated_qty = allocation.allocated_qty
-    store_id = allocation.store_id
-    
-    if allocated_qty <= 0:
-        raise HTTPException(status_code=400, detail="allocated_qty must be > 0")
-
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    try:
-        # fetch product unit space if not provided
-        unit_space = allocation.unit_space
-        if unit_space is None:
-            cursor.execute("SELECT unit_space FROM Product WHERE product_id=%s", (product_id,))
-            row = cursor.fetchone()
-            if not row:
-                raise HTTPException(status_code=404, detail="Product not found")
-            unit_space = float(row["unit_space"])  # type: ignore
-
-        # capacity and utilized for the train
-        cursor.execute(
-            """
-            SELECT t.capacity_space AS capacity
-            FROM Train t
-            WHERE t.train_id=%s
-            """,
-            (train_id,),
-        )
-        trow = cursor.fetchone()
-        if not trow:
-            raise HTTPException(status_code=404, detail="Train not found")
-        capacity = float(trow["capacity"])  # type: ignore
-
-        cursor.execute(
-            """
-            SELECT COALESCE(SUM(ta.allocated_qty * p.unit_space), 0) AS utilized
-            FROM TrainAllocation ta
-            JOIN Product p ON ta.product_id = p.product_id
-            WHERE ta.train_id=%s
-            """,
-            (train_id,),
-        )
-        urow = cursor.fetchone()
-        utilized = float(urow["utilized"]) if urow and urow["utilized"] is not None else 0.0
-
-        this_allocation_space = float(allocated_qty) * float(unit_space)
-        if utilized + this_allocation_space > capacity + 1e-9:
-            raise HTTPException(status_code=409, detail="Not enough space on the train")
-
-        # Insert allocation
-        cursor.execute(
-            """
-            INSERT INTO TrainAllocation (
-                train_id, order_id, product_id, store_id, allocated_qty,
-                start_date_time, status, unit_space
-            ) VALUES (%s,%s,%s,%s,%s, NOW(), 'Allocated', %s)
-            """,
-            (train_id, order_id, product_id, store_id, allocated_qty, unit_space),
-        )
-        conn.commit()
-        return {"trip_id": cursor.lastrowid, "message": "Allocated"}
-    except mysql.connector.Error as e:
-        conn.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        cursor.close()
-        conn.close()
+    return await orders_crud.allocate_order_to_train(order_id, allocation)
+
+
+@router.post("/{order_id}/allocate/batch")
+async def allocate_order_batch(order_id: int, allocations: List[TrainAllocationRequest]):
+    """
+    Insert several TrainAllocation rows for the given order in one transaction.
+    Validates each train's capacity against the whole batch.
+    """
+    return await orders_crud.allocate_order_batch(order_id, allocations)
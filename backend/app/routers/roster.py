@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Query
+from app.core.security import get_current_user
+from app.crud import roster_crud
+from app.models.roster_models import CrewAssignmentRequest
+
+router = APIRouter(prefix="/roster", tags=["roster"])
+
+
+@router.get("/availability")
+async def crew_availability(
+    store_id: int,
+    departure: datetime,
+    hours: float = Query(gt=0),
+    current_user=Depends(get_current_user),
+):
+    """
+    Active crew of a store and whether each of them can take a delivery
+    departing at `departure` for `hours` (driver rest period, weekly hours).
+    """
+    return await roster_crud.get_availability(store_id, departure, hours)
+
+
+@router.post("/assignments")
+async def assign_crew(request: CrewAssignmentRequest, current_user=Depends(get_current_user)):
+    """
+    Assign crew to truck deliveries of one store. All rows are validated
+    first and written in one INSERT; if any row is rejected nothing is
+    written and the reasons are returned with status 409.
+    """
+    return await roster_crud.assign_crew(
+        request.store_id, [a.model_dump() for a in request.assignments]
+    )
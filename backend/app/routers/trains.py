@@ -5,9 +5,9 @@ router = APIRouter(prefix="/trains", tags=["trains"])
 
 
 @router.get("/")
-def list_trains():
+async def list_trains():
     try:
-        return trains_crud.get_train_schedules()
+        return await trains_crud.get_train_schedules()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -126,7 +126,32 @@ def generate_now(days: int = Query(14, ge=1, le=60)):
     Use this so you can SEE daily/weekly templates immediately in the UI.
     """
     try:
-        cnt = trains_crud.generate_horizon(days)
-        return {"generated_window_days": days, "current_window_rows": cnt}
+        result = trains_crud.generate_horizon(days)
+        return {
+            "generated_window_days": days,
+            "generated_rows": result["inserted"],
+            "current_window_rows": result["window_rows"],
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/utilization/verify")
+def verify_utilization():
+    """
+    List trains whose maintained utilization differs from their allocations.
+    """
+    try:
+        drift = trains_crud.verify_utilization()
+        return {"consistent": not drift, "drift": drift}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/utilization/rebuild")
+def rebuild_utilization():
+    """
+    Rebuild every train's maintained utilization from TrainAllocation.
+    """
+    try:
+        return {"corrected_trains": trains_crud.rebuild_utilization()}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
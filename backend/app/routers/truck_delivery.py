@@ -1,11 +1,31 @@
 from fastapi import APIRouter, Depends, HTTPException
 from app.core.security import get_current_user
+from app.core.cache import report_cache
 from app.core.database import get_db  # import your connection helper
+from app.crud.dashboard_crud import publish_delivery_changes
+from app.crud.deliveries_crud import finish_deliveries
+from app.crud.schedule_crud import schedule_deliveries
+from app.models.delivery_models import DeliveryFinishRequest, DeliveryScheduleRequest
 from mysql.connector import Error
 
 router = APIRouter()
 
 
+@router.post("/deliveries/finish")
+async def finish_deliveries_endpoint(request: DeliveryFinishRequest, current_user=Depends(get_current_user)):
+    """
+    End-of-day completion of many truck deliveries in one transaction:
+    deliveries are marked Delivered, the crew of finished trips made
+    available again and the orders marked Delivered. Returns an outcome
+    per delivery id.
+    """
+    return await finish_deliveries(
+        [d.model_dump() for d in request.deliveries],
+        role=current_user.role,
+        store_id=current_user.store_id,
+    )
+
+
 @router.post("/deliveries/{delivery_id}/finish")
 def finish_delivery_endpoint(delivery_id: int, current_user=Depends(get_current_user)):
     """
@@ -22,6 +42,8 @@ def finish_delivery_endpoint(delivery_id: int, current_user=Depends(get_current_
         # Call the stored procedure
         cursor.callproc("finish_truck_delivery", [delivery_id])
         conn.commit()
+        report_cache.invalidate("sales", "deliveries", "hours")
+        publish_delivery_changes(conn, [delivery_id], "finished")
 
         return {"message": f"Delivery {delivery_id} marked as Delivered successfully."}
 
@@ -35,3 +57,14 @@ def finish_delivery_endpoint(delivery_id: int, current_user=Depends(get_current_
             cursor.close()
         if conn:
             conn.close()
+
+
+@router.post("/deliveries/schedule")
+async def schedule_deliveries_endpoint(request: DeliveryScheduleRequest, current_user=Depends(get_current_user)):
+    """
+    Plan a day of truck deliveries for a store: orders whose goods reached
+    the store are grouped by route into trips, and each trip gets a
+    departure, truck, driver and assistant within the crew rules.
+    With dry_run (the default) only the plan is returned.
+    """
+    return await schedule_deliveries(request.store_id, request.delivery_date, request.dry_run)
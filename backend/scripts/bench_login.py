@@ -0,0 +1,79 @@
+"""
+Login throughput under a concurrent burst.
+
+Fires REQUESTS POST /login/ calls against a running API, CONCURRENCY at a
+time, and prints throughput and latency percentiles. Run it against a
+server started with the PASSWORD_HASH_WORKERS / BCRYPT_ROUNDS under test:
+
+    python scripts/bench_login.py --username admin --password secret \
+        --requests 200 --concurrency 50
+
+Standard library only, so it runs wherever the backend does.
+"""
+import argparse
+import statistics
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def login(url, body, timeout):
+    """One login call: (HTTP status or None on a connection error, seconds)."""
+    request = urllib.request.Request(
+        url, data=body, headers={"Content-Type": "application/x-www-form-urlencoded"}
+    )
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (urllib.error.URLError, OSError):
+        status = None
+    return status, time.perf_counter() - start
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000/login/")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--requests", type=int, default=100, help="total login calls")
+    parser.add_argument("--concurrency", type=int, default=20, help="calls in flight at once")
+    parser.add_argument("--warmup", type=int, default=1, help="calls made before timing")
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    body = urllib.parse.urlencode({"username": args.username, "password": args.password}).encode()
+    for _ in range(args.warmup):
+        login(args.url, body, args.timeout)  # fills the login user cache, opens pools
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        start = time.perf_counter()
+        results = list(executor.map(lambda _: login(args.url, body, args.timeout), range(args.requests)))
+        elapsed = time.perf_counter() - start
+
+    statuses = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    latencies = sorted(seconds * 1000 for _, seconds in results)
+
+    print(f"{args.requests} logins, {args.concurrency} concurrent, {elapsed:.2f}s")
+    print(f"throughput: {args.requests / elapsed:.1f} logins/s")
+    print(
+        f"latency ms: mean {statistics.mean(latencies):.0f}  p50 {percentile(latencies, 0.5):.0f}  "
+        f"p95 {percentile(latencies, 0.95):.0f}  p99 {percentile(latencies, 0.99):.0f}  "
+        f"max {latencies[-1]:.0f}"
+    )
+    print("status:", ", ".join(f"{s if s is not None else 'error'}: {n}" for s, n in statuses.items()))
+
+
+if __name__ == "__main__":
+    main()
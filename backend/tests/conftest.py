@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+# tests import the app the way uvicorn does, from the backend directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def db():
+    """
+    A connection to the database configured for the app (DB_HOST, DB_NAME...),
+    for EXPLAIN-based tests. Skipped when no database is reachable.
+    """
+    import pymysql
+    from app.core.database import DB_CONFIG
+
+    try:
+        conn = pymysql.connect(
+            host=DB_CONFIG["host"],
+            user=DB_CONFIG["user"],
+            password=DB_CONFIG["password"],
+            database=DB_CONFIG["database"],
+            connect_timeout=3,
+            cursorclass=pymysql.cursors.DictCursor,
+        )
+    except pymysql.err.MySQLError as e:
+        pytest.skip(f"no test database: {e}")
+    yield conn
+    conn.close()
@@ -0,0 +1,65 @@
+from datetime import date, datetime
+
+from app.crud.allocations_crud import plan_allocations
+
+
+def _train(train_id, departs, arrives, capacity=10.0, utilized=0.0, destination="Kandy", status="Scheduled"):
+    return {"train_id": train_id, "departure_date_time": departs, "arrival_date_time": arrives,
+            "destination_station": destination, "status": status,
+            "capacity": capacity, "utilized": utilized}
+
+
+def _line(order_id, qty, unit_space=1.0, required=date(2025, 1, 10), city="Kandy", store_id=1, product_id=1):
+    return {"order_id": order_id, "product_id": product_id, "store_id": store_id, "required_date": required,
+            "remaining_qty": qty, "unit_space": unit_space, "city_name": city}
+
+
+def test_splits_a_line_over_trains_earliest_first():
+    trains = [_train(2, datetime(2025, 1, 3), datetime(2025, 1, 4)),
+              _train(1, datetime(2025, 1, 2), datetime(2025, 1, 3), capacity=4)]
+    allocations, unallocated = plan_allocations([_line(1, 7)], trains)
+    assert [(a["train_id"], a["allocated_qty"]) for a in allocations] == [(1, 4), (2, 3)]
+    assert unallocated == []
+    assert [t["utilized"] for t in trains] == [3.0, 4.0]
+
+
+def test_arrival_on_required_date_is_eligible_after_is_not():
+    on_time = _train(1, datetime(2025, 1, 9), datetime(2025, 1, 10, 23, 0))
+    late = _train(2, datetime(2025, 1, 10), datetime(2025, 1, 11))
+    allocations, _ = plan_allocations([_line(1, 1)], [on_time])
+    assert allocations[0]["train_id"] == 1
+    allocations, unallocated = plan_allocations([_line(1, 1)], [late])
+    assert allocations == []
+    assert unallocated[0]["reason"] == "No eligible train before the required date"
+
+
+def test_cancelled_trains_and_other_destinations_are_skipped():
+    trains = [_train(1, datetime(2025, 1, 2), datetime(2025, 1, 3), status="Cancelled"),
+              _train(2, datetime(2025, 1, 2), datetime(2025, 1, 3), destination="Galle"),
+              _train(3, datetime(2025, 1, 4), datetime(2025, 1, 5), destination=" kandy ")]
+    allocations, _ = plan_allocations([_line(1, 2)], trains)
+    assert [a["train_id"] for a in allocations] == [3]
+
+
+def test_fractional_space_fills_train_exactly():
+    # 0.3 / 0.1 is 2.999... in floating point
+    train = _train(1, datetime(2025, 1, 2), datetime(2025, 1, 3), capacity=1.0, utilized=0.7)
+    allocations, unallocated = plan_allocations([_line(1, 3, unit_space=0.1)], [train])
+    assert allocations[0]["allocated_qty"] == 3
+    assert unallocated == []
+
+
+def test_earlier_deadline_gets_capacity_first():
+    train = _train(1, datetime(2025, 1, 2), datetime(2025, 1, 3), capacity=5)
+    lines = [_line(1, 5, required=date(2025, 1, 20)), _line(2, 5, required=date(2025, 1, 10))]
+    allocations, unallocated = plan_allocations(lines, [train])
+    assert [a["order_id"] for a in allocations] == [2]
+    assert unallocated == [{"order_id": 1, "product_id": 1, "remaining_qty": 5,
+                            "reason": "Not enough capacity on eligible trains"}]
+
+
+def test_line_without_store_is_left_out():
+    train = _train(1, datetime(2025, 1, 2), datetime(2025, 1, 3))
+    allocations, unallocated = plan_allocations([_line(1, 1, store_id=None)], [train])
+    assert allocations == []
+    assert unallocated[0]["reason"] == "No store in the order's destination city"
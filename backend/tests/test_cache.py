@@ -0,0 +1,79 @@
+import threading
+import time
+from datetime import datetime
+
+from app.core import cache as cache_module
+from app.core.cache import TTLCache, cached_report, report_cache
+from app.core.periods import Period
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = TTLCache()
+    cache.set("k", 1, ttl=10)
+    now[0] += 9.999
+    assert cache.get("k") == 1
+    now[0] += 0.001  # expires_at itself is already expired
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.get("a")
+    cache.set("c", 3, ttl=60)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+
+def test_invalidate_by_tag():
+    cache = TTLCache()
+    cache.set("sales", 1, ttl=60, tags=("sales",))
+    cache.set("both", 2, ttl=60, tags=("sales", "deliveries"))
+    cache.set("hours", 3, ttl=60, tags=("hours",))
+    cache.invalidate("deliveries")
+    assert (cache.get("sales"), cache.get("both"), cache.get("hours")) == (1, None, 3)
+
+
+def test_falsy_values_are_cached():
+    cache = TTLCache()
+    calls = []
+    for _ in range(2):
+        assert cache.get_or_load("k", lambda: calls.append(1) or [], ttl=60) == []
+    assert len(calls) == 1
+
+
+def test_concurrent_misses_load_once():
+    cache = TTLCache()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return "value"
+
+    threads = [threading.Thread(target=cache.get_or_load, args=("k", loader, 60)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert cache.get("k") == "value"
+
+
+def test_cached_report_ttl_by_period(monkeypatch):
+    report_cache.clear()
+    ttls = []
+    monkeypatch.setattr(report_cache, "set", lambda key, value, ttl, tags=(): ttls.append(ttl))
+    past = Period(datetime(2020, 1, 1), datetime(2020, 4, 1))
+    current = Period(datetime(2020, 1, 1), datetime(9999, 1, 1))
+
+    @cached_report("test", tags=("sales",), period=lambda closed: past if closed else current)
+    def report(closed):
+        return closed
+
+    report(True)
+    report(False)
+    assert ttls == [cache_module.REPORT_CACHE_CLOSED_TTL, cache_module.REPORT_CACHE_OPEN_TTL]
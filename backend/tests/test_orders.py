@@ -0,0 +1,113 @@
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+
+from app.crud.orders_crud import (
+    _prepare_order, decode_order_cursor, encode_order_cursor, parse_orders_csv,
+)
+from app.models.order_models import BulkOrderCreate
+
+HEADER = "order_ref,customer_id,address_id,order_date,required_date,product_id,quantity\n"
+PRODUCTS = {1: {"unit_price": 2.5, "unit_space": 0.5}, 2: {"unit_price": 10, "unit_space": 2}}
+ADDRESSES = {7: {70, 71}}
+
+
+def _order(**fields):
+    values = {"customer_id": 7, "address_id": 70, "order_date": "2025-01-01", "required_date": "2025-01-08",
+              "items": [{"product_id": 1, "quantity": 2}]}
+    values.update(fields)
+    return BulkOrderCreate(**values)
+
+
+# ----- CSV parsing -----
+
+def test_csv_groups_lines_by_order_ref():
+    orders, errors = parse_orders_csv((
+        HEADER
+        + "A,7,70,2025-01-01,2025-01-08,1,2\n"
+        + "A,7,70,2025-01-01,2025-01-08,2,1\n"
+        + "B,7,,2025-01-01,2025-01-08,1,1\n"
+    ).encode())
+    assert errors == []
+    assert [(o.order_ref, len(o.items), o.address_id) for o in orders] == [("A", 2, 70), ("B", 1, None)]
+
+
+def test_csv_blank_order_refs_are_separate_orders():
+    orders, errors = parse_orders_csv((
+        HEADER
+        + ",7,70,2025-01-01,2025-01-08,1,2\n"
+        + ",7,70,2025-01-01,2025-01-08,2,1\n"
+    ).encode())
+    assert errors == []
+    assert [(o.order_ref, len(o.items)) for o in orders] == [(None, 1), (None, 1)]
+
+
+def test_csv_conflicting_headers_reject_the_order():
+    orders, errors = parse_orders_csv((
+        HEADER
+        + "A,7,70,2025-01-01,2025-01-08,1,2\n"
+        + "A,7,71,2025-01-01,2025-01-08,2,1\n"
+    ).encode())
+    assert orders == []
+    assert errors[0]["order_ref"] == "A" and errors[0]["lines"] == [2, 3]
+
+
+def test_csv_invalid_values_report_their_lines():
+    orders, errors = parse_orders_csv((HEADER + "A,seven,70,2025-01-01,2025-01-08,1,2\n").encode())
+    assert orders == []
+    assert errors[0]["lines"] == [2] and "customer_id" in errors[0]["error"]
+
+
+def test_csv_bom_and_missing_columns():
+    orders, _ = parse_orders_csv(("\ufeff" + HEADER + "A,7,70,2025-01-01,2025-01-08,1,2\n").encode())
+    assert len(orders) == 1
+    with pytest.raises(HTTPException) as e:
+        parse_orders_csv(b"order_ref,customer_id\nA,7\n")
+    assert e.value.status_code == 400
+
+
+# ----- order validation -----
+
+def test_prepare_merges_repeated_products_and_totals():
+    row, items = _prepare_order(
+        _order(items=[{"product_id": 1, "quantity": 2}, {"product_id": 2, "quantity": 1},
+                      {"product_id": 1, "quantity": 3}]),
+        PRODUCTS, ADDRESSES,
+    )
+    assert items == [(1, 5, 2.5), (2, 1, 10.0)]
+    assert row[2:] == (date(2025, 1, 1), date(2025, 1, 8), "Pending", 6, 22.5, 4.5)
+
+
+def test_prepare_lead_time_boundary():
+    _prepare_order(_order(required_date="2025-01-08"), PRODUCTS, ADDRESSES)  # exactly 7 days
+    with pytest.raises(ValueError, match="7 days"):
+        _prepare_order(_order(required_date="2025-01-07"), PRODUCTS, ADDRESSES)
+
+
+@pytest.mark.parametrize("fields, message", [
+    ({"order_date": "01/01/2025"}, "YYYY-MM-DD"),
+    ({"customer_id": 8}, "Customer 8 not found"),
+    ({"address_id": 99}, "does not belong"),
+    ({"items": []}, "no items"),
+    ({"items": [{"product_id": 1, "quantity": 0}]}, "quantity must be > 0"),
+    ({"items": [{"product_id": 3, "quantity": 1}]}, "Product 3 not found"),
+])
+def test_prepare_rejects(fields, message):
+    with pytest.raises(ValueError, match=message):
+        _prepare_order(_order(**fields), PRODUCTS, ADDRESSES)
+
+
+# ----- keyset cursor -----
+
+def test_cursor_round_trip():
+    cursor = encode_order_cursor(date(2025, 12, 31), 123456)
+    assert "=" not in cursor
+    assert decode_order_cursor(cursor) == (date(2025, 12, 31), 123456)
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "MjAyNS0xMi0zMQ", encode_order_cursor(date(2025, 1, 1), 1)[:-2]])
+def test_cursor_rejects_garbage(cursor):
+    with pytest.raises(HTTPException) as e:
+        decode_order_cursor(cursor)
+    assert e.value.status_code == 400
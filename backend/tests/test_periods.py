@@ -0,0 +1,64 @@
+from datetime import date, datetime
+
+import pytest
+
+from app.core.periods import Period, current_quarter, resolve_period
+
+
+@pytest.mark.parametrize("quarter, start, end", [
+    (1, datetime(2025, 1, 1), datetime(2025, 4, 1)),
+    (2, datetime(2025, 4, 1), datetime(2025, 7, 1)),
+    (3, datetime(2025, 7, 1), datetime(2025, 10, 1)),
+    (4, datetime(2025, 10, 1), datetime(2026, 1, 1)),  # ends in the next year
+])
+def test_quarter(quarter, start, end):
+    assert resolve_period(2025, quarter=quarter) == Period(start, end)
+
+
+def test_december_ends_on_new_year():
+    assert resolve_period(2025, month=12) == Period(datetime(2025, 12, 1), datetime(2026, 1, 1))
+
+
+def test_february_of_leap_year():
+    assert resolve_period(2024, month=2) == Period(datetime(2024, 2, 1), datetime(2024, 3, 1))
+
+
+def test_whole_year():
+    assert resolve_period(2025) == Period(datetime(2025, 1, 1), datetime(2026, 1, 1))
+
+
+def test_year_defaults_to_current():
+    assert resolve_period(quarter=1).start.year == date.today().year
+
+
+def test_custom_range_end_is_inclusive_day():
+    # half-open: the last day is included up to midnight of the next one
+    period = resolve_period(start=date(2025, 12, 31), end=date(2025, 12, 31))
+    assert period == Period(datetime(2025, 12, 31), datetime(2026, 1, 1))
+    assert period.start <= datetime(2025, 12, 31, 23, 59, 59) < period.end
+    assert not period.start <= datetime(2026, 1, 1) < period.end
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"start": date(2025, 1, 1)},
+    {"end": date(2025, 1, 1)},
+    {"start": date(2025, 1, 2), "end": date(2025, 1, 1)},
+    {"year": 2025, "start": date(2025, 1, 1), "end": date(2025, 1, 2)},
+    {"year": 2025, "quarter": 1, "month": 1},
+    {"year": 2025, "quarter": 0},
+    {"year": 2025, "quarter": 5},
+    {"year": 2025, "month": 13},
+])
+def test_invalid_combinations(kwargs):
+    with pytest.raises(ValueError):
+        resolve_period(**kwargs)
+
+
+@pytest.mark.parametrize("today, start, end", [
+    (date(2025, 1, 1), datetime(2025, 1, 1), datetime(2025, 4, 1)),
+    (date(2025, 3, 31), datetime(2025, 1, 1), datetime(2025, 4, 1)),
+    (date(2025, 4, 1), datetime(2025, 4, 1), datetime(2025, 7, 1)),
+    (date(2025, 12, 31), datetime(2025, 10, 1), datetime(2026, 1, 1)),
+])
+def test_current_quarter(today, start, end):
+    assert current_quarter(today) == Period(start, end)
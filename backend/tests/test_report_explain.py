@@ -0,0 +1,63 @@
+"""
+Report period predicates must stay sargable: EXPLAIN has to list the date
+index as usable for every report query (a YEAR()/QUARTER()/MONTH() filter
+would leave it out). Needs a database with the app's schema; skipped
+otherwise (see the db fixture).
+"""
+from datetime import date
+
+import pytest
+
+from app.core.periods import current_quarter
+from app.crud import reports_crud
+from app.crud.dashboard_crud import _overview_query
+
+
+def _possible_keys(db, sql, params, table):
+    with db.cursor() as cur:
+        cur.execute("EXPLAIN " + sql, params)
+        rows = [r for r in cur.fetchall() if r["table"] == table]
+    assert rows, f"{table} not in the plan"
+    return {key for r in rows for key in (r["possible_keys"] or "").split(",") if key}
+
+
+@pytest.mark.parametrize("query", [
+    reports_crud.most_ordered_items_query(2025, 4),
+    reports_crud.city_wise_sales_query(2025, 4),
+    reports_crud.route_wise_query(2025, 4),
+    reports_crud.driver_hours_query(2025, 4),
+    reports_crud.truck_usage_query(2025, 12),
+], ids=["most_ordered_items", "city_wise_sales", "route_wise", "driver_hours", "truck_usage"])
+def test_rollup_reports_use_day_key(db, query):
+    # every rollup table's primary key starts with day
+    table = "h" if "rollup_employee_hours_daily h" in query.sql else "r"
+    assert "PRIMARY" in _possible_keys(db, query.sql, query.params, table)
+
+
+def test_quarterly_sales_uses_day_key(db):
+    query = reports_crud.quarterly_sales_query()
+    assert "PRIMARY" in _possible_keys(db, query.sql, query.params, "rollup_orders_daily")
+
+
+def test_kpis_use_order_date_index(db):
+    start, end = current_quarter()
+    assert "idx_order_date" in _possible_keys(db, reports_crud.KPIS_QUERY, (start, end), "order")
+
+
+@pytest.mark.parametrize("role", ["admin", "store_manager"])
+def test_overview_uses_order_date_index(db, role):
+    start, end = current_quarter()
+    sql, params = _overview_query(role, 1, start, end)
+    assert "idx_order_date" in _possible_keys(db, sql, params, "o")
+
+
+@pytest.mark.parametrize("rollup, table, index", [
+    ("sales", "o", "idx_order_date"),
+    ("deliveries", "td", "idx_delivery_date"),
+    ("hours", "td", "idx_delivery_date"),
+])
+def test_rollup_rebuilds_use_date_index(db, rollup, table, index):
+    spans = reports_crud._day_spans([date(2025, 12, 30), date(2025, 12, 31), date(2026, 1, 2)])
+    for _, column, insert_sql in reports_crud._ROLLUP_REBUILDS[rollup]:
+        where, params = reports_crud._spans_predicate(column, spans)
+        assert index in _possible_keys(db, insert_sql.format(where=where), params, table)
@@ -0,0 +1,29 @@
+from datetime import date
+
+from app.crud.reports_crud import _day_spans, _spans_predicate
+
+
+def test_day_spans_merge_consecutive_days():
+    days = [date(2025, 12, 30), date(2025, 12, 31), date(2026, 1, 1), date(2026, 1, 3)]
+    assert _day_spans(days) == [
+        [date(2025, 12, 30), date(2026, 1, 2)],  # across the year end
+        [date(2026, 1, 3), date(2026, 1, 4)],
+    ]
+
+
+def test_day_spans_single_and_empty():
+    assert _day_spans([date(2024, 2, 28), date(2024, 2, 29)]) == [[date(2024, 2, 28), date(2024, 3, 1)]]
+    assert _day_spans([]) == []
+
+
+def test_day_spans_skipped_day_is_not_covered():
+    # a day claimed by another reader (SKIP LOCKED) must stay outside every span
+    spans = _day_spans([date(2025, 1, 1), date(2025, 1, 3)])
+    assert not any(start <= date(2025, 1, 2) < end for start, end in spans)
+
+
+def test_spans_predicate_is_half_open_per_span():
+    sql, params = _spans_predicate("o.order_date", [[date(2025, 1, 1), date(2025, 1, 3)],
+                                                    [date(2025, 1, 5), date(2025, 1, 6)]])
+    assert sql == "((o.order_date >= %s AND o.order_date < %s) OR (o.order_date >= %s AND o.order_date < %s))"
+    assert params == [date(2025, 1, 1), date(2025, 1, 3), date(2025, 1, 5), date(2025, 1, 6)]
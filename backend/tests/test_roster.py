@@ -0,0 +1,52 @@
+from datetime import date, datetime, timedelta
+
+from app.crud.roster_crud import MIN_REST, Roster, Timeline, week_start
+
+MONDAY = datetime(2025, 7, 7, 8, 0)
+
+
+def test_week_starts_on_sunday():
+    assert week_start(date(2025, 7, 6)) == date(2025, 7, 6)  # Sunday
+    assert week_start(datetime(2025, 7, 12, 23, 59)) == date(2025, 7, 6)  # Saturday
+    assert week_start(date(2025, 1, 1)) == date(2024, 12, 29)  # across the year end
+
+
+def test_driver_rest_period_is_exclusive():
+    driver = Timeline(1, "D", "Driver", 40)
+    driver.add(MONDAY, 2)
+    # the trigger rejects departures strictly within 4 hours
+    assert driver.check(MONDAY + MIN_REST, 2) is None
+    assert driver.check(MONDAY - MIN_REST, 2) is None
+    assert driver.check(MONDAY + MIN_REST - timedelta(minutes=1), 2) is not None
+    assert driver.check(MONDAY - MIN_REST + timedelta(minutes=1), 2) is not None
+    assert driver.check(MONDAY, 2) is not None
+
+
+def test_assistants_have_no_rest_rule():
+    assistant = Timeline(2, "A", "Assistant", 60)
+    assistant.add(MONDAY, 2)
+    assert assistant.check(MONDAY + timedelta(hours=1), 2) is None
+
+
+def test_weekly_hours_limit_is_inclusive_and_per_week():
+    driver = Timeline(1, "D", "Driver", 10)
+    driver.add(MONDAY, 6)
+    assert driver.check(MONDAY + timedelta(days=1), 4) is None  # exactly the limit
+    assert "Weekly hour limit" in driver.check(MONDAY + timedelta(days=1), 4.5)
+    assert driver.check(MONDAY + timedelta(days=6), 10) is None  # next Sunday starts a new week
+
+
+def test_remove_undoes_add():
+    driver = Timeline(1, "D", "Driver", 10)
+    driver.add(MONDAY, 6)
+    driver.remove(MONDAY, 6)
+    assert driver.departures == []
+    assert driver.check(MONDAY, 10) is None
+
+
+def test_roster_rejects_unknown_crew_and_past_weeks():
+    since = datetime(2025, 7, 6) - MIN_REST
+    roster = Roster(1, since, {1: Timeline(1, "D", "Driver", 40)})
+    assert "not active" in roster.check(2, MONDAY, 2)
+    assert "before the current roster week" in roster.check(1, datetime(2025, 7, 5, 23), 2)
+    assert roster.check(1, datetime(2025, 7, 6), 2) is None
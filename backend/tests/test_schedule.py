@@ -0,0 +1,111 @@
+from datetime import date, datetime, timedelta
+
+from app.crud import schedule_crud
+from app.crud.roster_crud import MIN_REST, Roster, Timeline
+from app.crud.schedule_crud import TRUCK_CAPACITY, build_trips, plan_day
+
+DAY = date(2030, 1, 7)  # a Monday
+READY = datetime(2030, 1, 6, 20, 0)
+ROUTES = {"R1": {"route_id": "R1", "max_delivery_time": 5},
+          "R2": {"route_id": "R2", "max_delivery_time": 5}}
+
+
+def _order(order_id, city_id, space=10.0, required=DAY, ready_at=READY):
+    return {"order_id": order_id, "city_id": city_id, "total_space": space,
+            "required_date": required, "ready_at": ready_at}
+
+
+def _roster(*timelines):
+    return Roster(1, datetime.combine(DAY, datetime.min.time()) - MIN_REST,
+                  {t.employee_id: t for t in timelines})
+
+
+def _resources(trucks=(1,), drivers=(1,), assistants=(2,)):
+    return {"trucks": list(trucks), "drivers": list(drivers), "assistants": list(assistants),
+            "truck_busy": {}, "crew_busy": {}}
+
+
+def _trip(route_id="R1", hours=5.0, ready_at=READY, due=DAY):
+    return {"route_id": route_id, "hours": hours, "orders": [_order(len(route_id), 1)], "space": 10.0,
+            "ready_at": ready_at, "due": due}
+
+
+# ----- build_trips -----
+
+def test_orders_share_the_route_serving_most_orders():
+    stops = [{"route_id": "R1", "city_id": 1, "stop_sequence": 2},
+             {"route_id": "R1", "city_id": 2, "stop_sequence": 1},
+             {"route_id": "R2", "city_id": 2, "stop_sequence": 1}]
+    trips, unscheduled = build_trips([_order(1, 1), _order(2, 2)], stops, ROUTES)
+    assert unscheduled == []
+    assert len(trips) == 1 and trips[0]["route_id"] == "R1"
+    assert [o["order_id"] for o in trips[0]["orders"]] == [2, 1]  # stop_sequence order
+
+
+def test_trips_fill_up_to_truck_capacity():
+    stops = [{"route_id": "R1", "city_id": 1, "stop_sequence": 1}]
+    orders = [_order(1, 1, space=TRUCK_CAPACITY - 10), _order(2, 1, space=10), _order(3, 1, space=10.5)]
+    trips, _ = build_trips(orders, stops, ROUTES)
+    assert sorted(sorted(o["order_id"] for o in t["orders"]) for t in trips) == [[1, 2], [3]]
+    assert all(t["space"] <= TRUCK_CAPACITY for t in trips)
+
+
+def test_trip_waits_for_its_last_goods_and_keeps_earliest_deadline():
+    stops = [{"route_id": "R1", "city_id": 1, "stop_sequence": 1}]
+    late_goods = READY + timedelta(hours=14)
+    trips, _ = build_trips([_order(1, 1, ready_at=late_goods), _order(2, 1, required=DAY - timedelta(days=1))],
+                           stops, ROUTES)
+    assert trips[0]["ready_at"] == late_goods
+    assert trips[0]["due"] == DAY - timedelta(days=1)
+
+
+def test_unroutable_and_oversized_orders_are_reported():
+    stops = [{"route_id": "R1", "city_id": 1, "stop_sequence": 1},
+             {"route_id": "R9", "city_id": 3, "stop_sequence": 1}]  # unknown route
+    trips, unscheduled = build_trips([_order(1, 1, space=TRUCK_CAPACITY + 1), _order(2, 3)], stops, ROUTES)
+    assert trips == []
+    assert unscheduled == [{"order_id": 1, "reason": "Order does not fit on one truck"},
+                           {"order_id": 2, "reason": "No truck route stops at the order's city"}]
+
+
+# ----- plan_day -----
+
+def test_one_truck_runs_trips_back_to_back():
+    roster = _roster(Timeline(1, "D", "Driver", 40), Timeline(2, "A", "Assistant", 60))
+    scheduled, unplaced = plan_day([_trip("R1"), _trip("R2")], _resources(), roster, DAY)
+    assert unplaced == []
+    departures = sorted(t["scheduled_departure"] for t in scheduled)
+    assert departures == [datetime(2030, 1, 7, 8, 0), datetime(2030, 1, 7, 13, 0)]
+    # the kept plan's crew stay on the roster
+    assert roster.employees[1].departures == departures
+
+
+def test_departure_waits_for_the_next_slot_after_the_goods():
+    roster = _roster(Timeline(1, "D", "Driver", 40), Timeline(2, "A", "Assistant", 60))
+    goods = datetime(2030, 1, 7, 10, 10)
+    scheduled, _ = plan_day([_trip(ready_at=goods)], _resources(), roster, DAY)
+    assert scheduled[0]["scheduled_departure"] == datetime(2030, 1, 7, 10, 30)
+    assert scheduled[0]["expected_return"] <= datetime(2030, 1, 7, schedule_crud.SCHEDULE_DAY_END)
+
+
+def test_trip_is_unplaced_when_crew_is_over_weekly_hours():
+    roster = _roster(Timeline(1, "D", "Driver", 4), Timeline(2, "A", "Assistant", 60))
+    scheduled, unplaced = plan_day([_trip()], _resources(), roster, DAY)
+    assert scheduled == [] and len(unplaced) == 1
+    assert roster.employees[1].departures == []
+
+
+def test_local_search_recovers_a_trip_the_greedy_pass_leaves_out():
+    # greedy (deadline order) sends the urgent trip when its goods arrive at
+    # 10:00, which leaves no 8-hour window for the truck; running the long
+    # trip first fits both into the day
+    roster = _roster(Timeline(1, "D", "Driver", 40), Timeline(2, "A", "Assistant", 60))
+    urgent = _trip("R1", hours=4, ready_at=datetime(2030, 1, 7, 10, 0))
+    long_trip = _trip("R2", hours=8, due=DAY + timedelta(days=1))
+    greedy, left_out = schedule_crud.assign_trips([urgent, long_trip], _resources(), roster, DAY)
+    assert left_out == [long_trip]
+    schedule_crud.remove_trips(roster, greedy)
+
+    scheduled, unplaced = plan_day([urgent, long_trip], _resources(), roster, DAY)
+    assert unplaced == []
+    assert {t["route_id"]: t["scheduled_departure"].hour for t in scheduled} == {"R2": 8, "R1": 16}
@@ -0,0 +1,46 @@
+from datetime import date, datetime, timedelta
+
+from app.crud.trains_crud import parse_frequency_days, plan_horizon
+
+MONDAY = date(2025, 12, 29)
+
+
+def _template(template_id=1, frequency_days="Monday,Wednesday", departure=timedelta(hours=22),
+              arrival=timedelta(hours=26)):
+    return {"template_id": template_id, "train_name": f"T{template_id}", "start_station": "Colombo",
+            "destination_station": "Kandy", "departure_time": departure, "arrival_time": arrival,
+            "capacity_space": 100, "status": "Scheduled", "frequency_days": frequency_days}
+
+
+def test_frequency_days_bitmask():
+    assert parse_frequency_days("Monday") == 0b1
+    assert parse_frequency_days("Sunday") == 0b1000000
+    assert parse_frequency_days(" monday , SUNDAY ") == 0b1000001
+    assert parse_frequency_days("Monday,Funday,,Monday") == 0b1
+    assert parse_frequency_days(None) == 0
+    assert parse_frequency_days("") == 0
+
+
+def test_horizon_covers_half_open_window():
+    # [Monday, next Monday): the second Monday is outside the window
+    rows = plan_horizon([_template()], set(), MONDAY, 7)
+    assert [r[3].date() for r in rows] == [date(2025, 12, 29), date(2025, 12, 31)]
+    rows = plan_horizon([_template()], set(), MONDAY, 8)
+    assert rows[-1][3].date() == date(2026, 1, 5)
+
+
+def test_horizon_skips_existing_trains():
+    rows = plan_horizon([_template()], {(1, date(2025, 12, 29))}, MONDAY, 7)
+    assert [r[3].date() for r in rows] == [date(2025, 12, 31)]
+
+
+def test_arrival_past_midnight_lands_next_day():
+    row = plan_horizon([_template()], set(), MONDAY, 1)[0]
+    assert row[3] == datetime(2025, 12, 29, 22, 0)
+    assert row[4] == datetime(2025, 12, 30, 2, 0)
+    assert row[-1] == 1
+
+
+def test_empty_horizon():
+    assert plan_horizon([_template(frequency_days="")], set(), MONDAY, 14) == []
+    assert plan_horizon([_template()], set(), MONDAY, 0) == []
@@ -302,8 +302,10 @@ CREATE TABLE IF NOT EXISTS Train (
   departure_date_time DATETIME NOT NULL,
   arrival_date_time DATETIME NOT NULL,
   capacity_space DOUBLE NOT NULL,
+  utilized_space DOUBLE NOT NULL DEFAULT 0,  -- maintained by the trainallocation triggers
   status VARCHAR(20) DEFAULT 'on-time',
   template_id INT,
+  KEY idx_train_departure (departure_date_time),
   CONSTRAINT FOREIGN KEY (template_id) REFERENCES TrainTemplate(template_id) ON DELETE SET NULL
 );
 
@@ -326,10 +328,10 @@ CREATE TABLE `order` (
   `total_price` decimal(10,2) DEFAULT '0.00',
   `total_space` decimal(10,2) DEFAULT '0.00',
   PRIMARY KEY (`order_id`),
-  KEY `idx_order_customer` (`customer_id`),
   KEY `idx_order_date` (`order_date`),
-  KEY `idx_order_status` (`status`),
-  KEY `order_ibfk_2` (`address_id`),
+  KEY `idx_order_status_date` (`status`,`order_date`),
+  KEY `idx_order_customer_date` (`customer_id`,`order_date`),
+  KEY `idx_order_address_date` (`address_id`,`order_date`),
   CONSTRAINT `order_ibfk_1` FOREIGN KEY (`customer_id`) REFERENCES `customer` (`customer_id`),
   CONSTRAINT `order_ibfk_2` FOREIGN KEY (`address_id`) REFERENCES `customeraddress` (`address_id`),
   CONSTRAINT `order_chk_1` CHECK ((`required_date` >= (`order_date` + interval 7 day)))
@@ -416,7 +418,7 @@ CREATE TABLE `truckdelivery` (
   `status` varchar(20) DEFAULT 'Scheduled',
   PRIMARY KEY (`delivery_id`),
   KEY `store_id` (`store_id`),
-  KEY `idx_delivery_order` (`order_id`),
+  UNIQUE KEY `uq_delivery_order` (`order_id`),  -- one truck delivery per order
   KEY `idx_delivery_route` (`route_id`),
   KEY `idx_delivery_truck` (`truck_id`),
   KEY `idx_delivery_date` (`scheduled_departure`),
@@ -439,87 +441,144 @@ CREATE TABLE `truckemployeeassignment` (
   `employee_id` int NOT NULL,
   `truck_delivery_id` int NOT NULL,
   `assigned_hours` double DEFAULT '0',
+  `scheduled_departure` datetime DEFAULT NULL,  -- copy of truckdelivery.scheduled_departure
   PRIMARY KEY (`assignment_id`),
   KEY `idx_assignment_employee` (`employee_id`),
   KEY `idx_assignment_delivery` (`truck_delivery_id`),
+  KEY `idx_assignment_employee_departure` (`employee_id`,`scheduled_departure`),
   CONSTRAINT `truckemployeeassignment_ibfk_1` FOREIGN KEY (`employee_id`) REFERENCES `employee` (`employee_id`),
   CONSTRAINT `truckemployeeassignment_ibfk_2` FOREIGN KEY (`truck_delivery_id`) REFERENCES `truckdelivery` (`delivery_id`) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
+-- Table: employee_week_hours (assigned hours per employee per week, weeks start on Sunday)
+CREATE TABLE `employee_week_hours` (
+  `employee_id` int NOT NULL,
+  `week_start` date NOT NULL,
+  `assigned_hours` double NOT NULL DEFAULT '0',
+  PRIMARY KEY (`employee_id`,`week_start`),
+  CONSTRAINT `employee_week_hours_ibfk_1` FOREIGN KEY (`employee_id`) REFERENCES `employee` (`employee_id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
 -- =====================================================
 -- 7. TRIGGERS FOR BUSINESS LOGIC
 -- =====================================================
 
--- Trigger for consecutive driver deliveries
+-- Crew roster safety net. The API validates assignments itself
+-- (app/crud/roster_crud.py); these triggers only re-check each insert with
+-- indexed lookups: the (employee_id, scheduled_departure) index for the
+-- driver rest period and employee_week_hours for the weekly limit.
 DELIMITER ;;
 CREATE TRIGGER `check_consecutive_driver_deliveries` BEFORE INSERT ON `truckemployeeassignment` FOR EACH ROW BEGIN
-    DECLARE role_name VARCHAR(20);
-    DECLARE last_delivery_time DATETIME;
-    DECLARE new_delivery_time DATETIME;
-
-    SELECT r.role_name 
-    INTO role_name
-    FROM employee e
-    JOIN roles r ON e.role_id = r.role_id
-    WHERE e.employee_id = NEW.employee_id;
-
-    IF role_name = 'Driver' THEN
-        SELECT td.scheduled_departure 
-        INTO new_delivery_time
-        FROM truckdelivery td
-        WHERE td.delivery_id = NEW.truck_delivery_id;
+    IF NEW.scheduled_departure IS NULL THEN
+        SET NEW.scheduled_departure = (
+            SELECT scheduled_departure FROM truckdelivery WHERE delivery_id = NEW.truck_delivery_id
+        );
+    END IF;
 
-        SELECT td.scheduled_departure
-        INTO last_delivery_time
-        FROM truckemployeeassignment tea
-        JOIN truckdelivery td ON tea.truck_delivery_id = td.delivery_id
+    IF EXISTS (
+        SELECT 1 FROM employee e JOIN roles r ON r.role_id = e.role_id
+        WHERE e.employee_id = NEW.employee_id AND r.role_name = 'Driver'
+    ) AND EXISTS (
+        SELECT 1 FROM truckemployeeassignment tea
         WHERE tea.employee_id = NEW.employee_id
-        ORDER BY td.scheduled_departure DESC
-        LIMIT 1;
-
-        IF last_delivery_time IS NOT NULL 
-           AND ABS(TIMESTAMPDIFF(HOUR, last_delivery_time, new_delivery_time)) < 4 THEN
-            SIGNAL SQLSTATE '45000'
-                SET MESSAGE_TEXT = 'Driver cannot be assigned to consecutive deliveries without rest period.';
-        END IF;
+          AND tea.scheduled_departure > NEW.scheduled_departure - INTERVAL 4 HOUR
+          AND tea.scheduled_departure < NEW.scheduled_departure + INTERVAL 4 HOUR
+    ) THEN
+        SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = 'Driver cannot be assigned to consecutive deliveries without rest period.';
     END IF;
 END ;;
-DELIMITER ;
 
--- Trigger for weekly hours check
-DELIMITER ;;
-CREATE TRIGGER `check_weekly_hours` BEFORE INSERT ON `truckemployeeassignment` FOR EACH ROW BEGIN
+CREATE TRIGGER `check_weekly_hours` BEFORE INSERT ON `truckemployeeassignment` FOR EACH ROW
+FOLLOWS `check_consecutive_driver_deliveries` BEGIN
     DECLARE total_hours DOUBLE DEFAULT 0;
-    DECLARE role_name VARCHAR(20) DEFAULT '';
+    DECLARE role_name VARCHAR(50) DEFAULT '';
     DECLARE max_hours DOUBLE DEFAULT 0;
-    DECLARE new_delivery_week INT DEFAULT 0;
     DECLARE msg VARCHAR(255) DEFAULT '';
 
     SELECT r.role_name, r.max_hours_week
     INTO role_name, max_hours
     FROM employee e
     JOIN roles r ON e.role_id = r.role_id
-    WHERE e.employee_id = NEW.employee_id
-    LIMIT 1;
-
-    SELECT WEEK(td.scheduled_departure)
-    INTO new_delivery_week
-    FROM truckdelivery td
-    WHERE td.delivery_id = NEW.truck_delivery_id
-    LIMIT 1;
+    WHERE e.employee_id = NEW.employee_id;
 
-    SELECT IFNULL(SUM(ta.assigned_hours), 0)
+    SELECT IFNULL(MAX(w.assigned_hours), 0)
     INTO total_hours
-    FROM truckemployeeassignment ta
-    JOIN truckdelivery td ON ta.truck_delivery_id = td.delivery_id
-    WHERE ta.employee_id = NEW.employee_id
-      AND WEEK(td.scheduled_departure) = new_delivery_week;
+    FROM employee_week_hours w
+    WHERE w.employee_id = NEW.employee_id
+      AND w.week_start = DATE(NEW.scheduled_departure) - INTERVAL (DAYOFWEEK(NEW.scheduled_departure) - 1) DAY;
 
     IF total_hours + NEW.assigned_hours > max_hours THEN
         SET msg = CONCAT('Weekly hour limit exceeded for ', role_name, '. Max allowed: ', max_hours, ' hours. Currently assigned: ', total_hours + NEW.assigned_hours);
         SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = msg;
     END IF;
 END ;;
+
+-- employee_week_hours follows truckemployeeassignment
+CREATE TRIGGER `truckemployeeassignment_week_hours_insert` AFTER INSERT ON `truckemployeeassignment` FOR EACH ROW BEGIN
+    INSERT INTO employee_week_hours (employee_id, week_start, assigned_hours)
+    VALUES (NEW.employee_id,
+            DATE(NEW.scheduled_departure) - INTERVAL (DAYOFWEEK(NEW.scheduled_departure) - 1) DAY,
+            NEW.assigned_hours)
+    ON DUPLICATE KEY UPDATE assigned_hours = assigned_hours + NEW.assigned_hours;
+END ;;
+CREATE TRIGGER `truckemployeeassignment_week_hours_update` AFTER UPDATE ON `truckemployeeassignment` FOR EACH ROW BEGIN
+    UPDATE employee_week_hours
+    SET assigned_hours = assigned_hours - OLD.assigned_hours
+    WHERE employee_id = OLD.employee_id
+      AND week_start = DATE(OLD.scheduled_departure) - INTERVAL (DAYOFWEEK(OLD.scheduled_departure) - 1) DAY;
+    INSERT INTO employee_week_hours (employee_id, week_start, assigned_hours)
+    VALUES (NEW.employee_id,
+            DATE(NEW.scheduled_departure) - INTERVAL (DAYOFWEEK(NEW.scheduled_departure) - 1) DAY,
+            NEW.assigned_hours)
+    ON DUPLICATE KEY UPDATE assigned_hours = assigned_hours + NEW.assigned_hours;
+END ;;
+CREATE TRIGGER `truckemployeeassignment_week_hours_delete` AFTER DELETE ON `truckemployeeassignment` FOR EACH ROW BEGIN
+    UPDATE employee_week_hours
+    SET assigned_hours = assigned_hours - OLD.assigned_hours
+    WHERE employee_id = OLD.employee_id
+      AND week_start = DATE(OLD.scheduled_departure) - INTERVAL (DAYOFWEEK(OLD.scheduled_departure) - 1) DAY;
+END ;;
+
+-- keep the denormalized departure of assignments in step with their delivery
+CREATE TRIGGER `truckdelivery_assignment_departure_update` AFTER UPDATE ON `truckdelivery` FOR EACH ROW BEGIN
+    IF NOT (NEW.scheduled_departure <=> OLD.scheduled_departure) THEN
+        UPDATE truckemployeeassignment
+        SET scheduled_departure = NEW.scheduled_departure
+        WHERE truck_delivery_id = NEW.delivery_id;
+    END IF;
+END ;;
+DELIMITER ;
+
+-- Triggers keeping train.utilized_space in step with trainallocation
+-- (cancelled allocations do not use space)
+DELIMITER ;;
+CREATE TRIGGER `trainallocation_utilization_insert` AFTER INSERT ON `trainallocation` FOR EACH ROW BEGIN
+    IF NEW.status <> 'Cancelled' THEN
+        UPDATE train
+        SET utilized_space = utilized_space + NEW.allocated_qty * NEW.unit_space
+        WHERE train_id = NEW.train_id;
+    END IF;
+END ;;
+CREATE TRIGGER `trainallocation_utilization_update` AFTER UPDATE ON `trainallocation` FOR EACH ROW BEGIN
+    IF OLD.status <> 'Cancelled' THEN
+        UPDATE train
+        SET utilized_space = utilized_space - OLD.allocated_qty * OLD.unit_space
+        WHERE train_id = OLD.train_id;
+    END IF;
+    IF NEW.status <> 'Cancelled' THEN
+        UPDATE train
+        SET utilized_space = utilized_space + NEW.allocated_qty * NEW.unit_space
+        WHERE train_id = NEW.train_id;
+    END IF;
+END ;;
+CREATE TRIGGER `trainallocation_utilization_delete` AFTER DELETE ON `trainallocation` FOR EACH ROW BEGIN
+    IF OLD.status <> 'Cancelled' THEN
+        UPDATE train
+        SET utilized_space = utilized_space - OLD.allocated_qty * OLD.unit_space
+        WHERE train_id = OLD.train_id;
+    END IF;
+END ;;
 DELIMITER ;
 
 -- =====================================================
@@ -784,6 +843,133 @@ BEGIN
   END WHILE;
 END //
 DELIMITER ;
+
+-- Recompute train.utilized_space from trainallocation (repairs ledger drift)
+DELIMITER //
+CREATE PROCEDURE sp_rebuild_train_utilization()
+BEGIN
+  UPDATE Train t
+  LEFT JOIN (
+    SELECT train_id, SUM(allocated_qty * unit_space) AS utilized
+    FROM TrainAllocation
+    WHERE status <> 'Cancelled'
+    GROUP BY train_id
+  ) a ON a.train_id = t.train_id
+  SET t.utilized_space = COALESCE(a.utilized, 0)
+  WHERE ABS(t.utilized_space - COALESCE(a.utilized, 0)) > 1e-6;
+END //
+DELIMITER ;
+-- =====================================================
+-- 10. REPORT ROLLUPS
+-- =====================================================
+-- Daily aggregates read by the reports. Triggers record which days changed
+-- in rollup_dirty_day; reports_crud rebuilds those days before reading (a
+-- non-locking check first, then a READ COMMITTED rebuild with SKIP LOCKED).
+
+CREATE TABLE IF NOT EXISTS `rollup_dirty_day` (
+  `rollup_name` varchar(20) NOT NULL,  -- 'sales' | 'deliveries' | 'hours'
+  `day` date NOT NULL,
+  PRIMARY KEY (`rollup_name`,`day`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- order totals per order_date x delivery city (city_id 0 = no address)
+CREATE TABLE IF NOT EXISTS `rollup_orders_daily` (
+  `day` date NOT NULL,
+  `city_id` int NOT NULL,
+  `order_count` int NOT NULL DEFAULT '0',
+  `delivered_count` int NOT NULL DEFAULT '0',
+  `total_price` decimal(14,2) NOT NULL DEFAULT '0.00',
+  PRIMARY KEY (`day`,`city_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- order items per order_date x delivery city x product
+CREATE TABLE IF NOT EXISTS `rollup_sales_daily` (
+  `day` date NOT NULL,
+  `city_id` int NOT NULL,
+  `product_id` int NOT NULL,
+  `order_lines` int NOT NULL DEFAULT '0',
+  `quantity` int NOT NULL DEFAULT '0',
+  `revenue` decimal(14,2) NOT NULL DEFAULT '0.00',
+  PRIMARY KEY (`day`,`city_id`,`product_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- truck deliveries per scheduled day x route x truck
+CREATE TABLE IF NOT EXISTS `rollup_deliveries_daily` (
+  `day` date NOT NULL,
+  `route_id` varchar(5) NOT NULL,
+  `truck_id` int NOT NULL,
+  `total_deliveries` int NOT NULL DEFAULT '0',
+  `delivered_count` int NOT NULL DEFAULT '0',
+  `delayed_count` int NOT NULL DEFAULT '0',
+  `on_time_count` int NOT NULL DEFAULT '0',
+  `timed_deliveries` int NOT NULL DEFAULT '0',  -- deliveries with both actual times
+  `total_hours` bigint NOT NULL DEFAULT '0',
+  PRIMARY KEY (`day`,`route_id`,`truck_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- assigned hours per scheduled day x employee
+CREATE TABLE IF NOT EXISTS `rollup_employee_hours_daily` (
+  `day` date NOT NULL,
+  `employee_id` int NOT NULL,
+  `assignment_count` int NOT NULL DEFAULT '0',
+  `assigned_hours` double NOT NULL DEFAULT '0',
+  PRIMARY KEY (`day`,`employee_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+DELIMITER ;;
+CREATE TRIGGER `order_rollup_insert` AFTER INSERT ON `order` FOR EACH ROW BEGIN
+    INSERT IGNORE INTO rollup_dirty_day VALUES ('sales', NEW.order_date);
+END ;;
+CREATE TRIGGER `order_rollup_update` AFTER UPDATE ON `order` FOR EACH ROW BEGIN
+    INSERT IGNORE INTO rollup_dirty_day VALUES ('sales', OLD.order_date), ('sales', NEW.order_date);
+END ;;
+CREATE TRIGGER `order_rollup_delete` AFTER DELETE ON `order` FOR EACH ROW BEGIN
+    INSERT IGNORE INTO rollup_dirty_day VALUES ('sales', OLD.order_date);
+END ;;
+CREATE TRIGGER `orderitem_rollup_insert` AFTER INSERT ON `orderitem` FOR EACH ROW BEGIN
+    INSERT IGNORE INTO rollup_dirty_day
+    SELECT 'sales', order_date FROM `order` WHERE order_id = NEW.order_id;
+END ;;
+CREATE TRIGGER `orderitem_rollup_update` AFTER UPDATE ON `orderitem` FOR EACH ROW BEGIN
+    INSERT IGNORE INTO rollup_dirty_day
+    SELECT 'sales', order_date FROM `order` WHERE order_id IN (OLD.order_id, NEW.order_id);
+END ;;
+CREATE TRIGGER `orderitem_rollup_delete` AFTER DELETE ON `orderitem` FOR EACH ROW BEGIN
+    INSERT IGNORE INTO rollup_dirty_day
+    SELECT 'sales', order_date FROM `order` WHERE order_id = OLD.order_id;
+END ;;
+CREATE TRIGGER `truckdelivery_rollup_insert` AFTER INSERT ON `truckdelivery` FOR EACH ROW BEGIN
+    INSERT IGNORE INTO rollup_dirty_day VALUES
+        ('deliveries', DATE(NEW.scheduled_departure)), ('hours', DATE(NEW.scheduled_departure));
+END ;;
+CREATE TRIGGER `truckdelivery_rollup_update` AFTER UPDATE ON `truckdelivery` FOR EACH ROW BEGIN
+    INSERT IGNORE INTO rollup_dirty_day VALUES
+        ('deliveries', DATE(OLD.scheduled_departure)), ('deliveries', DATE(NEW.scheduled_departure)),
+        ('hours', DATE(OLD.scheduled_departure)), ('hours', DATE(NEW.scheduled_departure));
+END ;;
+CREATE TRIGGER `truckdelivery_rollup_delete` AFTER DELETE ON `truckdelivery` FOR EACH ROW BEGIN
+    INSERT IGNORE INTO rollup_dirty_day VALUES
+        ('deliveries', DATE(OLD.scheduled_departure)), ('hours', DATE(OLD.scheduled_departure));
+END ;;
+CREATE TRIGGER `truckemployeeassignment_rollup_insert` AFTER INSERT ON `truckemployeeassignment` FOR EACH ROW BEGIN
+    INSERT IGNORE INTO rollup_dirty_day
+    SELECT 'hours', DATE(scheduled_departure) FROM truckdelivery WHERE delivery_id = NEW.truck_delivery_id;
+END ;;
+CREATE TRIGGER `truckemployeeassignment_rollup_update` AFTER UPDATE ON `truckemployeeassignment` FOR EACH ROW BEGIN
+    INSERT IGNORE INTO rollup_dirty_day
+    SELECT 'hours', DATE(scheduled_departure) FROM truckdelivery
+    WHERE delivery_id IN (OLD.truck_delivery_id, NEW.truck_delivery_id);
+END ;;
+CREATE TRIGGER `truckemployeeassignment_rollup_delete` AFTER DELETE ON `truckemployeeassignment` FOR EACH ROW BEGIN
+    INSERT IGNORE INTO rollup_dirty_day
+    SELECT 'hours', DATE(scheduled_departure) FROM truckdelivery WHERE delivery_id = OLD.truck_delivery_id;
+END ;;
+DELIMITER ;
+
+-- mark every existing day dirty; the next report request builds the rollups
+INSERT IGNORE INTO rollup_dirty_day SELECT DISTINCT 'sales', order_date FROM `order`;
+INSERT IGNORE INTO rollup_dirty_day SELECT DISTINCT 'deliveries', DATE(scheduled_departure) FROM truckdelivery;
+INSERT IGNORE INTO rollup_dirty_day SELECT DISTINCT 'hours', DATE(scheduled_departure) FROM truckdelivery;
 -- =====================================================
 -- END OF DATABASE SETUP
 -- =====================================================